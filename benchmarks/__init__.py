@@ -0,0 +1,7 @@
+"""
+    Benchmarks de rendimiento de las funciones de utils.py sobre datasets sintéticos con la
+    estructura de Sentiment140, generados sin necesidad de descargar los datos reales.
+
+    - generador.py genera CSV y ZIP de tweets sintéticos del tamaño deseado.
+    - ejecutar.py mide el tiempo y la memoria de cada etapa y guarda los resultados en JSON.
+"""
@@ -0,0 +1,216 @@
+"""
+    Mide el tiempo y la memoria de cada etapa del procesado de utils.py sobre datasets sintéticos
+    de distintos tamaños y guarda los resultados en JSON, para poder compararlos entre commits.
+
+    Uso:
+        python -m benchmarks.ejecutar --filas 10000 100000 --salida resultados.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Optional
+
+import matplotlib
+
+# Los gráficos se generan sin abrir ventanas
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+
+import utils  # noqa: E402
+from benchmarks import generador  # noqa: E402
+
+# Tamaños por defecto: el dataset reducido de la PEC, el completo de Sentiment140 y dos intermedios
+TAMANOS = (10000, 100000, 800000, 1600000)
+
+ETAPAS = ('carga_dataset', 'carga_dataset_zip', 'carga_dataset_columnar', 'preprocesar_texto',
+          'eliminar_stopwords', 'normalizar_textos', 'obtener_frecuencias_y_vocabulario',
+          'construir_matriz_frecuencias', 'generar_histograma_por_cluster')
+
+
+def _commit_actual() -> Optional[str]:
+    """
+    Devuelve el hash del commit actual del repositorio, o None si no se puede obtener.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def medir(funcion: Callable[[], object], filas: int, memoria: bool = True) -> tuple:
+    """
+    Mide el tiempo real, el tiempo de CPU y, opcionalmente, el pico de memoria de una función.
+
+    La memoria se mide con tracemalloc en una segunda ejecución, para que su sobrecoste no altere
+    la medida de tiempo.
+
+    Parámetros:
+    - funcion (Callable): Función sin argumentos que ejecuta la etapa.
+    - filas (int): Número de registros que procesa la etapa.
+    - memoria (bool): Si es True, se mide también el pico de memoria reservada por Python.
+
+    Devuelve:
+    - tuple: Resultado de la función y diccionario con las medidas.
+    """
+    inicio_real, inicio_cpu = time.perf_counter(), time.process_time()
+    resultado = funcion()
+    segundos, segundos_cpu = time.perf_counter() - inicio_real, time.process_time() - inicio_cpu
+
+    medidas = {
+        'segundos': segundos,
+        'segundos_cpu': segundos_cpu,
+        'filas_por_segundo': filas / segundos if segundos > 0 else None,
+        'memoria_pico_bytes': None,
+    }
+
+    if memoria:
+        tracemalloc.start()
+        try:
+            funcion()
+            medidas['memoria_pico_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return resultado, medidas
+
+
+def _histograma(dataset: list) -> None:
+    utils.generar_histograma_por_cluster(dataset)
+    plt.close('all')
+
+
+def preparar_datos(num_filas: int, directorio: str, semilla: int = 0) -> tuple:
+    """
+    Genera, si no existen ya, el CSV y el ZIP sintéticos de un tamaño dado.
+
+    Devuelve:
+    - tuple: Rutas del CSV y del ZIP.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    csv_file = os.path.join(directorio, f"tweets_{num_filas}_{semilla}.csv")
+    zip_file = os.path.join(directorio, f"tweets_{num_filas}_{semilla}.zip")
+    if not os.path.exists(csv_file):
+        generador.escribir_csv(csv_file, num_filas, semilla)
+    if not os.path.exists(zip_file):
+        generador.escribir_zip(zip_file, num_filas, semilla)
+    return csv_file, zip_file
+
+
+def ejecutar_benchmarks(tamanos: Iterable[int] = TAMANOS, directorio: Optional[str] = None,
+                        etapas: Optional[Iterable[str]] = None, memoria: bool = True, semilla: int = 0) -> dict:
+    """
+    Ejecuta los benchmarks de las etapas indicadas para cada tamaño de dataset.
+
+    Parámetros:
+    - tamanos (Iterable[int]): Número de tweets de cada dataset sintético.
+    - directorio (str, opcional): Carpeta donde se generan y reutilizan los datasets sintéticos.
+    - etapas (Iterable[str], opcional): Etapas a medir. Por defecto, todas las de ETAPAS.
+    - memoria (bool): Si es True, se mide también el pico de memoria de cada etapa.
+    - semilla (int): Semilla del generador de datasets.
+
+    Devuelve:
+    - dict: Metadatos de la ejecución y lista de resultados por tamaño y etapa.
+    """
+    if directorio is None:
+        directorio = os.path.join(tempfile.gettempdir(), 'benchmarks_tweets')
+    etapas = set(ETAPAS if etapas is None else etapas)
+    desconocidas = etapas - set(ETAPAS)
+    if desconocidas:
+        raise ValueError(f"Etapas desconocidas: {sorted(desconocidas)}")
+
+    resultados = []
+    for num_filas in tamanos:
+        csv_file, zip_file = preparar_datos(num_filas, directorio, semilla)
+
+        # Cada etapa recibe la salida de las anteriores; las que no se miden se ejecutan igualmente
+        # si hacen falta para las siguientes
+        etapas_tamano = [
+            ('carga_dataset', lambda: utils.carga_dataset(csv_file)),
+            ('carga_dataset_zip', lambda: utils.carga_dataset_zip(zip_file)),
+            ('carga_dataset_columnar', lambda: utils.carga_dataset_columnar(zip_file)),
+        ]
+        salidas = {}
+        for nombre, funcion in etapas_tamano:
+            if nombre in etapas:
+                salidas[nombre], medidas = medir(funcion, num_filas, memoria)
+                resultados.append({'filas': num_filas, 'etapa': nombre, **medidas})
+
+        dataset = salidas.get('carga_dataset') or utils.carga_dataset(csv_file)
+        textos = [registro['text'] for registro in dataset]
+
+        preprocesados = None
+        if 'preprocesar_texto' in etapas or 'eliminar_stopwords' in etapas:
+            preprocesados, medidas = medir(lambda: [utils.preprocesar_texto(texto) for texto in textos],
+                                           num_filas, memoria and 'preprocesar_texto' in etapas)
+            if 'preprocesar_texto' in etapas:
+                resultados.append({'filas': num_filas, 'etapa': 'preprocesar_texto', **medidas})
+        if 'eliminar_stopwords' in etapas:
+            _, medidas = medir(lambda: [utils.eliminar_stopwords(texto) for texto in preprocesados],
+                               num_filas, memoria)
+            resultados.append({'filas': num_filas, 'etapa': 'eliminar_stopwords', **medidas})
+
+        normalizados, medidas = medir(lambda: utils.normalizar_textos(textos), num_filas,
+                                      memoria and 'normalizar_textos' in etapas)
+        if 'normalizar_textos' in etapas:
+            resultados.append({'filas': num_filas, 'etapa': 'normalizar_textos', **medidas})
+
+        dataset_procesado = [dict(registro, text=texto) for registro, texto in zip(dataset, normalizados)]
+        etapas_procesado = [
+            ('obtener_frecuencias_y_vocabulario',
+             lambda: utils.obtener_frecuencias_y_vocabulario(dataset_procesado)),
+            ('construir_matriz_frecuencias', lambda: utils.construir_matriz_frecuencias(dataset_procesado)),
+            ('generar_histograma_por_cluster', lambda: _histograma(dataset_procesado)),
+        ]
+        for nombre, funcion in etapas_procesado:
+            if nombre in etapas:
+                _, medidas = medir(funcion, num_filas, memoria)
+                resultados.append({'filas': num_filas, 'etapa': nombre, **medidas})
+
+    return {
+        'commit': _commit_actual(),
+        'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'semilla': semilla,
+        'resultados': resultados,
+    }
+
+
+def main(argumentos: Optional[list] = None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmarks de las etapas de utils.py sobre datasets sintéticos.")
+    parser.add_argument('--filas', type=int, nargs='+', default=list(TAMANOS),
+                        help="Número de tweets de cada dataset sintético.")
+    parser.add_argument('--etapas', nargs='+', choices=ETAPAS, default=None,
+                        help="Etapas a medir. Por defecto, todas.")
+    parser.add_argument('--directorio', default=None,
+                        help="Carpeta donde se generan y reutilizan los datasets sintéticos.")
+    parser.add_argument('--salida', default='resultados_benchmark.json',
+                        help="Archivo JSON donde se guardan los resultados.")
+    parser.add_argument('--sin-memoria', action='store_true',
+                        help="No mide el pico de memoria (evita ejecutar cada etapa dos veces).")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla del generador de datasets.")
+    args = parser.parse_args(argumentos)
+
+    informe = ejecutar_benchmarks(args.filas, args.directorio, args.etapas, not args.sin_memoria, args.semilla)
+    with open(args.salida, 'w', encoding='utf-8') as file:
+        json.dump(informe, file, indent=2)
+
+    for resultado in informe['resultados']:
+        memoria = resultado['memoria_pico_bytes']
+        print(f"{resultado['filas']:>9} {resultado['etapa']:<36} {resultado['segundos']:>9.3f} s"
+              + (f" {memoria / 1024 ** 2:>10.1f} MB" if memoria is not None else ''))
+    print(f"\nResultados guardados en {args.salida}", file=sys.stderr)
+    return informe
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+    Generador de datasets sintéticos de tweets con la estructura de Sentiment140: dos etiquetas de
+    sentimiento, usuarios que publican varias veces, fechas consecutivas y textos con URLs,
+    menciones, hashtags, emojis, signos de puntuación y mayúsculas.
+"""
+
+import csv
+import io
+import itertools
+import random
+import zipfile
+from datetime import datetime, timedelta
+from typing import Iterator
+
+COLUMNAS = ['sentiment', 'id', 'date', 'query', 'user', 'text']
+
+# Palabras habituales en cada sentimiento y palabras comunes a ambos, incluidas stopwords
+_PALABRAS_NEGATIVAS = ['work', 'tired', 'sad', 'miss', 'sick', 'hate', 'bad', 'cant', 'sorry', 'rain',
+                       'headache', 'bored', 'lost', 'ugh', 'exam', 'broke', 'late', 'hurts', 'monday', 'lonely']
+_PALABRAS_POSITIVAS = ['love', 'good', 'thanks', 'happy', 'great', 'fun', 'awesome', 'nice', 'lol', 'hope',
+                       'best', 'haha', 'excited', 'cool', 'birthday', 'weekend', 'sunshine', 'friends', 'yay', 'win']
+_PALABRAS_COMUNES = ['im', 'day', 'today', 'time', 'going', 'get', 'go', 'like', 'got', 'back', 'home',
+                     'night', 'now', 'know', 'really', 'one', 'still', 'morning', 'new', 'want', 'see', 'tomorrow',
+                     'i', 'the', 'to', 'a', 'my', 'and', 'is', 'in', 'it', 'for', 'of', 'you', 'me', 'so', 'on']
+_EMOJIS = ['😀', '😢', '❤️', '😂', '👍', '😡', '🎉', '☀️']
+_SIGNOS = ['!', '!!', '...', '?', ',', '.', ':)', ':(', '-']
+
+
+def _pesos_zipf(lista: list) -> list:
+    """Pesos acumulados proporcionales a 1 / posición, como en la ley de Zipf."""
+    return list(itertools.accumulate(1 / posicion for posicion in range(1, len(lista) + 1)))
+
+
+_PESOS_NEGATIVAS = _pesos_zipf(_PALABRAS_NEGATIVAS)
+_PESOS_POSITIVAS = _pesos_zipf(_PALABRAS_POSITIVAS)
+_PESOS_COMUNES = _pesos_zipf(_PALABRAS_COMUNES)
+
+# Número medio de tweets por usuario, similar al de Sentiment140 (1,6 millones de tweets y
+# unos 660.000 usuarios)
+_TWEETS_POR_USUARIO = 2.4
+
+
+def _palabra(aleatorio: random.Random, sentimiento: int) -> str:
+    """
+    Elige una palabra siguiendo una distribución de Zipf dentro de cada lista, de modo que unas
+    pocas palabras concentran la mayor parte de las apariciones.
+    """
+    if aleatorio.random() < 0.6:
+        return aleatorio.choices(_PALABRAS_COMUNES, cum_weights=_PESOS_COMUNES)[0]
+    if sentimiento == 0:
+        return aleatorio.choices(_PALABRAS_NEGATIVAS, cum_weights=_PESOS_NEGATIVAS)[0]
+    return aleatorio.choices(_PALABRAS_POSITIVAS, cum_weights=_PESOS_POSITIVAS)[0]
+
+
+def _texto(aleatorio: random.Random, sentimiento: int, num_usuarios: int) -> str:
+    """
+    Genera el texto de un tweet sintético.
+    """
+    # Alrededor de un 0,5 % de los tweets solo contienen elementos que el preprocesado elimina
+    if aleatorio.random() < 0.005:
+        return aleatorio.choice(['http://twitpic.com/2y1zl', '!!!', '@user1 :)', ''])
+
+    piezas = []
+    for _ in range(aleatorio.randint(3, 22)):
+        azar = aleatorio.random()
+        if azar < 0.04:
+            piezas.append(f"@user{aleatorio.randrange(num_usuarios)}")
+        elif azar < 0.06:
+            piezas.append(f"http://bit.ly/{aleatorio.getrandbits(24):06x}")
+        elif azar < 0.08:
+            piezas.append('#' + _palabra(aleatorio, sentimiento))
+        elif azar < 0.10:
+            piezas.append(aleatorio.choice(_EMOJIS))
+        else:
+            palabra = _palabra(aleatorio, sentimiento)
+            if aleatorio.random() < 0.1:
+                palabra = palabra.upper() if aleatorio.random() < 0.5 else palabra.capitalize()
+            if aleatorio.random() < 0.15:
+                palabra += aleatorio.choice(_SIGNOS)
+            piezas.append(palabra)
+    return ' '.join(piezas)
+
+
+def generar_tweets(num_filas: int, semilla: int = 0) -> Iterator[dict]:
+    """
+    Genera de forma perezosa registros de tweets sintéticos con las seis variables del dataset.
+
+    Parámetros:
+    - num_filas (int): Número de tweets a generar.
+    - semilla (int): Semilla del generador aleatorio, para obtener siempre el mismo dataset.
+
+    Devuelve:
+    - Iterator[dict]: Iterador de diccionarios con las claves de COLUMNAS.
+    """
+    aleatorio = random.Random(semilla)
+    num_usuarios = max(1, int(num_filas / _TWEETS_POR_USUARIO))
+    fecha = datetime(2009, 4, 6, 22, 19, 45)
+    identificador = 1467810369
+
+    for _ in range(num_filas):
+        sentimiento = aleatorio.choice((0, 4))
+        # Un 1 % de los usuarios publica la quinta parte de los tweets
+        if aleatorio.random() < 0.2:
+            usuario = aleatorio.randrange(max(1, num_usuarios // 100))
+        else:
+            usuario = aleatorio.randrange(num_usuarios)
+        fecha += timedelta(seconds=aleatorio.randint(0, 4))
+        identificador += aleatorio.randint(1, 500)
+        yield {
+            'sentiment': str(sentimiento),
+            'id': str(identificador),
+            'date': fecha.strftime('%a %b %d %H:%M:%S PDT %Y'),
+            'query': 'NO_QUERY',
+            'user': f"user{usuario}",
+            'text': _texto(aleatorio, sentimiento, num_usuarios),
+        }
+
+
+def _escribir(file, num_filas: int, semilla: int) -> None:
+    """Escribe en un archivo de texto abierto el CSV con los tweets sintéticos."""
+    writer = csv.DictWriter(file, fieldnames=COLUMNAS)
+    writer.writeheader()
+    writer.writerows(generar_tweets(num_filas, semilla))
+
+
+def escribir_csv(ruta: str, num_filas: int, semilla: int = 0) -> str:
+    """
+    Escribe un CSV de tweets sintéticos con la cabecera que espera utils.carga_dataset.
+
+    Parámetros:
+    - ruta (str): Ruta del CSV a generar.
+    - num_filas (int): Número de tweets.
+    - semilla (int): Semilla del generador aleatorio.
+
+    Devuelve:
+    - str: Ruta del CSV generado.
+    """
+    with open(ruta, 'w', newline='', encoding='utf-8') as file:
+        _escribir(file, num_filas, semilla)
+    return ruta
+
+
+def escribir_zip(ruta: str, num_filas: int, semilla: int = 0, miembro: str = 'twitter_reduced.csv') -> str:
+    """
+    Escribe un ZIP con un CSV de tweets sintéticos, comprimiéndolo a medida que se genera.
+
+    Parámetros:
+    - ruta (str): Ruta del ZIP a generar.
+    - num_filas (int): Número de tweets.
+    - semilla (int): Semilla del generador aleatorio.
+    - miembro (str): Nombre del CSV dentro del ZIP.
+
+    Devuelve:
+    - str: Ruta del ZIP generado.
+    """
+    with zipfile.ZipFile(ruta, 'w', compression=zipfile.ZIP_DEFLATED) as zip_ref:
+        with zip_ref.open(miembro, 'w', force_zip64=True) as binario:
+            with io.TextIOWrapper(binario, encoding='utf-8', newline='') as file:
+                _escribir(file, num_filas, semilla)
+    return ruta
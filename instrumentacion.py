@@ -0,0 +1,237 @@
+"""
+    Instrumentación opcional de las etapas del procesado: tiempo real, tiempo de CPU, incremento
+    del pico de memoria residente (RSS) y filas por segundo de cada función de utils.py, con un
+    informe JSON y, si se pide, un volcado de cProfile al terminar la ejecución.
+
+    Mientras no haya una sesión activa, las funciones de utils.py no se modifican y el contexto
+    etapa() solo comprueba una variable global, por lo que el coste es prácticamente nulo.
+
+    Uso:
+        with Instrumentacion(informe='rendimiento.json', perfil='rendimiento.prof'):
+            dataset = utils.carga_dataset_columnar('data/twitter_reduced.zip')
+            with etapa('mi_etapa', filas=len(dataset)):
+                ...
+"""
+
+import cProfile
+import functools
+import inspect
+import json
+import sys
+import time
+from collections.abc import Sized
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Sesión de instrumentación activa, o None si la instrumentación está desactivada
+_sesion_activa = None
+
+
+def rss_pico() -> Optional[int]:
+    """
+    Devuelve el pico de memoria residente del proceso en bytes, o None si el sistema no lo ofrece.
+    """
+    if resource is None:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo expresa en kilobytes y macOS en bytes
+    return maximo if sys.platform == 'darwin' else maximo * 1024
+
+
+def _contar_filas(argumentos: tuple, resultado) -> Optional[int]:
+    """
+    Estima el número de filas procesadas por una etapa a partir de su resultado o, si no es una
+    colección de registros, de su primer argumento que lo sea.
+    """
+    if isinstance(resultado, tuple) and resultado:
+        resultado = resultado[0]
+    for candidato in (resultado, *argumentos):
+        if isinstance(candidato, Sized) and not isinstance(candidato, (str, bytes, dict)):
+            return len(candidato)
+    return None
+
+
+class Instrumentacion:
+    """
+    Sesión de instrumentación que acumula las medidas de cada etapa y, al cerrarse, escribe el
+    informe JSON y el volcado de cProfile.
+
+    Las etapas anidadas se registran con la ruta de las etapas que las contienen, separada por '/'
+    (por ejemplo 'cargar_preprocesado/preprocesar_dataset'), y su tiempo también se incluye en el
+    de la etapa exterior.
+    """
+
+    def __init__(self, informe: Optional[str] = None, perfil: Optional[str] = None, modulos: tuple = ()):
+        """
+        Parámetros:
+        - informe (str, opcional): Ruta del informe JSON a escribir al cerrar la sesión.
+        - perfil (str, opcional): Ruta del volcado de cProfile a escribir al cerrar la sesión.
+        - modulos (tuple): Módulos cuyas funciones públicas se instrumentan. Por defecto, utils.
+        """
+        self.ruta_informe = informe
+        self.ruta_perfil = perfil
+        self.modulos = modulos
+        self.etapas = {}
+        self._pila = []
+        self._originales = []
+        self._perfilador = None
+        self._inicio = None
+        self.segundos = None
+
+    def instrumentar_modulo(self, modulo) -> None:
+        """
+        Sustituye las funciones públicas definidas en un módulo por versiones instrumentadas. Las
+        originales se restauran al cerrar la sesión.
+        """
+        for nombre, funcion in list(vars(modulo).items()):
+            if (nombre.startswith('_') or not inspect.isfunction(funcion)
+                    or funcion.__module__ != modulo.__name__):
+                continue
+            self._originales.append((modulo, nombre, funcion))
+            setattr(modulo, nombre, instrumentar(funcion))
+
+    def registrar(self, nombre: str, segundos: float, segundos_cpu: float, filas: Optional[int],
+                  incremento_rss: Optional[int] = None) -> None:
+        """
+        Acumula las medidas de una llamada a una etapa.
+
+        Parámetros:
+        - incremento_rss (int, opcional): Bytes que ha subido el pico de RSS del proceso durante la
+          llamada. Se guarda el mayor de todas las llamadas; es 0 si la etapa no superó el pico
+          alcanzado antes de empezar.
+        """
+        medidas = self.etapas.setdefault(nombre, {'llamadas': 0, 'segundos': 0.0, 'segundos_cpu': 0.0,
+                                                  'filas': None, 'incremento_rss_pico_bytes': None})
+        medidas['llamadas'] += 1
+        medidas['segundos'] += segundos
+        medidas['segundos_cpu'] += segundos_cpu
+        if filas is not None:
+            medidas['filas'] = (medidas['filas'] or 0) + filas
+        if incremento_rss is not None:
+            medidas['incremento_rss_pico_bytes'] = max(medidas['incremento_rss_pico_bytes'] or 0, incremento_rss)
+
+    def informe(self) -> dict:
+        """
+        Devuelve el informe con las medidas de cada etapa, en el orden en que se ejecutaron.
+
+        Devuelve:
+        - dict: Duración total de la sesión, pico de RSS del proceso y medidas de cada etapa.
+        """
+        etapas = []
+        for nombre, medidas in self.etapas.items():
+            filas, segundos = medidas['filas'], medidas['segundos']
+            etapas.append({'etapa': nombre, **medidas,
+                           'filas_por_segundo': filas / segundos if filas is not None and segundos > 0 else None})
+        segundos = self.segundos if self.segundos is not None else time.perf_counter() - self._inicio
+        return {'segundos': segundos, 'rss_pico_bytes': rss_pico(), 'etapas': etapas}
+
+    def iniciar(self) -> 'Instrumentacion':
+        """
+        Activa la sesión: instrumenta los módulos y, si se pidió, arranca cProfile.
+        """
+        global _sesion_activa
+        if _sesion_activa is not None:
+            raise RuntimeError("Ya hay una sesión de instrumentación activa.")
+        if not self.modulos:
+            import utils
+            self.modulos = (utils,)
+        for modulo in self.modulos:
+            self.instrumentar_modulo(modulo)
+        _sesion_activa = self
+        self._inicio = time.perf_counter()
+        if self.ruta_perfil is not None:
+            self._perfilador = cProfile.Profile()
+            self._perfilador.enable()
+        return self
+
+    def finalizar(self) -> dict:
+        """
+        Cierra la sesión: restaura las funciones originales y escribe el informe y el perfil.
+
+        Devuelve:
+        - dict: Informe de la sesión.
+        """
+        global _sesion_activa
+        if self._perfilador is not None:
+            self._perfilador.disable()
+            self._perfilador.dump_stats(self.ruta_perfil)
+            self._perfilador = None
+        self.segundos = time.perf_counter() - self._inicio
+        for modulo, nombre, funcion in reversed(self._originales):
+            setattr(modulo, nombre, funcion)
+        self._originales = []
+        _sesion_activa = None
+
+        informe = self.informe()
+        if self.ruta_informe is not None:
+            with open(self.ruta_informe, 'w', encoding='utf-8') as file:
+                json.dump(informe, file, indent=2)
+        return informe
+
+    def __enter__(self) -> 'Instrumentacion':
+        return self.iniciar()
+
+    def __exit__(self, *excepcion) -> None:
+        self.finalizar()
+
+
+class _Etapa:
+    """
+    Medida en curso de una etapa. El bloque with puede fijar el número de filas procesadas
+    asignando el atributo filas.
+    """
+
+    __slots__ = ('filas',)
+
+    def __init__(self, filas: Optional[int] = None):
+        self.filas = filas
+
+
+@contextmanager
+def etapa(nombre: str, filas: Optional[int] = None):
+    """
+    Contexto que mide un bloque de código como una etapa de la sesión activa. Si no hay sesión
+    activa, no mide nada.
+
+    Parámetros:
+    - nombre (str): Nombre de la etapa en el informe.
+    - filas (int, opcional): Número de filas procesadas, para calcular las filas por segundo.
+    """
+    sesion = _sesion_activa
+    medida = _Etapa(filas)
+    if sesion is None:
+        yield medida
+        return
+
+    sesion._pila.append(nombre)
+    ruta = '/'.join(sesion._pila)
+    inicio_real, inicio_cpu, pico_inicial = time.perf_counter(), time.process_time(), rss_pico()
+    try:
+        yield medida
+    finally:
+        sesion._pila.pop()
+        pico_final = rss_pico()
+        sesion.registrar(ruta, time.perf_counter() - inicio_real, time.process_time() - inicio_cpu,
+                         medida.filas, None if pico_final is None else pico_final - pico_inicial)
+
+
+def instrumentar(funcion: Callable) -> Callable:
+    """
+    Decorador que mide cada llamada a una función como una etapa con su mismo nombre. El número de
+    filas se obtiene del resultado o de los argumentos.
+    """
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if _sesion_activa is None:
+            return funcion(*args, **kwargs)
+        with etapa(funcion.__name__) as medida:
+            resultado = funcion(*args, **kwargs)
+            medida.filas = _contar_filas(args, resultado)
+        return resultado
+
+    return envoltura
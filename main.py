@@ -1,52 +1,103 @@
 """
     Código que ejecuta todas las funciones contenidas en utils.py.
+
+    Sin subcomando se ejecuta el análisis completo. Cada etapa puede ejecutarse también por
+    separado, por ejemplo:
+        python3 main.py preprocesar data/twitter_reduced.zip --salida data/twitter_processed.bin
+        python3 main.py graficos data/twitter_processed.bin --directorio-salida data/graficos
 """
 
 
+import argparse
+import itertools
+from datetime import datetime, timezone
 import re
+import sys
+import instrumentacion
 import utils
 
-if __name__ == "__main__":
-    # Proceso de descompresión de un archivo zip
-    zip_file = 'data/twitter_reduced.zip'
-    target_folder = 'data'
-    utils.descomprime_zip(zip_file, target_folder)
+ZIP_FILE = 'data/twitter_reduced.zip'
+CSV_FILE = 'data/twitter_processed.csv'
+BINARIO_FILE = 'data/twitter_processed.bin'
+CORPUS_DIR = 'data/corpus_tokens'
+INDICE_FILE = 'data/twitter_indice.bin'
+CACHE_DIR = 'data/cache'
 
-    # Proceso de carga de un archivo csv.
-    csv_file = 'data/twitter_reduced.csv'
-    dataset = utils.carga_dataset(csv_file)
 
-    # Mostrar los primeros 5 registros del dataset
+def cargar_registros(entrada: str) -> utils.DatasetColumnar:
+    """
+    Carga el dataset de un archivo zip o CSV, o del archivo binario generado por el subcomando
+    preprocesar.
+    """
+    if entrada.endswith('.bin'):
+        return utils.cargar_dataset_binario(entrada)[0]
+    return utils.carga_dataset_columnar(entrada)
+
+
+def mostrar_registros(entrada: str, dataset: utils.DatasetColumnar = None) -> None:
+    """
+    Muestra los primeros 5 registros del dataset: los del dataset ya cargado, si se indica, o si no
+    los leídos del csv contenido en el archivo zip sin extraerlo a disco, directamente del CSV o del
+    archivo binario generado por el subcomando preprocesar.
+    """
     print("\nPrimeros 5 registros del dataset:")
-    for i in range(min(5, len(dataset))):
-        print(dataset[i])
+    if dataset is not None:
+        registros = iter(dataset)
+    elif entrada.endswith('.bin'):
+        registros = iter(cargar_registros(entrada))
+    else:
+        registros = utils.iterar_registros(entrada)
+    for registro in itertools.islice(registros, 5):
+        print(dict(registro))
+
+
+def cargar_procesado(entrada: str, args: argparse.Namespace) -> tuple:
+    """
+    Obtiene el dataset preprocesado y su matriz de frecuencias. Si la entrada es el archivo binario
+    generado por el subcomando preprocesar, se lee directamente; si es un ZIP o un CSV, se carga y
+    preprocesa, reutilizando la caché si el contenido y la configuración no han cambiado, y se
+    eliminan los casi duplicados si se pidió con --casi-duplicados.
+    """
+    if entrada.endswith('.bin'):
+        return utils.cargar_dataset_binario(entrada)
+
+    cache = None if args.sin_cache else utils.CachePreprocesado(args.cache)
+    dataset, matriz = utils.cargar_preprocesado(entrada, cache, procesos=args.procesos)
+
+    # Eliminar los tweets casi duplicados (retweets, spam) antes de contar las frecuencias
+    if args.casi_duplicados is not None:
+        num_tweets = len(dataset)
+        dataset = utils.eliminar_casi_duplicados(dataset, args.casi_duplicados)
+        matriz = utils.construir_matriz_frecuencias(dataset)
+        print(f"\nTweets casi duplicados eliminados: {num_tweets - len(dataset)}")
+    return dataset, matriz
 
-    # Preprocesamiento de los textos en el dataset.
-    for data in dataset:
-        data['text'] = utils.preprocesar_texto(data['text'])
-        data['text'] = utils.eliminar_stopwords(data['text'])
 
-    # Imprimir los primeros 5 registros después del preprocesamiento
+def mostrar_preprocesado(dataset) -> None:
+    """
+    Muestra los primeros y los últimos 5 registros del dataset preprocesado.
+    """
     print("\nPrimeros 5 registros después del preprocesamiento:")
     for i in range(min(5, len(dataset))):
         print(dataset[i])
 
-    # Imprimir las 5 últimas filas del dataset después del preprocesamiento
     print("\nÚltimas 5 filas después del preprocesamiento:")
     for data in dataset[-5:]:
         print(data)
 
-    # Obtener las frecuencias y el vocabulario
-    frecuencias, vocabulario = utils.obtener_frecuencias_y_vocabulario(dataset)
+
+def mostrar_frecuencias(dataset, matriz_frecuencias) -> None:
+    """
+    Muestra las frecuencias de términos de los primeros tweets y el vocabulario, y las agrega a
+    cada registro del dataset.
+    """
+    # Vocabulario de la matriz de frecuencias, ya ordenado alfabéticamente
+    vocabulario = matriz_frecuencias.vocabulario
 
     # Mostrar los primeros 5 elementos de la lista de diccionarios con la nueva estructura
     print("\nPrimeros 5 elementos de la lista de diccionarios:")
-    for i in range(min(5, len(frecuencias))):
-        frecuencia_actualizada = {palabra: frecuencias[i].get(palabra, 0) for palabra in frecuencias[i].keys()}
-        print(frecuencia_actualizada)
-
-    # Ordenar alfabéticamente el vocabulario
-    vocabulario.sort()
+    for i in range(min(5, len(matriz_frecuencias))):
+        print(matriz_frecuencias.fila_como_dict(i))
 
     # Filtrar las palabras utilizando expresiones regulares, para evitar que aparezcan solo números
     patron = r'^[a-zA-Z]+$'
@@ -57,53 +108,426 @@ if __name__ == "__main__":
     print(vocabulario_filtrado[:10])
 
     # Agregar las frecuencias de términos a cada registro del dataset
-    utils.agregar_frecuencias(dataset)
+    dataset.establecer_frecuencias(matriz_frecuencias)
 
     # Imprimir el elemento 20 del dataset
-    print("\nElemento 20 del dataset:")
-    print(dataset[19])
+    if len(dataset) >= 20:
+        print("\nElemento 20 del dataset:")
+        print(dataset[19])
+
+
+def guardar(dataset, matriz_frecuencias, csv_file: str, binario_file: str, corpus_dir: str,
+            indice_file: str = None) -> None:
+    """
+    Guarda el dataset procesado en CSV, en formato binario, como corpus de identificadores de
+    términos y como índice invertido. Las rutas vacías se omiten.
+    """
+    dataset.establecer_frecuencias(matriz_frecuencias)
 
     # Código para guardar el dataset en formato CSV
-    csv_file = 'data/twitter_processed.csv'
-    utils.guardar_dataset_csv(dataset, csv_file)
+    if csv_file:
+        utils.guardar_dataset_csv(dataset, csv_file)
+
+    # Guardar también el dataset en formato binario, mucho más rápido de volver a cargar
+    if binario_file:
+        utils.guardar_dataset_binario(dataset, binario_file, matriz_frecuencias)
 
+    # Guardar el corpus como identificadores de términos mapeables en memoria, para que otros
+    # procesos de análisis lo compartan sin volver a construir las cadenas de cada tweet
+    if corpus_dir:
+        utils.guardar_corpus_tokens(dataset, corpus_dir)
+
+    # Guardar el índice invertido de los términos, para consultar qué tweets contienen unas
+    # palabras sin recorrer el dataset
+    if indice_file:
+        utils.IndiceInvertido.construir(dataset, matriz_frecuencias).guardar(indice_file)
+
+
+def mostrar_estadisticas(dataset, csv_file: str = None) -> list:
+    """
+    Muestra el número de clusters, los tweets de cada cluster, el porcentaje de textos vacíos y el
+    resto del perfil de calidad del dataset. Si se indica csv_file, el número de clusters se obtiene
+    leyendo el CSV procesado.
+
+    Devuelve:
+    - list: Registros del dataset sin elementos nulos.
+    """
     # Código para leer el dataset procesado y obtener el número de clusters
-    csv_file = 'data/twitter_processed.csv'
-    num_clusters = utils.obtener_numero_clusters(csv_file)
+    num_clusters = utils.obtener_numero_clusters(csv_file if csv_file else dataset)
     print("\nNúmero de clusters:", num_clusters)
 
-    # Eliminar elementos vacíos
-    dataset_sin_nulos = utils.eliminar_elementos_nulos(dataset)
+    # Número de tweets de cada cluster, recogido durante la carga del dataset
+    print("\nTweets por cluster:", utils.obtener_estadisticas_clusters(dataset))
+
+    # Eliminar elementos vacíos y obtener el perfil de calidad del dataset en una sola pasada
+    dataset_sin_nulos, perfil = utils.perfilar_calidad(dataset)
 
     # Verificar los elementos vacíos
-    porcentaje_nulos = utils.verificar_elementos_vacios(dataset)
-    print(f"\nPorcentaje de elementos nulos en el dataset original: {porcentaje_nulos}%")
-    porcentaje_vacios_sin_nulos = utils.verificar_elementos_vacios(dataset_sin_nulos)
+    print(f"\nPorcentaje de elementos nulos en el dataset original: {perfil.porcentaje_vacios}%")
+    porcentaje_vacios_sin_nulos = 0.0 if dataset_sin_nulos else 100.0
     print(f"\nPorcentaje de elementos nulos en el dataset sin elementos nulos: {porcentaje_vacios_sin_nulos}%")
 
+    resumen = perfil.resumen()
+    print(f"\nIdentificadores repetidos: {resumen['ids_duplicados']}")
+    print(f"Textos repetidos: {resumen['textos_duplicados']}")
+    print(f"Longitud de los textos: {resumen['longitud_texto']}")
+    print(f"Tokens por texto: {resumen['tokens_texto']}")
+
+    return dataset_sin_nulos
+
+
+def generar_graficos(dataset_sin_nulos, directorio_salida: str = None) -> None:
+    """
+    Genera el word cloud y el histograma de frecuencias de cada cluster. Si se indica un directorio
+    de salida, los word clouds se guardan como PNG en lugar de mostrarse.
+    """
+    # Código para generar el histograma de frecuencias por cluster, a partir del índice de conteos
+    # por cluster construido en una sola pasada
+    indice_clusters = utils.construir_indice_por_cluster(dataset_sin_nulos)
+
     # Generar el word cloud por cluster
-    utils.generar_wordcloud_por_cluster(dataset_sin_nulos)
+    rutas = utils.generar_wordcloud_por_cluster(dataset_sin_nulos, directorio_salida, indice=indice_clusters)
+    if rutas:
+        print("\nWord clouds guardados en:", ', '.join(rutas))
+
+    utils.generar_histograma_por_cluster(dataset_sin_nulos, indice=indice_clusters)
+
 
-    # Código para generar el histograma de frecuencias por cluster
-    utils.generar_histograma_por_cluster(dataset_sin_nulos)
+def _enumerar_terminos(terminos: list, num_terminos: int = 5) -> str:
+    """Enumera entre comillas los primeros términos de una lista, como en las respuestas."""
+    return ', '.join(f"'{termino.capitalize()}'" for termino in terminos[:num_terminos]) or 'ninguna'
+
+
+def mostrar_respuestas(dataset, matriz_frecuencias) -> None:
+    """
+    Muestra las respuestas al Ejercicio 7. Las de los apartados a), b) y c) se calculan a partir de
+    las frecuencias documentales de cada cluster, como los histogramas; los empates se resuelven por
+    orden alfabético, de modo que entre términos con la misma frecuencia el orden puede diferir del
+    de los histogramas. El cluster de etiqueta menor se toma como el de los sentimientos negativos y
+    el de etiqueta mayor como el de los positivos.
+    """
+    analisis = utils.analizar_terminos_por_cluster(dataset, matriz_frecuencias, k=20, por_documento=True)
+    clusters = analisis['clusters']
+    cluster_negativo, cluster_positivo = (clusters[0], clusters[-1]) if clusters else (None, None)
+    negativos, positivos = (analisis['mas_frecuentes'].get(cluster, [])
+                            for cluster in (cluster_negativo, cluster_positivo))
+    distintivos_negativos, distintivos_positivos = (
+        [termino for termino, _ in analisis['distintivos'].get(cluster, [])]
+        for cluster in (cluster_negativo, cluster_positivo))
 
-    # Respuestas al Ejercicio 7
     print("\nPREGUNTAS - Ejercicio 7")
     print("\na) ¿Cuáles son las palabras más utilizadas en las críticas positivas?")
     print("\nRespuesta: "
-          "\nLas palabras más utilizadas en los sentimientos positivos son: 'Im', 'Good', 'Love', 'Day', 'Thanks'")
+          "\nLas palabras más utilizadas en los sentimientos positivos son: "
+          f"{_enumerar_terminos([termino for termino, _ in positivos])}"
+          f"\nLas más características frente a los negativos son: {_enumerar_terminos(distintivos_positivos)}")
 
     print("\nb) ¿Cuáles son las palabras más utilizadas en las críticas negativas?")
     print("\nRespuesta: "
-          "\nLas palabras más utilizadas en los sentimientos negativos son: 'Im', 'Work', 'Go', 'Get', 'Cant'")
+          "\nLas palabras más utilizadas en los sentimientos negativos son: "
+          f"{_enumerar_terminos([termino for termino, _ in negativos])}"
+          f"\nLas más características frente a los positivos son: {_enumerar_terminos(distintivos_negativos)}")
 
     print("\nc) ¿Hay palabras que aparezcan tanto en los sentimientos positivos como negativos?")
-    print("\nRespuesta: "
-          "\nSí, hay palabras que aparecen en ambos sentimientos, como: 'Im', 'Like', 'Day', 'Today', 'Time'")
+    if analisis['compartidos']:
+        print("\nRespuesta: "
+              "\nSí, hay palabras que aparecen entre las 20 más utilizadas de ambos sentimientos, como: "
+              f"{_enumerar_terminos(analisis['compartidos'])}")
+    else:
+        print("\nRespuesta: \nNo, ninguna palabra está entre las 20 más utilizadas de ambos sentimientos.")
 
     print("\nd) A partir de la WordCloud, ¿Qué se puede deducir sobre el sentimiento general de cada grupo?")
     print("\nRespuesta: "
-          "\nEn el cluster 0 (asociado a sentimientos negativos) se observa insatisfacción por falta de tiempo, "
-          "trabajo y obligaciones.")
+          f"\nEn el cluster {cluster_negativo} (asociado a sentimientos negativos) se observa insatisfacción por "
+          "falta de tiempo, trabajo y obligaciones.")
     print("\nRespuesta: "
-          "\nEn el cluster 1 (asociado a sentimientos positivos) se observa gratitud, amor y felicidad explícita.")
+          f"\nEn el cluster {cluster_positivo} (asociado a sentimientos positivos) se observa gratitud, amor y "
+          "felicidad explícita.")
+
+
+def comando_extraer(args: argparse.Namespace) -> None:
+    utils.descomprime_zip(args.entrada, args.destino)
+    print(f"\nArchivo {args.entrada} descomprimido en {args.destino}")
+    mostrar_registros(args.entrada)
+
+
+def comando_cargar(args: argparse.Namespace) -> None:
+    dataset = cargar_registros(args.entrada)
+    mostrar_registros(args.entrada, dataset)
+    print(f"\nRegistros cargados: {len(dataset)}")
+    print("\nTweets por cluster:", utils.obtener_estadisticas_clusters(dataset))
+
+
+def comando_preprocesar(args: argparse.Namespace) -> None:
+    dataset, matriz_frecuencias = cargar_procesado(args.entrada, args)
+    mostrar_preprocesado(dataset)
+    if args.salida:
+        utils.guardar_dataset_binario(dataset, args.salida, matriz_frecuencias)
+        print(f"\nDataset preprocesado guardado en {args.salida}")
+
+
+def mostrar_ngramas(dataset, n: int, max_ngramas: int) -> None:
+    """
+    Muestra los n-gramas más frecuentes de cada cluster, contados con un límite de memoria.
+    """
+    contador = utils.contar_ngramas(dataset, n, max_ngramas)
+    precision = "exactas" if contador.exacto else f"estimadas por exceso, error <= {contador.cota_error()}"
+    print(f"\n{n}-gramas más frecuentes por cluster (frecuencias {precision}):")
+    for sentimiento in contador.sentimientos:
+        print(f"Cluster {sentimiento}:", contador.mas_frecuentes(sentimiento, 10))
+
+
+def comando_contar(args: argparse.Namespace) -> None:
+    dataset, matriz_frecuencias = cargar_procesado(args.entrada, args)
+    mostrar_frecuencias(dataset, matriz_frecuencias)
+    if args.ngramas:
+        mostrar_ngramas(dataset, args.ngramas, args.max_ngramas)
+
+
+def comando_frecuentes(args: argparse.Namespace) -> None:
+    # Se recorre el archivo una sola vez sin cargarlo en memoria: solo se guardan los contadores
+    contador = utils.frecuentes_streaming(utils.iterar_registros(args.entrada), args.capacidad)
+    print(f"\nTweets procesados: {contador.num_tweets}")
+    for sentimiento in contador.sentimientos:
+        print(f"\nCluster {sentimiento} (frecuencias como mucho {contador.cota_error(sentimiento)} "
+              "por debajo de las reales):")
+        print(contador.mas_frecuentes(sentimiento, args.mostrar))
+
+
+def comando_temporal(args: argparse.Namespace) -> None:
+    dataset, matriz_frecuencias = cargar_procesado(args.entrada, args)
+    serie = utils.agregar_por_tiempo(dataset, matriz_frecuencias, args.intervalo)
+    if serie.num_fechas_no_validas:
+        print(f"\nSe omiten {serie.num_fechas_no_validas} tweets con una fecha no válida.")
+    proporciones = serie.proporciones
+    print(f"\nTweets, % de cada cluster ({', '.join(serie.sentimientos)}) y palabras más frecuentes por "
+          f"{args.intervalo} (UTC):")
+    for intervalo, inicio in enumerate(serie.inicios.tolist()):
+        num_tweets = int(serie.tweets[intervalo].sum())
+        if num_tweets == 0:
+            continue
+        porcentajes = ' '.join(f"{100 * proporcion:5.1f}%" for proporcion in proporciones[intervalo])
+        terminos = ', '.join(termino for termino, _ in serie.mas_frecuentes(intervalo, args.mostrar))
+        fecha = datetime.fromtimestamp(inicio, timezone.utc)
+        print(f"{fecha:%Y-%m-%d %H:%M} {num_tweets:>8} {porcentajes}  {terminos}")
+
+
+def comando_usuarios(args: argparse.Namespace) -> None:
+    dataset, matriz_frecuencias = cargar_procesado(args.entrada, args)
+    indice = utils.IndiceUsuarios.construir(dataset, matriz_frecuencias)
+    usuarios = args.usuario or [usuario for usuario, _ in indice.mas_activos(args.mostrar)]
+    print(f"\nUsuarios distintos: {len(indice)}")
+    for usuario in usuarios:
+        balance = ', '.join(f"{sentimiento}: {100 * proporcion:.1f}%"
+                            for sentimiento, proporcion in indice.balance(usuario).items())
+        print(f"\n{usuario}: {indice.num_tweets(usuario)} tweets ({balance})")
+        print("Palabras más frecuentes:", indice.mas_frecuentes(usuario, 5))
+
+
+def mostrar_conteos(acumulador, perfil) -> None:
+    """
+    Muestra los tweets de cada cluster, el porcentaje de textos vacíos, el tamaño del vocabulario
+    y las palabras más frecuentes de cada cluster a partir de los conteos acumulados.
+    """
+    print("\nTweets por cluster:", dict(sorted(acumulador.tweets_por_sentimiento.items())))
+    print(f"Porcentaje de textos vacíos tras el preprocesado: {perfil.porcentaje_vacios:.2f}%")
+    print(f"Tamaño del vocabulario: {len(acumulador.conteos)}")
+    for sentimiento in acumulador.sentimientos:
+        print(f"\nCluster {sentimiento}:", acumulador.mas_frecuentes(sentimiento, 10, por_documento=True))
+
+
+def comando_flujo(args: argparse.Namespace) -> None:
+    # Lectura, normalización y recuento a la vez, sin cargar el dataset completo en memoria
+    mostrar_conteos(*utils.procesar_en_flujo(args.entrada, args.procesos, args.tamano_bloque, args.tamano_cola))
+
+
+def comando_fragmentos(args: argparse.Namespace) -> None:
+    # Cada fragmento se procesa en un proceso y los resultados parciales se combinan en orden
+    fragmentos = utils.expandir_fragmentos(args.fragmentos)
+    print(f"\nFragmentos: {len(fragmentos)}")
+    mostrar_conteos(*utils.procesar_fragmentos(fragmentos, args.procesos, args.tamano_bloque))
+
+
+def comando_guardar(args: argparse.Namespace) -> None:
+    dataset, matriz_frecuencias = cargar_procesado(args.entrada, args)
+    guardar(dataset, matriz_frecuencias, args.csv, args.binario, args.corpus, args.indice)
+
+
+def comando_buscar(args: argparse.Namespace) -> None:
+    indice = utils.IndiceInvertido.cargar(args.indice)
+    posiciones = indice.consultar(args.terminos, args.modo)
+    print(f"\nTweets que contienen {f' {args.modo.upper()} '.join(args.terminos)}: {len(posiciones)}")
+    print("Tweets por cluster:", indice.contar_por_sentimiento(args.terminos, args.modo))
+
+    if args.mostrar and args.dataset:
+        dataset, _ = utils.cargar_dataset_binario(args.dataset)
+        for posicion in posiciones[:args.mostrar].tolist():
+            print(dataset[posicion])
+
+
+def comando_estadisticas(args: argparse.Namespace) -> None:
+    dataset, _ = cargar_procesado(args.entrada, args)
+    mostrar_estadisticas(dataset)
+
+
+def comando_graficos(args: argparse.Namespace) -> None:
+    dataset, _ = cargar_procesado(args.entrada, args)
+    generar_graficos(utils.eliminar_elementos_nulos(dataset), args.directorio_salida)
+
+
+def comando_todo(args: argparse.Namespace) -> None:
+    # Mostrar los primeros 5 registros del dataset
+    mostrar_registros(args.entrada)
+
+    # Carga del dataset almacenado por columnas, preprocesamiento de los textos con eliminación de
+    # stopwords repartido entre todos los núcleos y cálculo de las frecuencias como matriz dispersa.
+    # Si el zip y la configuración no han cambiado desde la última ejecución, se lee de la caché.
+    dataset, matriz_frecuencias = cargar_procesado(args.entrada, args)
+    mostrar_preprocesado(dataset)
+    mostrar_frecuencias(dataset, matriz_frecuencias)
+
+    guardar(dataset, matriz_frecuencias, args.csv, args.binario, args.corpus, args.indice)
+    dataset_sin_nulos = mostrar_estadisticas(dataset, args.csv)
+    generar_graficos(dataset_sin_nulos, args.directorio_salida)
+    mostrar_respuestas(dataset, matriz_frecuencias)
+
+
+def _opciones_comunes(parser: argparse.ArgumentParser, por_defecto: bool = True) -> None:
+    """
+    Añade las opciones comunes a todas las etapas. En los subcomandos se añaden sin valor por
+    defecto, para no sobrescribir las indicadas antes del nombre del subcomando.
+    """
+    def defecto(valor):
+        return valor if por_defecto else argparse.SUPPRESS
+
+    parser.add_argument('--sin-cache', action='store_true', default=defecto(False),
+                        help="Preprocesa el dataset aunque exista un resultado en la caché.")
+    parser.add_argument('--cache', metavar='DIRECTORIO', default=defecto(CACHE_DIR),
+                        help="Carpeta de la caché del preprocesado.")
+    parser.add_argument('--procesos', type=int, default=defecto(None),
+                        help="Número de procesos del preprocesado. Por defecto, uno por núcleo.")
+    parser.add_argument('--casi-duplicados', metavar='UMBRAL', type=float, default=defecto(None),
+                        help="Elimina los tweets con una similitud de Jaccard igual o mayor que UMBRAL "
+                             "con otro anterior.")
+    parser.add_argument('--informe-rendimiento', metavar='RUTA', default=defecto(None),
+                        help="Mide cada etapa y guarda el informe de tiempos y memoria en un JSON.")
+    parser.add_argument('--perfil', metavar='RUTA', default=defecto(None),
+                        help="Guarda además un volcado de cProfile de toda la ejecución.")
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    """
+    Crea el parser de la línea de comandos, con un subcomando por etapa del análisis.
+    """
+    parser = argparse.ArgumentParser(description="Análisis de sentimientos de una bbdd de tweets.")
+    _opciones_comunes(parser)
+    parser.add_argument('--invalidar-cache', action='store_true',
+                        help="Elimina todas las entradas de la caché del preprocesado y termina.")
+    subparsers = parser.add_subparsers(dest='comando', metavar='COMANDO')
+
+    def subcomando(nombre: str, funcion, ayuda: str, entrada: str = ZIP_FILE) -> argparse.ArgumentParser:
+        subparser = subparsers.add_parser(nombre, help=ayuda, description=ayuda)
+        _opciones_comunes(subparser, por_defecto=False)
+        subparser.add_argument('entrada', nargs='?', default=entrada,
+                               help=f"Archivo de entrada (por defecto {entrada}).")
+        subparser.set_defaults(funcion=funcion)
+        return subparser
+
+    subparser = subcomando('extraer', comando_extraer, "Descomprime el archivo zip del dataset.")
+    subparser.add_argument('--destino', default='data', help="Carpeta donde se extrae el zip.")
+    subcomando('cargar', comando_cargar, "Carga el dataset y muestra sus primeros registros.")
+    subparser = subcomando('preprocesar', comando_preprocesar,
+                           "Preprocesa los textos y guarda el resultado en formato binario.")
+    subparser.add_argument('--salida', default=BINARIO_FILE, help="Archivo binario de salida.")
+    subparser = subcomando('contar', comando_contar, "Muestra las frecuencias de términos y el vocabulario.")
+    subparser.add_argument('--ngramas', metavar='N', type=int, default=None,
+                           help="Muestra también los N-gramas más frecuentes de cada cluster.")
+    subparser.add_argument('--max-ngramas', type=int, default=1000000,
+                           help="N-gramas distintos con conteo exacto; a partir de ahí se estiman.")
+    subparser = subcomando('frecuentes', comando_frecuentes,
+                           "Cuenta en streaming, con memoria fija, las palabras más frecuentes de cada cluster.")
+    subparser.add_argument('--capacidad', type=int, default=1000,
+                           help="Número máximo de palabras con contador de cada cluster.")
+    subparser.add_argument('--mostrar', type=int, default=20, help="Número de palabras a mostrar por cluster.")
+    subparser = subcomando('temporal', comando_temporal,
+                           "Muestra por hora o por día los tweets de cada cluster y las palabras más frecuentes.",
+                           BINARIO_FILE)
+    subparser.add_argument('--intervalo', choices=tuple(utils.INTERVALOS), default='dia',
+                           help="Duración de cada intervalo.")
+    subparser.add_argument('--mostrar', type=int, default=5, help="Número de palabras a mostrar por intervalo.")
+    subparser = subcomando('usuarios', comando_usuarios,
+                           "Muestra los tweets, el balance de sentimientos y las palabras más frecuentes de los "
+                           "usuarios que más publican o de los indicados.", BINARIO_FILE)
+    subparser.add_argument('--usuario', action='append', default=None,
+                           help="Usuario a consultar. Puede repetirse.")
+    subparser.add_argument('--mostrar', type=int, default=10, help="Número de usuarios con más tweets a mostrar.")
+    subparser = subcomando('flujo', comando_flujo,
+                           "Lee, preprocesa y cuenta el dataset a la vez, por bloques, con memoria acotada.")
+    subparser.add_argument('--tamano-bloque', type=int, default=10000, help="Número de tweets de cada bloque.")
+    subparser.add_argument('--tamano-cola', type=int, default=4,
+                           help="Número máximo de bloques en espera entre cada par de etapas.")
+    subparser = subparsers.add_parser('fragmentos', help="Procesa en paralelo varios archivos zip o CSV como uno solo.",
+                                      description="Lee, preprocesa y cuenta cada fragmento en un proceso y combina "
+                                                  "los resultados, idénticos a los del archivo concatenado.")
+    _opciones_comunes(subparser, por_defecto=False)
+    subparser.add_argument('fragmentos', nargs='+', help="Rutas o patrones glob (entre comillas) de los fragmentos.")
+    subparser.add_argument('--tamano-bloque', type=int, default=10000, help="Número de tweets de cada bloque.")
+    subparser.set_defaults(funcion=comando_fragmentos)
+    subparser = subcomando('guardar', comando_guardar, "Guarda el dataset procesado en CSV y en binario.")
+    for subparser_guardado in (subparser, parser):
+        subparser_guardado.add_argument('--csv', default=CSV_FILE, help="CSV de salida.")
+        subparser_guardado.add_argument('--binario', default=BINARIO_FILE, help="Archivo binario de salida.")
+        subparser_guardado.add_argument('--corpus', default=CORPUS_DIR, help="Carpeta del corpus de tokens.")
+        subparser_guardado.add_argument('--indice', default=INDICE_FILE, help="Archivo del índice invertido.")
+    subparser = subparsers.add_parser('buscar', help="Busca los tweets que contienen unos términos.",
+                                      description="Busca en el índice invertido los tweets que contienen unos "
+                                                  "términos y los cuenta por cluster.")
+    subparser.add_argument('terminos', nargs='+', help="Términos a buscar, ya preprocesados.")
+    subparser.add_argument('--modo', choices=('and', 'or'), default='and',
+                           help="Tweets con todos los términos (and) o con alguno (or).")
+    subparser.add_argument('--indice', default=INDICE_FILE, help="Archivo del índice invertido.")
+    subparser.add_argument('--dataset', default=BINARIO_FILE,
+                           help="Dataset binario del que se muestran los tweets encontrados.")
+    subparser.add_argument('--mostrar', type=int, default=5, help="Número de tweets encontrados a mostrar.")
+    subparser.set_defaults(funcion=comando_buscar)
+    subcomando('estadisticas', comando_estadisticas, "Muestra los clusters y el porcentaje de textos vacíos.",
+               BINARIO_FILE)
+    subparser = subcomando('graficos', comando_graficos, "Genera los word clouds y los histogramas.",
+                           BINARIO_FILE)
+    for subparser_graficos in (subparser, parser):
+        subparser_graficos.add_argument('--directorio-salida', default=None,
+                                        help="Guarda los word clouds como PNG en esta carpeta en lugar de "
+                                             "mostrarlos.")
+
+    parser.add_argument('--entrada', default=ZIP_FILE, help=f"Archivo de entrada (por defecto {ZIP_FILE}).")
+    parser.set_defaults(funcion=comando_todo)
+    return parser
+
+
+def main(argumentos: list = None) -> None:
+    args = crear_parser().parse_args(argumentos)
+
+    if args.invalidar_cache:
+        cache = utils.CachePreprocesado(args.cache)
+        print(f"Entradas de la caché eliminadas: {cache.invalidar()}")
+        sys.exit(0)
+
+    # Instrumentación opcional de las funciones de utils.py, sin coste si no se activa
+    if not (args.informe_rendimiento or args.perfil):
+        args.funcion(args)
+        return
+
+    # El informe se escribe también si alguna etapa falla, con las medidas tomadas hasta entonces
+    sesion = instrumentacion.Instrumentacion(args.informe_rendimiento, args.perfil).iniciar()
+    try:
+        args.funcion(args)
+    finally:
+        informe = sesion.finalizar()
+
+        # Resumen de la instrumentación; el informe completo queda en el JSON indicado
+        for medida in informe['etapas']:
+            print(f"{medida['etapa']:<64} {medida['segundos']:>9.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,21 @@
     Conjuntos de test unitarios para validar la correcta ejecución de las funciones
 """
 
+import json
 import os
 import shutil
+import subprocess
+import sys
 import zipfile
 import tempfile
+import numpy as np
 import pandas as pd
 import unittest
+import instrumentacion
+import main
+from collections import Counter
 from unittest import mock
-from unittest.mock import patch, Mock
+from unittest.mock import call, patch, Mock
 import utils
 
 
@@ -104,6 +111,118 @@ class TestUtils(unittest.TestCase):
 
         print("La carga del dataset se completó exitosamente.")
 
+    def test_iterar_registros_zip(self):
+        """Prueba unitaria para las funciones iterar_registros_zip y carga_dataset_zip."""
+        zip_file = os.path.join(self.temp_dir, 'tweets.zip')
+        csv_data = ('sentiment,id,date,query,user,text\r\n'
+                    '0,1,2022-01-01,query1,user1,Hello\r\n'
+                    '4,2,2022-01-02,query2,user2,"World, again"\r\n')
+        with zipfile.ZipFile(zip_file, 'w') as zip_ref:
+            zip_ref.writestr('leeme.txt', 'No es un CSV')
+            zip_ref.writestr('tweets.csv', csv_data)
+            zip_ref.writestr('otros.csv', 'sentiment,id,date,query,user,text\r\n4,3,d,q,u,Other\r\n')
+
+        # La lectura es perezosa y no extrae ningún archivo a disco
+        registros = utils.iterar_registros_zip(zip_file)
+        self.assertNotIsInstance(registros, list)
+        self.assertEqual(next(registros)['text'], 'Hello')
+        registros.close()
+        self.assertEqual(os.listdir(self.temp_dir), ['tweets.zip'])
+
+        # Por defecto se lee el primer CSV del ZIP
+        dataset = utils.carga_dataset_zip(zip_file)
+        self.assertEqual(dataset, [
+            {'sentiment': '0', 'id': '1', 'date': '2022-01-01', 'query': 'query1', 'user': 'user1', 'text': 'Hello'},
+            {'sentiment': '4', 'id': '2', 'date': '2022-01-02', 'query': 'query2', 'user': 'user2',
+             'text': 'World, again'}
+        ])
+
+        # Selección explícita del miembro a leer
+        dataset = utils.carga_dataset_zip(zip_file, 'otros.csv')
+        self.assertEqual([registro['text'] for registro in dataset], ['Other'])
+
+        # ZIP sin ningún CSV
+        zip_sin_csv = os.path.join(self.temp_dir, 'sin_csv.zip')
+        with zipfile.ZipFile(zip_sin_csv, 'w') as zip_ref:
+            zip_ref.writestr('leeme.txt', 'No es un CSV')
+        with self.assertRaises(ValueError):
+            utils.carga_dataset_zip(zip_sin_csv)
+
+        print("El test de iterar_registros_zip pasó correctamente.")
+
+    def test_dataset_columnar(self):
+        """Prueba unitaria para la clase DatasetColumnar y la función carga_dataset_columnar."""
+        csv_file = os.path.join(self.temp_dir, 'tweets.csv')
+        with open(csv_file, 'w', newline='', encoding='utf-8') as file:
+            file.write('sentiment,id,date,query,user,text\r\n'
+                       '0,1467810369,Mon Apr 06 22:19:45 PDT 2009,NO_QUERY,user1,Hello  World\r\n'
+                       '4,1467810672,Mon Apr 06 22:19:49 PDT 2009,NO_QUERY,user2,\r\n'
+                       '0,1467810917,Mon Apr 06 22:19:53 PDT 2009,NO_QUERY,user1,Good morning\r\n')
+        zip_file = os.path.join(self.temp_dir, 'tweets.zip')
+        with zipfile.ZipFile(zip_file, 'w') as zip_ref:
+            zip_ref.write(csv_file, 'tweets.csv')
+
+        esperado = utils.carga_dataset(csv_file)
+        for fichero in (csv_file, zip_file):
+            with self.subTest(fichero=fichero):
+                dataset = utils.carga_dataset_columnar(fichero)
+                self.assertIsInstance(dataset, utils.DatasetColumnar)
+                self.assertEqual(len(dataset), 3)
+                self.assertEqual(list(dataset), esperado)
+                self.assertEqual(dataset[-1], esperado[-1])
+                self.assertEqual(dataset[1:], esperado[1:])
+
+        # Los valores repetidos se almacenan una sola vez
+        dataset = utils.carga_dataset_columnar(csv_file)
+        self.assertEqual(len(dataset._tablas['query']), 1)
+        self.assertEqual(len(dataset._tablas['user']), 2)
+        self.assertEqual(dataset._sentiment.typecode, 'b')
+        self.assertEqual(dataset._id.typecode, 'q')
+
+        # Las vistas permiten modificar los registros y funcionan con el resto de funciones
+        for registro in dataset:
+            registro['text'] = utils.eliminar_stopwords(utils.preprocesar_texto(registro['text']))
+        self.assertEqual(dataset.columna('text'), ['hello world', '', 'good morning'])
+        self.assertNotIn('frecuencias', dataset[0])
+
+        utils.agregar_frecuencias(dataset)
+        self.assertEqual(dataset[0]['frecuencias'], {'hello': 1, 'world': 1})
+        self.assertEqual(set(dataset[0].keys()), set(utils.COLUMNAS_DATASET) | {'frecuencias'})
+
+        sin_nulos = utils.eliminar_elementos_nulos(dataset)
+        self.assertEqual([registro['id'] for registro in sin_nulos], ['1467810369', '1467810917'])
+        self.assertAlmostEqual(utils.verificar_elementos_vacios(dataset), 100 / 3)
+
+        csv_salida = os.path.join(self.temp_dir, 'procesado.csv')
+        utils.guardar_dataset_csv(dataset, csv_salida)
+        self.assertEqual(pd.read_csv(csv_salida)['sentiment'].tolist(), [0, 4, 0])
+
+        # Los valores que no son enteros canónicos se conservan tal cual, también al guardar en binario
+        registros = [{'sentiment': '', 'id': '', 'date': '', 'query': '', 'user': '', 'text': 'hola',
+                      'frecuencias': {'hola': 1}},
+                     {'sentiment': '4', 'id': '007', 'date': '', 'query': '', 'user': '', 'text': 'adios'}]
+        especiales = utils.DatasetColumnar(registros)
+        self.assertEqual(list(especiales), [registros[0], dict(registros[1], frecuencias=None)])
+        self.assertEqual(especiales.estadisticas_clusters(), {'4': 1, '': 1})
+        self.assertEqual(especiales.seleccionar([1, 0]).columna('id'), ['007', ''])
+        especiales[1]['sentiment'] = 'neutral'
+        self.assertEqual(especiales.estadisticas_clusters(), {'': 1, 'neutral': 1})
+        binario = os.path.join(self.temp_dir, 'especiales.bin')
+        utils.guardar_dataset_binario(especiales, binario)
+        cargado, _ = utils.cargar_dataset_binario(binario)
+        self.assertEqual(cargado.columna('sentiment'), ['', 'neutral'])
+        self.assertEqual(cargado.columna('id'), ['', '007'])
+        self.assertEqual(cargado.estadisticas_clusters(), {'': 1, 'neutral': 1})
+
+        with self.assertRaises(IndexError):
+            dataset[3]
+        with self.assertRaises(KeyError):
+            dataset[0]['inexistente']
+        with self.assertRaises(TypeError):
+            del dataset[0]['text']
+
+        print("El test de DatasetColumnar pasó correctamente.")
+
     def test_preprocesar_texto(self):
         """Prueba unitaria para la función preprocesar_texto."""
         casos_prueba = [
@@ -222,6 +341,103 @@ class TestUtils(unittest.TestCase):
 
         print("El test_eliminar_stopwords se completó exitosamente.")
 
+    def test_normalizar_textos(self):
+        """Prueba unitaria para las funciones normalizar_textos y preprocesar_dataset."""
+        textos = [
+            "I Love #PYTHON! https://uoc.edu",
+            "this is a TEST!!! 12345 www.example.com/the",
+            "#http://t.co/abc is NOT good...",
+            "HTTP://Capitals stay, no?",
+            "   Spaces at the Beginning and End   ",
+            "Ünïcödé İstanbul ß 😀 émojis",
+            "",
+            "!@#$%^&*()",
+            "tabs\tand\nnew lines",
+        ]
+
+        # El resultado coincide con aplicar preprocesar_texto y eliminar_stopwords por separado
+        esperados = [utils.eliminar_stopwords(utils.preprocesar_texto(texto)) for texto in textos]
+        self.assertEqual(utils.normalizar_textos(textos), esperados)
+        self.assertEqual(utils.normalizar_textos(iter(textos), como_tokens=True),
+                         [esperado.split() for esperado in esperados])
+        self.assertEqual(utils.normalizar_textos(textos[:2]), ["love python", "test 12345"])
+
+        # Stopwords configurables
+        self.assertEqual(utils.normalizar_textos(["I love the Python code"], stopwords={'python', 'code'}),
+                         ["i love the"])
+        self.assertEqual(utils.eliminar_stopwords("i love the python code", stopwords=['python']),
+                         "i love the code")
+
+        # Preprocesado de un dataset completo, tanto en lista como en formato columnar
+        registros = [
+            {'sentiment': '0', 'id': '1', 'date': 'd', 'query': 'q', 'user': 'u', 'text': textos[0]},
+            {'sentiment': '4', 'id': '2', 'date': 'd', 'query': 'q', 'user': 'u', 'text': textos[1]},
+        ]
+        columnar = utils.DatasetColumnar(registros)
+        utils.preprocesar_dataset(registros)
+        utils.preprocesar_dataset(columnar)
+        self.assertEqual([registro['text'] for registro in registros], ["love python", "test 12345"])
+        self.assertEqual(list(columnar), registros)
+
+        print("El test de normalizar_textos pasó correctamente.")
+
+    def test_normalizar_textos_paralelo(self):
+        """Prueba unitaria para el preprocesado con varios procesos."""
+        textos = ["I Love #PYTHON! https://uoc.edu", "", "!@#$%^&*()", "Line\nbreaks\nINSIDE",
+                  "this is a TEST!!! 12345", "Hi my name is FRAN-", "   Spaces   ", "the end"]
+        serie = utils.normalizar_textos(textos)
+
+        # Mismo resultado y mismo orden que el modo secuencial, para distintos tamaños de bloque
+        for tamano_bloque in (1, 3, 100):
+            with self.subTest(tamano_bloque=tamano_bloque):
+                paralelo = utils.normalizar_textos_paralelo(iter(textos), procesos=2, tamano_bloque=tamano_bloque)
+                self.assertEqual(paralelo, serie)
+
+        self.assertEqual(utils.normalizar_textos_paralelo(textos, procesos=2, stopwords={'love'}),
+                         utils.normalizar_textos(textos, stopwords={'love'}))
+        self.assertEqual(utils.normalizar_textos_paralelo([], procesos=2), [])
+        with self.assertRaises(ValueError):
+            utils.normalizar_textos_paralelo(textos, procesos=2, tamano_bloque=0)
+
+        # Preprocesado de un dataset con varios procesos
+        dataset = [{'sentiment': '0', 'id': str(i), 'date': 'd', 'query': 'q', 'user': 'u', 'text': texto}
+                   for i, texto in enumerate(textos)]
+        utils.preprocesar_dataset(dataset, procesos=2, tamano_bloque=2)
+        self.assertEqual([registro['text'] for registro in dataset], serie)
+
+        print("El test de normalizar_textos_paralelo pasó correctamente.")
+
+    def test_detectar_casi_duplicados(self):
+        """Prueba unitaria para las funciones detectar_casi_duplicados y eliminar_casi_duplicados."""
+        textos = ['love sun today', 'love sun today happy', 'hate rain', '', 'love sun today',
+                  'totally different words', 'hate rain now', '']
+
+        # Cada texto apunta al primero de su grupo; los vacíos y los únicos apuntan a sí mismos
+        representantes = utils.detectar_casi_duplicados(textos, umbral=0.6)
+        self.assertEqual(representantes.tolist(), [0, 0, 2, 3, 0, 5, 2, 7])
+        # Con un umbral más alto solo quedan las copias exactas
+        self.assertEqual(utils.detectar_casi_duplicados(textos, umbral=0.9).tolist(), [0, 1, 2, 3, 0, 5, 6, 7])
+        self.assertEqual(utils.detectar_casi_duplicados([]).tolist(), [])
+
+        # Las firmas estiman la similitud de Jaccard y no dependen del tamaño del bloque
+        firmas, con_shingles = utils.firmas_minhash(textos, num_permutaciones=128)
+        self.assertEqual(con_shingles.tolist(), [True, True, True, False, True, True, True, False])
+        self.assertTrue((firmas[0] == firmas[4]).all())
+        self.assertAlmostEqual((firmas[0] == firmas[1]).mean(), 0.75, delta=0.15)
+        self.assertTrue((utils.firmas_minhash(textos, num_permutaciones=128, tamano_bloque=3)[0] == firmas).all())
+
+        # Se conserva el primer tweet de cada grupo, con el mismo tipo de dataset
+        dataset = [{'sentiment': str(4 * (i % 2)), 'id': str(i), 'date': 'd', 'query': 'q', 'user': 'u',
+                    'text': texto} for i, texto in enumerate(textos)]
+        sin_duplicados = utils.eliminar_casi_duplicados(dataset, umbral=0.6)
+        self.assertEqual([registro['id'] for registro in sin_duplicados], ['0', '2', '3', '5', '7'])
+        columnar = utils.eliminar_casi_duplicados(utils.DatasetColumnar(dataset), umbral=0.6)
+        self.assertIsInstance(columnar, utils.DatasetColumnar)
+        self.assertEqual([dict(registro) for registro in columnar], sin_duplicados)
+        self.assertEqual(columnar.estadisticas_clusters(), {'0': 2, '4': 3})
+
+        print("El test de detectar_casi_duplicados pasó correctamente.")
+
     def test_obtener_frecuencias_y_vocabulario(self):
         """Prueba unitaria para la función frecuencias_y_vocabulario."""
         # Definir el dataset de prueba con frases largas y palabras repetidas
@@ -262,6 +478,125 @@ class TestUtils(unittest.TestCase):
 
         print("El test obtener_frecuencias_y_vocabulario se completó exitosamente.")
 
+    def test_matriz_frecuencias(self):
+        """Prueba unitaria para la salida dispersa de obtener_frecuencias_y_vocabulario."""
+        dataset = [
+            {"sentiment": "0", "text": "test sentence repeated words sentence"},
+            {"sentiment": "4", "text": "test sentence repeated test test words"},
+            {"sentiment": "0", "text": ""},
+            {"sentiment": "4", "text": "new test"},
+            {"sentiment": "0", "text": "test vocabulary"},
+        ]
+        frecuencias, vocabulario = utils.obtener_frecuencias_y_vocabulario(dataset)
+        matriz, indice_terminos = utils.obtener_frecuencias_y_vocabulario(dataset, formato='dispersa')
+
+        # Estructura CSR y vocabulario ordenado
+        self.assertIsInstance(matriz, utils.MatrizFrecuencias)
+        self.assertEqual(matriz.forma, (5, 6))
+        self.assertEqual(matriz.vocabulario, vocabulario)
+        self.assertEqual(indice_terminos, {termino: i for i, termino in enumerate(vocabulario)})
+        self.assertEqual(matriz.indptr.tolist(), [0, 4, 8, 8, 10, 12])
+
+        # Las filas reproducen los diccionarios por tweet, en el mismo orden de claves
+        self.assertEqual(matriz.a_diccionarios(), frecuencias)
+        self.assertEqual(list(matriz.fila_como_dict(1)), list(frecuencias[1]))
+
+        # Operaciones vectorizadas
+        columna_test = indice_terminos['test']
+        self.assertEqual(matriz.frecuencias_totales()[columna_test], 6)
+        self.assertEqual(matriz.frecuencias_documentales()[columna_test], 4)
+        grupos, sumas = matriz.sumar_por_grupo([d['sentiment'] for d in dataset])
+        self.assertEqual(grupos, ['0', '4'])
+        self.assertEqual(sumas[:, columna_test].tolist(), [2, 4])
+        _, documentos = matriz.sumar_por_grupo([d['sentiment'] for d in dataset], por_documento=True)
+        self.assertEqual(documentos[:, columna_test].tolist(), [2, 2])
+        self.assertEqual(matriz.mas_frecuentes(2), [('test', 6), ('sentence', 3)])
+        self.assertEqual(matriz.mas_frecuentes(1, sumas[0]), [('sentence', 2)])
+
+        # Un DatasetColumnar guarda la columna 'frecuencias' como matriz
+        columnar = utils.DatasetColumnar(
+            {'sentiment': d['sentiment'], 'id': str(i), 'date': '', 'query': '', 'user': '', 'text': d['text']}
+            for i, d in enumerate(dataset))
+        utils.agregar_frecuencias(columnar)
+        self.assertIsInstance(columnar._frecuencias, utils.MatrizFrecuencias)
+        self.assertEqual([registro['frecuencias'] for registro in columnar], frecuencias)
+        columnar[2]['frecuencias'] = {'manual': 1}
+        self.assertEqual(columnar[2]['frecuencias'], {'manual': 1})
+        self.assertEqual(columnar[3]['frecuencias'], frecuencias[3])
+
+        with self.assertRaises(ValueError):
+            utils.obtener_frecuencias_y_vocabulario(dataset, formato='desconocido')
+
+        print("El test de la matriz de frecuencias pasó correctamente.")
+
+    def test_acumulador_frecuencias(self):
+        """Prueba unitaria para la clase AcumuladorFrecuencias."""
+        dataset = [
+            {"sentiment": "0", "text": "test sentence repeated words sentence"},
+            {"sentiment": "4", "text": "test sentence repeated test test words"},
+            {"sentiment": "0", "text": ""},
+            {"sentiment": "4", "text": "new test"},
+            {"sentiment": "0", "text": "test vocabulary"},
+        ]
+
+        # Conteos sobre el dataset completo
+        acumulador = utils.AcumuladorFrecuencias().actualizar(dataset)
+        _, vocabulario = utils.obtener_frecuencias_y_vocabulario(dataset)
+        self.assertEqual(acumulador.vocabulario, vocabulario)
+        self.assertEqual(acumulador.num_tweets, 5)
+        self.assertEqual(acumulador.tweets_por_sentimiento, {'0': 3, '4': 2})
+        self.assertEqual(acumulador.conteos['test'], 6)
+        self.assertEqual(acumulador.conteos_por_sentimiento['0']['sentence'], 2)
+        self.assertEqual(acumulador.conteos_por_sentimiento['4']['test'], 4)
+
+        # Actualización incremental por lotes
+        incremental = utils.AcumuladorFrecuencias()
+        for inicio in range(0, len(dataset), 2):
+            incremental.actualizar(iter(dataset[inicio:inicio + 2]))
+        self.assertEqual(incremental, acumulador)
+
+        # La fusión de fragmentos es asociativa y no modifica los operandos
+        a = utils.AcumuladorFrecuencias().actualizar(dataset[:1])
+        b = utils.AcumuladorFrecuencias().actualizar(dataset[1:3])
+        c = utils.AcumuladorFrecuencias().actualizar(dataset[3:])
+        self.assertEqual((a + b) + c, acumulador)
+        self.assertEqual(a.fusionar(b.fusionar(c)), acumulador)
+        self.assertEqual(a.num_tweets, 1)
+        self.assertEqual(utils.AcumuladorFrecuencias() + acumulador, acumulador)
+
+        print("El test de AcumuladorFrecuencias pasó correctamente.")
+
+    def test_construir_indice_por_cluster(self):
+        """Prueba unitaria para la función construir_indice_por_cluster."""
+        dataset = [
+            {"sentiment": "0", "text": "work work tired today"},
+            {"sentiment": "4", "text": "love today good day"},
+            {"sentiment": "0", "text": "tired monday work"},
+            {"sentiment": "4", "text": "good good morning love"},
+            {"sentiment": "0", "text": "cant sleep today"},
+            {"sentiment": "4", "text": ""},
+        ]
+        indice = utils.construir_indice_por_cluster(dataset)
+        self.assertEqual(indice.sentimientos, ['0', '4'])
+
+        # Los top por documento coinciden con el cálculo original del histograma, incluidos los empates
+        frecuencias, _ = utils.obtener_frecuencias_y_vocabulario(dataset)
+        for cluster in indice.sentimientos:
+            with self.subTest(cluster=cluster):
+                esperado = Counter([palabra for j, frecuencia in enumerate(frecuencias)
+                                    for palabra in frecuencia
+                                    if dataset[j]['sentiment'] == cluster]).most_common(20)
+                self.assertEqual(indice.mas_frecuentes(cluster, 20, por_documento=True), esperado)
+
+        # Consultas top-k por número de apariciones, por cluster y globales
+        self.assertEqual(indice.mas_frecuentes('0', 1), [('work', 3)])
+        self.assertEqual(indice.mas_frecuentes('0', 1, por_documento=True), [('work', 2)])
+        self.assertEqual(indice.mas_frecuentes('4', 2), [('good', 3), ('love', 2)])
+        self.assertEqual(indice.mas_frecuentes(k=1, por_documento=True), [('today', 3)])
+        self.assertEqual(indice.mas_frecuentes('inexistente', 5), [])
+
+        print("El test de construir_indice_por_cluster pasó correctamente.")
+
     def test_agregar_frecuencias(self):
         """Prueba unitaria para la función agregar_frecuencias."""
         # Datos de prueba
@@ -317,6 +652,603 @@ class TestUtils(unittest.TestCase):
 
         print("El test de obtener_numero_clusters pasó correctamente.")
 
+    def test_obtener_estadisticas_clusters(self):
+        """Prueba unitaria para la función obtener_estadisticas_clusters."""
+        registros = [
+            {'sentiment': '0', 'id': '1', 'date': 'd1', 'query': 'q', 'user': 'u1', 'text': 'hello world'},
+            {'sentiment': '4', 'id': '2', 'date': 'd2', 'query': 'q', 'user': 'u2', 'text': 'good, morning'},
+            {'sentiment': '0', 'id': '3', 'date': 'd3', 'query': 'q', 'user': 'u1', 'text': ''},
+        ]
+        esperado = {'0': 2, '4': 1}
+
+        # Estadísticas sobre el dataset en memoria, en lista y en formato columnar
+        self.assertEqual(utils.obtener_estadisticas_clusters(registros), esperado)
+        columnar = utils.DatasetColumnar(registros)
+        self.assertEqual(utils.obtener_estadisticas_clusters(columnar), esperado)
+        self.assertEqual(utils.obtener_numero_clusters(columnar), 2)
+
+        # Las estadísticas del formato columnar se mantienen al añadir o modificar registros
+        columnar.append(dict(registros[0], sentiment='2'))
+        columnar[1]['sentiment'] = '0'
+        self.assertEqual(columnar.estadisticas_clusters(), {'0': 3, '2': 1})
+
+        # Lectura por bloques de la columna 'sentiment' de un CSV con frecuencias
+        utils.agregar_frecuencias(registros)
+        csv_file = os.path.join(self.temp_dir, 'procesado.csv')
+        utils.guardar_dataset_csv(registros, csv_file)
+        self.assertEqual(utils.obtener_estadisticas_clusters(csv_file, tamano_bloque=1), esperado)
+        self.assertEqual(utils.obtener_numero_clusters(csv_file), len(pd.read_csv(csv_file)['sentiment'].unique()))
+
+        print("El test de obtener_estadisticas_clusters pasó correctamente.")
+
+    def test_cache_preprocesado(self):
+        """Prueba unitaria para la clase CachePreprocesado y la función cargar_preprocesado."""
+        csv_file = os.path.join(self.temp_dir, 'tweets.csv')
+        with open(csv_file, 'w', newline='', encoding='utf-8') as file:
+            file.write('sentiment,id,date,query,user,text\r\n'
+                       '0,1,d1,NO_QUERY,user1,I hate Mondays http://t.co/x\r\n'
+                       '4,2,d2,NO_QUERY,user2,Loving the SUN!!\r\n')
+        cache = utils.CachePreprocesado(os.path.join(self.temp_dir, 'cache'))
+
+        # Primera ejecución: se preprocesa y se guarda en la caché
+        with patch('utils.carga_dataset_columnar', wraps=utils.carga_dataset_columnar) as mock_carga:
+            dataset, matriz = utils.cargar_preprocesado(csv_file, cache)
+            self.assertEqual(mock_carga.call_count, 1)
+        self.assertEqual(dataset.columna('text'), ['hate mondays', 'loving sun'])
+        self.assertEqual(matriz.vocabulario, ['hate', 'loving', 'mondays', 'sun'])
+        self.assertEqual(len(os.listdir(cache.directorio)), 1)
+
+        # Segunda ejecución: se lee de la caché sin volver a cargar el archivo
+        with patch('utils.carga_dataset_columnar') as mock_carga:
+            dataset_cache, matriz_cache = utils.cargar_preprocesado(csv_file, cache)
+            mock_carga.assert_not_called()
+        self.assertEqual(list(dataset_cache), list(dataset))
+        self.assertEqual(matriz_cache.a_diccionarios(), matriz.a_diccionarios())
+        self.assertEqual(matriz_cache.indice_terminos, matriz.indice_terminos)
+
+        # Las entradas usan el formato binario de guardar_dataset_binario
+        entrada, = os.listdir(cache.directorio)
+        self.assertEqual(utils.cargar_dataset_binario(os.path.join(cache.directorio, entrada))[0].columna('text'),
+                         dataset.columna('text'))
+
+        # La clave depende del contenido del archivo y de la configuración del preprocesado
+        clave = cache.clave(csv_file)
+        self.assertNotEqual(cache.clave(csv_file, stopwords={'sun'}), clave)
+        dataset_sun, _ = utils.cargar_preprocesado(csv_file, cache, stopwords={'sun'})
+        self.assertEqual(dataset_sun.columna('text'), ['i hate mondays', 'loving the'])
+        with open(csv_file, 'a', encoding='utf-8') as file:
+            file.write('0,3,d3,NO_QUERY,user3,Rainy day\r\n')
+        self.assertNotEqual(cache.clave(csv_file), clave)
+
+        # Invalidación explícita de una entrada y de toda la caché
+        self.assertEqual(cache.invalidar(clave), 1)
+        self.assertIsNone(cache.cargar(clave))
+        utils.cargar_preprocesado(csv_file, cache)
+        self.assertEqual(cache.invalidar(), 2)
+        self.assertEqual(cache.tamano(), 0)
+
+        # Expulsión por tamaño: solo cabe la entrada más reciente
+        cache_pequena = utils.CachePreprocesado(os.path.join(self.temp_dir, 'cache_pequena'), tamano_maximo=1)
+        utils.cargar_preprocesado(csv_file, cache_pequena)
+        utils.cargar_preprocesado(csv_file, cache_pequena, stopwords={'day'})
+        self.assertEqual(os.listdir(cache_pequena.directorio),
+                         [cache_pequena.clave(csv_file, stopwords={'day'}) + '.bin'])
+
+        print("El test de CachePreprocesado pasó correctamente.")
+
+    def test_dataset_binario(self):
+        """Prueba unitaria para las funciones guardar_dataset_binario y cargar_dataset_binario."""
+        registros = [
+            {'sentiment': '0', 'id': '1467810369', 'date': 'Mon Apr 06 22:19:45 PDT 2009', 'query': 'NO_QUERY',
+             'user': '_TheSpecialOne_', 'text': 'upset cant update facebook texting'},
+            {'sentiment': '4', 'id': '1467810672', 'date': 'Mon Apr 06 22:19:49 PDT 2009', 'query': 'NO_QUERY',
+             'user': 'scotthamilton', 'text': ''},
+            {'sentiment': '4', 'id': '1467810917', 'date': 'Mon Apr 06 22:19:49 PDT 2009', 'query': 'NO_QUERY',
+             'user': '_TheSpecialOne_', 'text': 'café año 東京 café'},
+            {'sentiment': '0', 'id': '9223372036854775807', 'date': 'Tue Apr 07 00:00:00 PDT 2009',
+             'query': 'NO_QUERY', 'user': 'otro', 'text': 'upset again'},
+        ]
+        frecuencias, vocabulario = utils.obtener_frecuencias_y_vocabulario(registros)
+        ruta = os.path.join(self.temp_dir, 'procesado.bin')
+
+        for tamano_bloque in (1, 3, 1000):
+            with self.subTest(tamano_bloque=tamano_bloque):
+                utils.guardar_dataset_binario(registros, ruta, tamano_bloque=tamano_bloque)
+                dataset, matriz = utils.cargar_dataset_binario(ruta)
+
+                # Los registros y las frecuencias se recuperan sin cambios
+                self.assertIsInstance(dataset, utils.DatasetColumnar)
+                self.assertEqual(list(dataset), [dict(registro, frecuencias=frecuencia)
+                                                 for registro, frecuencia in zip(registros, frecuencias)])
+                self.assertEqual(matriz.vocabulario, vocabulario)
+                self.assertEqual(matriz.a_diccionarios(), frecuencias)
+                self.assertEqual(dataset.estadisticas_clusters(), {'0': 2, '4': 2})
+                self.assertEqual(len(dataset._tablas['user']), 3)
+
+        # El dataset cargado se puede seguir ampliando y volver a guardar
+        dataset.append(dict(registros[0], id='5', frecuencias={'upset': 1}))
+        utils.guardar_dataset_binario(dataset, ruta)
+        dataset_recargado, _ = utils.cargar_dataset_binario(ruta)
+        self.assertEqual(len(dataset_recargado), 5)
+        self.assertEqual(dataset_recargado[4]['user'], '_TheSpecialOne_')
+        self.assertEqual(dataset_recargado[4]['frecuencias'], {'upset': 1})
+
+        # Las frecuencias modificadas a mano se conservan; las de los registros sin ellas se calculan
+        personalizado = utils.DatasetColumnar(registros)
+        personalizado[0]['frecuencias'] = {'facebook': 3, 'nuevo': 1}
+        utils.guardar_dataset_binario(personalizado, ruta)
+        dataset_recargado, matriz = utils.cargar_dataset_binario(ruta)
+        self.assertEqual(dataset_recargado.columna('frecuencias'), [{'facebook': 3, 'nuevo': 1}] + frecuencias[1:])
+        self.assertIn('nuevo', matriz.vocabulario)
+
+        # Archivos que no tienen el formato binario o están truncados
+        with open(ruta, 'rb') as file:
+            contenido = file.read()
+        with open(ruta, 'wb') as file:
+            file.write(contenido[:-3])
+        with self.assertRaises(ValueError):
+            utils.cargar_dataset_binario(ruta)
+        csv_file = os.path.join(self.temp_dir, 'procesado.csv')
+        utils.guardar_dataset_csv(registros, csv_file)
+        with self.assertRaises(ValueError):
+            utils.cargar_dataset_binario(csv_file)
+
+        print("El test de dataset_binario pasó correctamente.")
+
+    def test_corpus_tokens(self):
+        """Prueba unitaria para la clase CorpusTokens y la función guardar_corpus_tokens."""
+        dataset = [
+            {'sentiment': '0', 'text': 'work work tired today'},
+            {'sentiment': '4', 'text': ''},
+            {'sentiment': '4', 'text': 'café love today'},
+        ]
+        directorio = os.path.join(self.temp_dir, 'corpus')
+        guardado = utils.guardar_corpus_tokens(dataset, directorio)
+        corpus = utils.CorpusTokens.abrir(directorio)
+
+        # Los arrays se abren mapeados en memoria y en modo de solo lectura
+        for array_corpus in (guardado.tokens, corpus.tokens, corpus.desplazamientos, corpus.sentimientos):
+            self.assertIsInstance(array_corpus, np.memmap)
+        self.assertFalse(corpus.tokens.flags.writeable)
+
+        # Vocabulario ordenado y textos recuperables a partir de los identificadores
+        self.assertEqual(corpus.vocabulario, ['café', 'love', 'tired', 'today', 'work'])
+        self.assertEqual(len(corpus), 3)
+        self.assertEqual(corpus.tokens.tolist(), [4, 4, 2, 3, 0, 1, 3])
+        self.assertEqual(corpus.desplazamientos.tolist(), [0, 4, 4, 7])
+        self.assertEqual(corpus.etiquetas, ['0', '4'])
+        self.assertEqual(corpus.sentimientos.tolist(), [0, 1, 1])
+        self.assertEqual(corpus.sentimiento(2), '4')
+        self.assertEqual([corpus.texto(i) for i in range(len(corpus))], [d['text'] for d in dataset])
+        self.assertEqual(corpus.tokens_tweet(1).tolist(), [])
+        self.assertEqual(corpus.frecuencias_totales().tolist(), [1, 1, 1, 2, 2])
+
+        # Corpus vacío
+        vacio = utils.guardar_corpus_tokens([], os.path.join(self.temp_dir, 'vacio'))
+        self.assertEqual((len(vacio), vacio.vocabulario, vacio.etiquetas), (0, [], []))
+
+        # Las etiquetas que no son números se guardan en la tabla de etiquetas
+        neutral = utils.guardar_corpus_tokens(utils.DatasetColumnar(
+            dict(registro, id='1', date='d', query='q', user='u', sentiment=sentimiento)
+            for registro, sentimiento in zip(dataset, ['0', 'neutral', '4'])), os.path.join(self.temp_dir, 'neutral'))
+        self.assertEqual(neutral.etiquetas, ['0', '4', 'neutral'])
+        self.assertEqual([neutral.sentimiento(i) for i in range(3)], ['0', 'neutral', '4'])
+
+        print("El test de CorpusTokens pasó correctamente.")
+
+    def test_indice_invertido(self):
+        """Prueba unitaria para la clase IndiceInvertido."""
+        dataset = [
+            {'sentiment': '0', 'id': '1', 'date': 'd', 'query': 'q', 'user': 'u', 'text': 'hate rain'},
+            {'sentiment': '4', 'id': '2', 'date': 'd', 'query': 'q', 'user': 'u', 'text': 'love sun sun'},
+            {'sentiment': '4', 'id': '3', 'date': 'd', 'query': 'q', 'user': 'u', 'text': 'love rain'},
+            {'sentiment': '0', 'id': '4', 'date': 'd', 'query': 'q', 'user': 'u', 'text': ''},
+            {'sentiment': '0', 'id': '5', 'date': 'd', 'query': 'q', 'user': 'u', 'text': 'hate love'},
+        ]
+        indice = utils.IndiceInvertido.construir(dataset)
+        self.assertEqual(len(indice), 5)
+
+        # Consultas AND y OR sobre las listas comprimidas
+        self.assertEqual(indice.documentos('love').tolist(), [1, 2, 4])
+        self.assertEqual(indice.consultar('love rain').tolist(), [2])
+        self.assertEqual(indice.consultar(['hate', 'sun'], modo='or').tolist(), [0, 1, 4])
+        self.assertEqual(indice.consultar(['love', 'desconocida']).tolist(), [])
+        with self.assertRaises(ValueError):
+            indice.consultar('love', modo='xor')
+
+        # Frecuencias documentales por sentimiento
+        self.assertEqual(indice.frecuencia_documental('sun'), {'0': 0, '4': 1})
+        self.assertEqual(indice.contar_por_sentimiento('love'), {'0': 1, '4': 2})
+        self.assertEqual(indice.contar_por_sentimiento(['love', 'hate'], modo='or'), {'0': 2, '4': 2})
+
+        # Construirlo por partes, sobre la matriz de frecuencias del dataset por columnas, da el mismo índice
+        columnar = utils.DatasetColumnar(dataset)
+        columnar.establecer_frecuencias(utils.construir_matriz_frecuencias(columnar))
+        por_partes = utils.IndiceInvertido.construir(dataset[:2]).actualizar(columnar.seleccionar(range(2, 5)))
+        for termino in indice.vocabulario:
+            self.assertEqual(por_partes.documentos(termino).tolist(), indice.documentos(termino).tolist())
+            self.assertEqual(por_partes.frecuencia_documental(termino), indice.frecuencia_documental(termino))
+
+        # Guardar, cargar y seguir añadiendo tweets
+        ruta = os.path.join(self.temp_dir, 'indice.bin')
+        indice.guardar(ruta)
+        cargado = utils.IndiceInvertido.cargar(ruta)
+        self.assertEqual(cargado.vocabulario, indice.vocabulario)
+        self.assertEqual(cargado.consultar('hate love').tolist(), [4])
+        cargado.actualizar(dataset[1:2])
+        self.assertEqual(cargado.documentos('sun').tolist(), [1, 5])
+        self.assertEqual(cargado.frecuencia_documental('sun'), {'0': 0, '4': 2})
+
+        # También se guardan y cargan los índices sin vocabulario, con o sin tweets
+        for registros in ([], [dict(dataset[0], text='')]):
+            with self.subTest(registros=registros):
+                vacio = utils.IndiceInvertido.construir(registros)
+                vacio.guardar(ruta)
+                cargado = utils.IndiceInvertido.cargar(ruta)
+                self.assertEqual((len(cargado), cargado.vocabulario), (len(registros), []))
+                self.assertEqual(cargado.consultar('sun').tolist(), [])
+                cargado.actualizar(dataset[1:2])
+                self.assertEqual(cargado.documentos('sun').tolist(), [len(registros)])
+
+        # Las etiquetas no enteras se guardan como códigos de la tabla de etiquetas del índice
+        neutral = dataset[:3] + [dict(dataset[3], sentiment='neutral', text='rain sun')]
+        for registros in (neutral, utils.DatasetColumnar(neutral)):
+            with self.subTest(registros=type(registros)):
+                con_neutral = utils.IndiceInvertido.construir(registros)
+                self.assertEqual(con_neutral.frecuencia_documental('sun'), {'0': 0, '4': 1, 'neutral': 1})
+                self.assertEqual(con_neutral.contar_por_sentimiento('rain'), {'0': 1, '4': 1, 'neutral': 1})
+                con_neutral.guardar(ruta)
+                cargado = utils.IndiceInvertido.cargar(ruta)
+                self.assertEqual(cargado.contar_por_sentimiento('sun', modo='or'), {'0': 0, '4': 1, 'neutral': 1})
+                cargado.actualizar(neutral[3:] + dataset[4:])
+                self.assertEqual(cargado.documentos('rain').tolist(), [0, 2, 3, 4])
+                self.assertEqual(cargado.contar_por_sentimiento('rain'), {'0': 1, '4': 1, 'neutral': 2})
+                self.assertEqual(cargado.frecuencia_documental('hate'), {'0': 2, '4': 0, 'neutral': 0})
+
+        # Las diferencias grandes ocupan varios bytes y se decodifican igual
+        valores = np.array([1, 127, 128, 300, 2 ** 35 + 5])
+        codificados, num_bytes = utils._codificar_varint(valores)
+        self.assertEqual(num_bytes.tolist(), [1, 1, 2, 2, 6])
+        self.assertEqual(utils._decodificar_varint(codificados).tolist(), valores.tolist())
+
+        print("El test de IndiceInvertido pasó correctamente.")
+
+    def test_analizar_terminos_por_cluster(self):
+        """Prueba unitaria para la función analizar_terminos_por_cluster."""
+        dataset = [
+            {'sentiment': '0', 'id': '1', 'date': 'd', 'query': 'q', 'user': 'u', 'text': 'work hate day'},
+            {'sentiment': '0', 'id': '2', 'date': 'd', 'query': 'q', 'user': 'u', 'text': 'work work day'},
+            {'sentiment': '0', 'id': '3', 'date': 'd', 'query': 'q', 'user': 'u', 'text': 'rain day'},
+            {'sentiment': '4', 'id': '4', 'date': 'd', 'query': 'q', 'user': 'u', 'text': 'love day'},
+            {'sentiment': '4', 'id': '5', 'date': 'd', 'query': 'q', 'user': 'u', 'text': 'love good day'},
+        ]
+        analisis = utils.analizar_terminos_por_cluster(dataset, k=2)
+        self.assertEqual(analisis['clusters'], ['0', '4'])
+        self.assertEqual(analisis['mas_frecuentes'], {'0': [('day', 3), ('work', 3)], '4': [('day', 2), ('love', 2)]})
+        self.assertEqual(analisis['compartidos'], ['day'])
+        # 'day' aparece en los dos clusters, por lo que no es distintivo de ninguno
+        self.assertEqual([termino for termino, _ in analisis['distintivos']['0']], ['work', 'hate'])
+        self.assertEqual([termino for termino, _ in analisis['distintivos']['4']], ['love', 'good'])
+
+        # Por documento, con TF-IDF y sobre el dataset por columnas
+        columnar = utils.DatasetColumnar(dataset)
+        por_documento = utils.analizar_terminos_por_cluster(columnar, k=2, metodo='tfidf', por_documento=True)
+        self.assertEqual(por_documento['mas_frecuentes'],
+                         {'0': [('day', 3), ('work', 2)], '4': [('day', 2), ('love', 2)]})
+        self.assertEqual([termino for termino, _ in por_documento['distintivos']['0']], ['day', 'work'])
+        self.assertEqual([termino for termino, _ in por_documento['distintivos']['4']], ['love', 'day'])
+        self.assertAlmostEqual(por_documento['distintivos']['4'][0][1], 2 / 5 * (np.log(3 / 2) + 1))
+        with self.assertRaises(ValueError):
+            utils.analizar_terminos_por_cluster(dataset, metodo='chi2')
+
+        print("El test de analizar_terminos_por_cluster pasó correctamente.")
+
+    def test_contador_ngramas(self):
+        """Prueba unitaria para la clase ContadorNgramas."""
+        dataset = [
+            {'sentiment': '0', 'text': 'cant wait work'},
+            {'sentiment': '0', 'text': 'hate work cant wait'},
+            {'sentiment': '4', 'text': 'cant wait weekend'},
+            {'sentiment': '4', 'text': 'love'},
+            {'sentiment': '4', 'text': 'love weekend'},
+        ]
+        contador = utils.contar_ngramas(dataset, n=2)
+        self.assertTrue(contador.exacto)
+        self.assertEqual(contador.cota_error(), 0)
+        self.assertEqual(contador.mas_frecuentes('0', 2), [('cant wait', 2), ('hate work', 1)])
+        self.assertEqual(contador.mas_frecuentes('4'), [('cant wait', 1), ('love weekend', 1), ('wait weekend', 1)])
+        self.assertEqual(contador.mas_frecuentes(k=1), [('cant wait', 3)])
+        self.assertEqual(contador.ngramas_por_sentimiento, Counter({'0': 5, '4': 3}))
+        self.assertEqual(utils.contar_ngramas(dataset, n=3).mas_frecuentes('0', 1), [('cant wait work', 1)])
+
+        # Con un límite de memoria pequeño los conteos pasan al sketch: se conservan como mucho
+        # max_ngramas candidatos, las frecuencias nunca son menores que las reales y los más
+        # frecuentes se mantienen
+        grande = dataset * 50 + [{'sentiment': '0', 'text': f'raro{i} unico{i}'} for i in range(200)]
+        aproximado = utils.ContadorNgramas(2, max_ngramas=6, anchura=2 ** 10).actualizar(grande, tamano_bloque=7)
+        exacto = utils.contar_ngramas(grande, n=2)
+        self.assertFalse(aproximado.exacto)
+        self.assertLessEqual(sum(map(len, aproximado.conteos_por_sentimiento.values())), 6)
+        self.assertEqual(aproximado.mas_frecuentes('0', 1)[0][0], 'cant wait')
+        for sentimiento in ('0', '4'):
+            for ngrama, frecuencia in aproximado.mas_frecuentes(sentimiento):
+                real = exacto.conteos_por_sentimiento[sentimiento][ngrama]
+                self.assertGreaterEqual(frecuencia, real)
+                self.assertLessEqual(frecuencia - real, aproximado.cota_error(sentimiento))
+
+        # Aunque el bloque sea grande, los lotes se suman al llegar a max_ngramas n-gramas distintos
+        lotes = []
+        sumar_lote = utils.ContadorNgramas._sumar_lote
+        with patch.object(utils.ContadorNgramas, '_sumar_lote', autospec=True,
+                          side_effect=lambda contador, lote: lotes.append(sum(map(len, lote.values())))
+                          or sumar_lote(contador, lote)):
+            por_lotes = utils.ContadorNgramas(2, max_ngramas=6, anchura=2 ** 10).actualizar(grande)
+        self.assertGreater(len(lotes), 1)
+        self.assertLessEqual(max(lotes), 6)
+        self.assertEqual(por_lotes.num_tweets, len(grande))
+        self.assertEqual(por_lotes.mas_frecuentes('0', 1)[0][0], 'cant wait')
+
+        # La fusión de dos fragmentos equivale a contar el dataset completo
+        fusionado = utils.contar_ngramas(dataset[:2]) + utils.contar_ngramas(dataset[2:])
+        self.assertEqual(fusionado.conteos_por_sentimiento, contador.conteos_por_sentimiento)
+        mitad = len(grande) // 2
+        fusionado = (utils.ContadorNgramas(2, max_ngramas=6, anchura=2 ** 10).actualizar(grande[:mitad])
+                     + utils.ContadorNgramas(2, max_ngramas=6, anchura=2 ** 10).actualizar(grande[mitad:]))
+        self.assertEqual(fusionado.mas_frecuentes('0', 1)[0][0], 'cant wait')
+        self.assertGreaterEqual(fusionado.mas_frecuentes('0', 1)[0][1], 100)
+        with self.assertRaises(ValueError):
+            contador + utils.ContadorNgramas(3)
+
+        print("El test de ContadorNgramas pasó correctamente.")
+
+    def test_contador_frecuentes(self):
+        """Prueba unitaria para la clase ContadorFrecuentes y la función frecuentes_streaming."""
+        dataset = ([{'sentiment': '0', 'text': 'work work hate'}] * 15 + [{'sentiment': '0', 'text': 'rain day'}] * 3
+                   + [{'sentiment': '4', 'text': 'love day'}] * 5
+                   + [{'sentiment': '0', 'text': f'raro{i}'} for i in range(20)])
+        exacto = utils.construir_indice_por_cluster(dataset)
+
+        # Con capacidad suficiente coincide con el índice exacto, también en los empates
+        contador = utils.ContadorFrecuentes(capacidad=100).actualizar(dataset)
+        self.assertTrue(contador.exacto)
+        self.assertEqual(contador.sentimientos, ['0', '4'])
+        for sentimiento in contador.sentimientos:
+            self.assertEqual(contador.mas_frecuentes(sentimiento, 20, por_documento=True),
+                             exacto.mas_frecuentes(sentimiento, 20, por_documento=True))
+        self.assertEqual(utils.ContadorFrecuentes(100, por_documento=False).actualizar(dataset).mas_frecuentes('0', 1),
+                         [('work', 30)])
+        with self.assertRaises(ValueError):
+            contador.mas_frecuentes('0', por_documento=False)
+
+        # Con memoria fija, las frecuencias son cotas inferiores con el error indicado, y se conservan
+        # los términos que aparecen en más de N / (capacidad + 1) tweets
+        pequeno = utils.ContadorFrecuentes(capacidad=3).actualizar(dataset, tamano_bloque=4)
+        self.assertFalse(pequeno.exacto)
+        self.assertTrue(all(len(conteos) <= 3 for conteos in pequeno.conteos_por_sentimiento.values()))
+        self.assertEqual([termino for termino, _ in pequeno.mas_frecuentes('0', 2)], ['work', 'hate'])
+        self.assertLessEqual(pequeno.cota_error('0'), pequeno.apariciones_por_sentimiento['0'] / 4)
+        reales = dict(exacto.mas_frecuentes('0', 100, por_documento=True))
+        for termino, frecuencia in pequeno.mas_frecuentes('0'):
+            self.assertLessEqual(frecuencia, reales[termino])
+            self.assertGreaterEqual(frecuencia + pequeno.cota_error('0'), reales[termino])
+
+        # La fusión de dos fragmentos equivale, con capacidad suficiente, a contarlos juntos
+        fusionado = (utils.ContadorFrecuentes(100).actualizar(dataset[:10])
+                     + utils.ContadorFrecuentes(100).actualizar(dataset[10:]))
+        self.assertEqual(fusionado.conteos_por_sentimiento, contador.conteos_por_sentimiento)
+
+        # En streaming desde el zip se obtiene el mismo top 20 que el histograma del dataset preprocesado
+        zip_file = os.path.join(self.temp_dir, 'frecuentes.zip')
+        with zipfile.ZipFile(zip_file, 'w') as zip_ref:
+            zip_ref.writestr('tweets.csv', 'sentiment,id,date,query,user,text\n'
+                                           '0,1,d,q,u,I HATE the rain!!\n'
+                                           '4,2,d,q,u,love the sunshine http://t.co/x\n'
+                                           '0,3,d,q,u,rain rain go away\n')
+        streaming = utils.frecuentes_streaming(utils.iterar_registros(zip_file), capacidad=10, tamano_bloque=2)
+        preprocesado = utils.preprocesar_dataset(utils.carga_dataset_zip(zip_file))
+        indice = utils.construir_indice_por_cluster(preprocesado)
+        for sentimiento in indice.sentimientos:
+            self.assertEqual(streaming.mas_frecuentes(sentimiento, 20, por_documento=True),
+                             indice.mas_frecuentes(sentimiento, 20, por_documento=True))
+
+        print("El test de ContadorFrecuentes pasó correctamente.")
+
+    def test_agregar_por_tiempo(self):
+        """Prueba unitaria para las funciones parsear_fechas y agregar_por_tiempo."""
+        # 22:19:45 en PDT (UTC-7) son las 05:19:45 UTC del día siguiente
+        self.assertEqual(utils.parsear_fecha('Mon Apr 06 22:19:45 PDT 2009'), 1239081585)
+        fechas = ['Mon Apr 06 22:19:45 PDT 2009', 'Tue Apr 07 00:05:00 UTC 2009', 'Tue Apr 7 6:00:00 UTC 2009']
+        self.assertEqual(utils.parsear_fechas(fechas).tolist(), [1239081585, 1239062700, 1239084000])
+        with self.assertRaises(ValueError):
+            utils.parsear_fechas(['Mon Abc 06 22:19:45 PDT 2009'])
+
+        dataset = [
+            {'sentiment': '0', 'id': '1', 'date': 'Tue Apr 07 05:10:00 UTC 2009', 'query': 'q', 'user': 'u',
+             'text': 'work rain'},
+            {'sentiment': '4', 'id': '2', 'date': 'Tue Apr 07 05:50:00 UTC 2009', 'query': 'q', 'user': 'u',
+             'text': 'love love'},
+            {'sentiment': '4', 'id': '3', 'date': 'Tue Apr 07 07:00:00 UTC 2009', 'query': 'q', 'user': 'u',
+             'text': 'love work'},
+            {'sentiment': '0', 'id': '4', 'date': 'Wed Apr 08 01:00:00 UTC 2009', 'query': 'q', 'user': 'u',
+             'text': 'work'},
+        ]
+        self.assertEqual(utils.fechas_epoch(utils.DatasetColumnar(dataset)).tolist(),
+                         utils.fechas_epoch(dataset).tolist())
+
+        serie = utils.agregar_por_tiempo(utils.DatasetColumnar(dataset), intervalo='hora', terminos=['work', 'love'])
+        # Una fila por hora entre la primera y la última, incluidas las que no tienen tweets
+        self.assertEqual(len(serie), 21)
+        self.assertEqual(serie.inicio, 1239080400)
+        self.assertEqual(serie.sentimientos, ['0', '4'])
+        self.assertEqual(serie.tweets[[0, 1, 2, 20]].tolist(), [[1, 1], [0, 0], [0, 1], [1, 0]])
+        self.assertEqual(serie.serie('love')[[0, 2]].tolist(), [2, 1])
+        self.assertEqual(serie.mas_frecuentes(0), [('love', 2), ('work', 1)])
+        self.assertEqual(serie.mas_frecuentes(1), [])
+        self.assertEqual(serie.proporciones[[0, 1]].tolist(), [[0.5, 0.5], [0.0, 0.0]])
+
+        # Por días se obtiene lo mismo reagrupando las horas que agregando directamente
+        por_dia = utils.agregar_por_tiempo(dataset, intervalo='dia', terminos=['work', 'love'])
+        reagrupada = serie.reagrupar(86400)
+        self.assertEqual(por_dia.inicio, reagrupada.inicio)
+        self.assertEqual(por_dia.tweets.tolist(), [[1, 2], [1, 0]])
+        self.assertEqual(reagrupada.tweets.tolist(), por_dia.tweets.tolist())
+        self.assertEqual(reagrupada.conteos.tolist(), por_dia.conteos.tolist())
+        self.assertEqual(utils.agregar_por_tiempo(dataset, num_terminos=1).terminos, ['love'])
+
+        # Las fechas vacías o con una zona horaria desconocida se omiten y se cuentan
+        no_validas = ['', 'Tue Apr 07 05:10:00 +0000 2009', 'Tue Apr 07 05:10:00 BST 2009']
+        for fecha in no_validas:
+            with self.assertRaises(ValueError):
+                utils.parsear_fechas([fecha])
+        self.assertEqual(utils.parsear_fechas(no_validas + fechas[:1], estricto=False).tolist(),
+                         [utils.FECHA_NO_VALIDA] * 3 + [1239081585])
+        con_errores = dataset + [dict(dataset[0], id=str(5 + posicion), date=fecha, text='love rain')
+                                 for posicion, fecha in enumerate(no_validas)]
+        for entrada in (con_errores, utils.DatasetColumnar(con_errores)):
+            with self.subTest(entrada=type(entrada).__name__):
+                serie_con_errores = utils.agregar_por_tiempo(entrada, intervalo='dia', terminos=['work', 'love'])
+                self.assertEqual(serie_con_errores.num_fechas_no_validas, 3)
+                self.assertEqual(serie_con_errores.inicio, por_dia.inicio)
+                self.assertEqual(serie_con_errores.tweets.tolist(), por_dia.tweets.tolist())
+                self.assertEqual(serie_con_errores.conteos.tolist(), por_dia.conteos.tolist())
+                self.assertEqual(serie_con_errores.reagrupar(2 * 86400).num_fechas_no_validas, 3)
+        solo_errores = utils.agregar_por_tiempo(con_errores[4:])
+        self.assertEqual((len(solo_errores), solo_errores.num_fechas_no_validas), (0, 3))
+
+        print("El test de agregar_por_tiempo pasó correctamente.")
+
+    def test_etiquetas_no_enteras(self):
+        """Prueba que las etiquetas de sentimiento no enteras se tratan igual en listas y en DatasetColumnar."""
+        dataset = [
+            {'sentiment': '0', 'id': '1', 'date': 'Tue Apr 07 05:10:00 UTC 2009', 'query': 'q', 'user': 'ana',
+             'text': 'work rain'},
+            {'sentiment': 'neutral', 'id': '2', 'date': 'Tue Apr 07 06:10:00 UTC 2009', 'query': 'q', 'user': 'bob',
+             'text': 'rain'},
+            {'sentiment': '4', 'id': '3', 'date': 'Tue Apr 07 06:20:00 UTC 2009', 'query': 'q', 'user': 'ana',
+             'text': 'love'},
+        ]
+        for entrada in (dataset, utils.DatasetColumnar(dataset)):
+            with self.subTest(entrada=type(entrada).__name__):
+                analisis = utils.analizar_terminos_por_cluster(entrada)
+                self.assertEqual(analisis['clusters'], ['0', '4', 'neutral'])
+                self.assertEqual(analisis['mas_frecuentes']['neutral'], [('rain', 1)])
+                serie = utils.agregar_por_tiempo(entrada)
+                self.assertEqual(serie.sentimientos, ['0', '4', 'neutral'])
+                self.assertEqual(serie.tweets.tolist(), [[1, 0, 0], [0, 1, 1]])
+                indice = utils.IndiceUsuarios.construir(entrada)
+                self.assertEqual(indice.contar_por_sentimiento('ana'), {'0': 1, '4': 1, 'neutral': 0})
+
+        print("El test de etiquetas no enteras pasó correctamente.")
+
+    def test_indice_usuarios(self):
+        """Prueba unitaria para la clase IndiceUsuarios."""
+        dataset = [
+            {'sentiment': '0', 'id': '1', 'date': 'd', 'query': 'q', 'user': 'ana', 'text': 'work rain'},
+            {'sentiment': '4', 'id': '2', 'date': 'd', 'query': 'q', 'user': 'bob', 'text': 'love'},
+            {'sentiment': '4', 'id': '3', 'date': 'd', 'query': 'q', 'user': 'ana', 'text': 'love work'},
+            {'sentiment': '0', 'id': '4', 'date': 'd', 'query': 'q', 'user': 'eva', 'text': 'hate'},
+            {'sentiment': '0', 'id': '5', 'date': 'd', 'query': 'q', 'user': 'ana', 'text': 'work work'},
+            {'sentiment': '0', 'id': '6', 'date': 'd', 'query': 'q', 'user': 'eva', 'text': ''},
+        ]
+        columnar = utils.DatasetColumnar(dataset)
+        columnar.establecer_frecuencias(utils.construir_matriz_frecuencias(columnar))
+        indice = utils.IndiceUsuarios.construir(columnar)
+        self.assertEqual(len(indice), 3)
+        self.assertEqual(indice.tweets('ana').tolist(), [0, 2, 4])
+        self.assertEqual(indice.num_tweets('eva'), 2)
+        self.assertEqual(indice.contar_por_sentimiento('ana'), {'0': 2, '4': 1})
+        self.assertEqual(indice.balance('bob'), {'0': 0.0, '4': 1.0})
+        self.assertEqual(indice.mas_frecuentes('ana'), [('work', 4), ('love', 1), ('rain', 1)])
+        self.assertEqual(indice.mas_frecuentes('eva', 1), [('hate', 1)])
+        # Los empates entre los usuarios con más tweets se resuelven por orden de aparición
+        self.assertEqual(indice.mas_activos(2), [('ana', 3), ('eva', 2)])
+
+        # Un usuario desconocido no tiene tweets
+        self.assertNotIn('desconocido', indice)
+        self.assertEqual(indice.tweets('desconocido').tolist(), [])
+        self.assertEqual(indice.balance('desconocido'), {'0': 0.0, '4': 0.0})
+
+        # Tras seleccionar, la tabla de usuarios se comparte, pero solo cuentan los que tienen tweets
+        seleccion = utils.IndiceUsuarios.construir(columnar.seleccionar([1, 3]))
+        self.assertEqual(len(seleccion), 2)
+        self.assertNotIn('ana', seleccion)
+        self.assertEqual(seleccion.mas_activos(), [('bob', 1), ('eva', 1)])
+
+        # Sobre la lista de diccionarios se obtiene el mismo índice
+        desde_lista = utils.IndiceUsuarios.construir(dataset, utils.construir_matriz_frecuencias(dataset))
+        self.assertEqual(desde_lista.usuarios, indice.usuarios)
+        self.assertEqual(desde_lista.tweets_por_sentimiento.tolist(), indice.tweets_por_sentimiento.tolist())
+        self.assertEqual(desde_lista.mas_frecuentes('ana'), indice.mas_frecuentes('ana'))
+        with self.assertRaises(ValueError):
+            utils.IndiceUsuarios.construir(dataset).mas_frecuentes('ana')
+
+        print("El test de IndiceUsuarios pasó correctamente.")
+
+    def test_procesar_en_flujo(self):
+        """Prueba unitaria para la función procesar_en_flujo."""
+        csv_file = os.path.join(self.temp_dir, 'flujo.csv')
+        with open(csv_file, 'w', encoding='utf-8') as file:
+            file.write('sentiment,id,date,query,user,text\n')
+            for i in range(50):
+                texto = ['I LOVE the sunshine!', 'work again... http://t.co/x', '', 'Rain, rain & more rain'][i % 4]
+                file.write(f'{4 if i % 3 else 0},{i % 45},d,q,u,"{texto}"\n')
+
+        # Mismo resultado que cargar, preprocesar y contar el dataset completo
+        dataset = utils.preprocesar_dataset(utils.carga_dataset(csv_file))
+        _, perfil_esperado = utils.perfilar_calidad(dataset)
+        for procesos in (1, 2):
+            acumulador, perfil = utils.procesar_en_flujo(csv_file, procesos=procesos, tamano_bloque=7, tamano_cola=1)
+            self.assertEqual(acumulador, utils.construir_indice_por_cluster(dataset))
+            self.assertEqual(perfil, perfil_esperado)
+        self.assertEqual(perfil.num_ids_duplicados, 5)
+
+        # Los errores de cualquier etapa se relanzan en el hilo principal
+        with self.assertRaises(FileNotFoundError):
+            utils.procesar_en_flujo(os.path.join(self.temp_dir, 'no_existe.csv'))
+        with patch('utils.AcumuladorFrecuencias.actualizar', side_effect=RuntimeError('fallo')):
+            with self.assertRaises(RuntimeError):
+                utils.procesar_en_flujo(csv_file, tamano_bloque=1, tamano_cola=1)
+
+        print("El test de procesar_en_flujo pasó correctamente.")
+
+    def test_procesar_fragmentos(self):
+        """Prueba unitaria para la función procesar_fragmentos."""
+        cabecera = 'sentiment,id,date,query,user,text\n'
+        textos = ['I love it!', 'work :(', '', 'love work']
+        filas = [f'{4 if i % 3 else 0},{i % 20},d,q,u{i % 4},"{textos[i % 4]} {i % 7}"\n' for i in range(60)]
+        fragmentos = []
+        for numero, inicio in enumerate(range(0, 60, 15)):
+            ruta = os.path.join(self.temp_dir, f'fragmento_{numero}.csv')
+            contenido = cabecera + ''.join(filas[inicio:inicio + 15])
+            if numero % 2:
+                # Los fragmentos pueden ser CSV o zip
+                ruta = ruta.replace('.csv', '.zip')
+                with zipfile.ZipFile(ruta, 'w') as zip_ref:
+                    zip_ref.writestr('tweets.csv', contenido)
+            else:
+                with open(ruta, 'w', encoding='utf-8') as file:
+                    file.write(contenido)
+            fragmentos.append(ruta)
+        concatenado = os.path.join(self.temp_dir, 'concatenado.csv')
+        with open(concatenado, 'w', encoding='utf-8') as file:
+            file.write(cabecera + ''.join(filas))
+
+        self.assertEqual(utils.expandir_fragmentos(os.path.join(self.temp_dir, 'fragmento_*')), sorted(fragmentos))
+        with self.assertRaises(FileNotFoundError):
+            utils.expandir_fragmentos(os.path.join(self.temp_dir, 'no_existe_*.csv'))
+
+        # El resultado es idéntico al del archivo concatenado, también en los repetidos entre fragmentos
+        acumulador_esperado, perfil_esperado = utils.procesar_en_flujo(concatenado)
+        for procesos in (1, 2):
+            acumulador, perfil = utils.procesar_fragmentos(fragmentos, procesos=procesos, tamano_bloque=4)
+            self.assertEqual(acumulador, acumulador_esperado)
+            self.assertEqual(perfil, perfil_esperado)
+            self.assertEqual(acumulador.mas_frecuentes('4', 5, por_documento=True),
+                             acumulador_esperado.mas_frecuentes('4', 5, por_documento=True))
+        self.assertEqual(perfil.num_ids_duplicados, 40)
+
+        print("El test de procesar_fragmentos pasó correctamente.")
+
     def test_verificar_elementos_vacios(self):
         """Prueba unitaria para la función verificar_elementos_vacios."""
         # Caso de prueba 1: Dataset sin elementos vacíos
@@ -410,6 +1342,41 @@ class TestUtils(unittest.TestCase):
         # Imprimir el resultado del test
         print("El test de eliminar_elementos_nulos pasó correctamente.")
 
+    def test_perfilar_calidad(self):
+        """Prueba unitaria para la función perfilar_calidad y la clase PerfilCalidad."""
+        dataset = [
+            {'sentiment': '0', 'id': '1', 'date': 'd', 'query': 'q', 'user': 'u', 'text': 'hate rain'},
+            {'sentiment': '4', 'id': '2', 'date': 'd', 'query': 'q', 'user': 'u', 'text': '   '},
+            {'sentiment': '4', 'id': '3', 'date': 'd', 'query': 'q', 'user': 'u', 'text': 'love the sun'},
+            {'sentiment': '0', 'id': '1', 'date': 'd', 'query': 'q', 'user': 'u', 'text': 'hate rain'},
+            {'sentiment': '4', 'id': '5', 'date': 'd', 'query': 'q', 'user': 'u', 'text': ''},
+        ]
+
+        # Mismo resultado que eliminar_elementos_nulos y verificar_elementos_vacios, en una pasada
+        filtrado, perfil = utils.perfilar_calidad(dataset)
+        self.assertEqual(filtrado, utils.eliminar_elementos_nulos(dataset))
+        self.assertAlmostEqual(perfil.porcentaje_vacios, utils.verificar_elementos_vacios(dataset))
+        resumen = perfil.resumen()
+        self.assertEqual((resumen['registros'], resumen['vacios'], resumen['ids_duplicados'],
+                          resumen['textos_duplicados']), (5, 2, 1, 1))
+        self.assertEqual(resumen['registros_por_sentimiento'], {'0': 2, '4': 3})
+        self.assertEqual(resumen['tokens_texto'], {'min': 0, 'max': 3, 'media': 1.4, 'p50': 2, 'p90': 3, 'p99': 3})
+        self.assertEqual((resumen['longitud_texto']['min'], resumen['longitud_texto']['max']), (0, 12))
+        self.assertEqual(utils.perfilar_calidad([])[1].porcentaje_vacios, 100.0)
+
+        # El dataset por columnas y un iterador de registros dan el mismo perfil
+        filtrado_columnar, perfil_columnar = utils.perfilar_calidad(utils.DatasetColumnar(dataset))
+        self.assertEqual([dict(registro) for registro in filtrado_columnar], filtrado)
+        self.assertEqual(perfil_columnar, perfil)
+        perfil_iterador = utils.PerfilCalidad()
+        self.assertEqual(list(perfil_iterador.filtrar(iter(dataset))), filtrado)
+        self.assertEqual(perfil_iterador, perfil)
+
+        # Los perfiles de fragmentos distintos se fusionan como si se hubiera perfilado todo junto
+        self.assertEqual(utils.perfilar_calidad(dataset[:3])[1] + utils.perfilar_calidad(dataset[3:])[1], perfil)
+
+        print("El test de perfilar_calidad pasó correctamente.")
+
     def test_generar_wordcloud_por_cluster(self):
         """Prueba unitaria para la función generar_stopords_por_cluster."""
         # Simular las funciones imshow y show
@@ -443,6 +1410,41 @@ class TestUtils(unittest.TestCase):
             # Imprimir el resultado del test
             print("El test de generar_wordcloud_por_cluster pasó correctamente.")
 
+    def test_generar_wordcloud_por_cluster_a_disco(self):
+        """Prueba unitaria para la generación de word clouds en PNG a partir de frecuencias."""
+        dataset_sin_nulos = [
+            {'sentiment': '0', 'id': '1', 'date': '2022-01-01', 'query': 'query1', 'user': 'user1',
+             'text': 'hello hello world'},
+            {'sentiment': '4', 'id': '2', 'date': '2022-01-02', 'query': 'query2', 'user': 'user2',
+             'text': 'good morning'},
+            {'sentiment': '0', 'id': '3', 'date': '2022-01-03', 'query': 'query3', 'user': 'user3',
+             'text': 'bad morning'},
+            {'sentiment': '2', 'id': '4', 'date': '2022-01-04', 'query': 'query4', 'user': 'user4', 'text': ''},
+        ]
+        directorio_salida = os.path.join(self.temp_dir, 'wordclouds')
+
+        for procesos in (1, 2):
+            with self.subTest(procesos=procesos), patch('matplotlib.pyplot.show') as mock_show:
+                rutas = utils.generar_wordcloud_por_cluster(dataset_sin_nulos, directorio_salida,
+                                                            procesos=procesos)
+
+                # Un PNG por cluster con palabras, sin abrir ninguna ventana
+                self.assertEqual(rutas, [os.path.join(directorio_salida, 'wordcloud_cluster_0.png'),
+                                         os.path.join(directorio_salida, 'wordcloud_cluster_4.png')])
+                for ruta in rutas:
+                    with open(ruta, 'rb') as file:
+                        self.assertEqual(file.read(8), b'\x89PNG\r\n\x1a\n')
+                mock_show.assert_not_called()
+
+        # Las frecuencias se leen del índice por cluster cuando se proporciona
+        indice = utils.construir_indice_por_cluster(dataset_sin_nulos[:1])
+        with patch('utils.construir_indice_por_cluster') as mock_construir_indice_por_cluster:
+            rutas = utils.generar_wordcloud_por_cluster(dataset_sin_nulos, directorio_salida, indice=indice)
+            mock_construir_indice_por_cluster.assert_not_called()
+        self.assertEqual(len(rutas), 1)
+
+        print("El test de generar_wordcloud_por_cluster a disco pasó correctamente.")
+
     def test_generar_histograma_por_cluster(self):
         """Prueba unitaria para la función generar_histograma_por_cluster."""
         # Estructura del dataset
@@ -451,12 +1453,9 @@ class TestUtils(unittest.TestCase):
              'text': 'Hello', 'frecuencias': {}}
         ]
 
-        # Simular la función obtener_frecuencias_y_vocabulario
-        with patch('utils.obtener_frecuencias_y_vocabulario') as mock_obtener_frecuencias_y_vocabulario:
-            mock_obtener_frecuencias_y_vocabulario.return_value = (
-                [{'Hello': 1}],
-                {'Hello'}
-            )
+        # Simular la función construir_indice_por_cluster
+        with patch('utils.construir_indice_por_cluster') as mock_construir_indice_por_cluster:
+            mock_construir_indice_por_cluster.return_value = utils.AcumuladorFrecuencias().actualizar(dataset)
 
             # Simular la función plt.show
             with patch('matplotlib.pyplot.show') as mock_show:
@@ -464,8 +1463,205 @@ class TestUtils(unittest.TestCase):
                 utils.generar_histograma_por_cluster(dataset)
 
                 # Verificar las llamadas a las funciones y los argumentos
-                mock_obtener_frecuencias_y_vocabulario.assert_called_once_with(dataset)
+                mock_construir_indice_por_cluster.assert_called_once_with(dataset)
+                mock_show.assert_called_once()
+
+            # Con un índice ya construido no se vuelve a recorrer el dataset
+            indice = utils.AcumuladorFrecuencias().actualizar(dataset)
+            mock_construir_indice_por_cluster.reset_mock()
+            with patch('matplotlib.pyplot.show') as mock_show:
+                utils.generar_histograma_por_cluster(dataset, indice=indice)
+                mock_construir_indice_por_cluster.assert_not_called()
                 mock_show.assert_called_once()
 
                 # Imprimir el resultado del test
                 print("El test de generar_histograma_por_cluster pasó correctamente.")
+
+
+class TestBenchmarks(unittest.TestCase):
+    """Clase que contiene los tests del paquete de benchmarks."""
+
+    def setUp(self):
+        """Método que se ejecuta antes de cada test para configurar el entorno."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Método que se ejecuta después de cada test para limpiar el entorno."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_generador(self):
+        """Prueba unitaria para el generador de datasets sintéticos."""
+        from benchmarks import generador
+
+        # Los datasets son reproducibles y tienen la estructura de Sentiment140
+        tweets = list(generador.generar_tweets(500, semilla=3))
+        self.assertEqual(tweets, list(generador.generar_tweets(500, semilla=3)))
+        self.assertEqual(set(tweets[0]), set(utils.COLUMNAS_DATASET))
+        self.assertEqual({tweet['sentiment'] for tweet in tweets}, {'0', '4'})
+        self.assertLess(len({tweet['user'] for tweet in tweets}), 500)
+        self.assertEqual(len({tweet['id'] for tweet in tweets}), 500)
+        self.assertTrue(any('http://' in tweet['text'] for tweet in tweets))
+        self.assertTrue(any('@user' in tweet['text'] for tweet in tweets))
+
+        # El CSV y el ZIP generados se cargan con las funciones de utils
+        csv_file = generador.escribir_csv(os.path.join(self.temp_dir, 'tweets.csv'), 200)
+        zip_file = generador.escribir_zip(os.path.join(self.temp_dir, 'tweets.zip'), 200)
+        self.assertEqual(utils.carga_dataset(csv_file), list(generador.generar_tweets(200)))
+        self.assertEqual(utils.carga_dataset_zip(zip_file), utils.carga_dataset(csv_file))
+
+        print("El test del generador de benchmarks pasó correctamente.")
+
+    def test_ejecutar_benchmarks(self):
+        """Prueba unitaria para la ejecución de los benchmarks."""
+        from benchmarks import ejecutar
+
+        salida = os.path.join(self.temp_dir, 'resultados.json')
+        with patch('builtins.print'):
+            informe = ejecutar.main(['--filas', '100', '--directorio', self.temp_dir, '--salida', salida,
+                                     '--etapas', 'carga_dataset', 'eliminar_stopwords',
+                                     'generar_histograma_por_cluster'])
+
+        # Resultados legibles por máquina, con una medida por tamaño y etapa
+        with open(salida, encoding='utf-8') as file:
+            self.assertEqual(json.load(file), informe)
+        self.assertEqual([(r['filas'], r['etapa']) for r in informe['resultados']],
+                         [(100, 'carga_dataset'), (100, 'eliminar_stopwords'), (100, 'generar_histograma_por_cluster')])
+        for resultado in informe['resultados']:
+            self.assertGreater(resultado['segundos'], 0)
+            self.assertGreater(resultado['memoria_pico_bytes'], 0)
+
+        informe = ejecutar.ejecutar_benchmarks([50], self.temp_dir, ['normalizar_textos'], memoria=False)
+        self.assertIsNone(informe['resultados'][0]['memoria_pico_bytes'])
+        with self.assertRaises(ValueError):
+            ejecutar.ejecutar_benchmarks([50], self.temp_dir, ['desconocida'])
+
+        print("El test de ejecutar_benchmarks pasó correctamente.")
+
+
+class TestInstrumentacion(unittest.TestCase):
+    """Clase que contiene los tests del módulo instrumentacion."""
+
+    def setUp(self):
+        """Método que se ejecuta antes de cada test para configurar el entorno."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Método que se ejecuta después de cada test para limpiar el entorno."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_instrumentacion(self):
+        """Prueba unitaria para la sesión de instrumentación de las funciones de utils."""
+        csv_file = os.path.join(self.temp_dir, 'test.csv')
+        pd.DataFrame({'sentiment': ['0', '4', '4'], 'id': ['1', '2', '3'], 'date': ['d'] * 3,
+                      'query': ['q'] * 3, 'user': ['u'] * 3,
+                      'text': ['Hello, world!', 'I love it', 'http://x.com good']}).to_csv(csv_file, index=False)
+        original = utils.carga_dataset
+        informe_json = os.path.join(self.temp_dir, 'informe.json')
+        perfil = os.path.join(self.temp_dir, 'perfil.prof')
+
+        with instrumentacion.Instrumentacion(informe_json, perfil):
+            # Las funciones públicas de utils se sustituyen por versiones instrumentadas
+            self.assertIsNot(utils.carga_dataset, original)
+            dataset = utils.carga_dataset(csv_file)
+            utils.carga_dataset(csv_file)
+            with instrumentacion.etapa('limpieza', filas=len(dataset)):
+                # Las etapas anidadas se registran con la ruta de la etapa que las contiene
+                textos = utils.normalizar_textos(registro['text'] for registro in dataset)
+
+        # Al cerrar la sesión se restauran las funciones originales y se escriben el informe y el perfil
+        self.assertIs(utils.carga_dataset, original)
+        self.assertEqual(textos, ['hello world', 'love', 'good'])
+        self.assertTrue(os.path.exists(perfil))
+        with open(informe_json, encoding='utf-8') as file:
+            informe = json.load(file)
+        self.assertEqual([medida['etapa'] for medida in informe['etapas']],
+                         ['carga_dataset', 'limpieza/normalizar_textos', 'limpieza'])
+        carga = informe['etapas'][0]
+        self.assertEqual((carga['llamadas'], carga['filas']), (2, 6))
+        self.assertGreater(carga['filas_por_segundo'], 0)
+        self.assertGreaterEqual(carga['segundos'], 0)
+        self.assertIn('segundos_cpu', carga)
+        self.assertGreaterEqual(carga['incremento_rss_pico_bytes'], 0)
+        self.assertIn('rss_pico_bytes', informe)
+
+        # Sin sesión activa, etapa() no mide nada y las funciones no se modifican
+        with instrumentacion.etapa('sin_sesion') as medida:
+            medida.filas = 1
+        self.assertIs(utils.carga_dataset, original)
+
+        print("El test de instrumentacion pasó correctamente.")
+
+
+class TestMain(unittest.TestCase):
+    """Clase que contiene los tests de la línea de comandos de main.py."""
+
+    def setUp(self):
+        """Método que se ejecuta antes de cada test para configurar el entorno."""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Método que se ejecuta después de cada test para limpiar el entorno."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_importacion_perezosa(self):
+        """Prueba que importar utils no importa pandas, matplotlib ni wordcloud."""
+        codigo = "import sys, utils; print(sorted({'pandas', 'matplotlib', 'wordcloud'} & set(sys.modules)))"
+        salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        self.assertEqual(salida.strip(), '[]')
+
+        print("El test de importacion perezosa pasó correctamente.")
+
+    def test_subcomandos(self):
+        """Prueba unitaria para los subcomandos de main.py."""
+        zip_file = os.path.join(self.temp_dir, 'tweets.zip')
+        with zipfile.ZipFile(zip_file, 'w') as zip_ref:
+            zip_ref.writestr('tweets.csv', 'sentiment,id,date,query,user,text\n'
+                                           '0,1,d,q,u,I hate rain!\n4,2,d,q,u,I love the sun\n4,3,d,q,u,http://x.co\n')
+        binario = os.path.join(self.temp_dir, 'tweets.bin')
+
+        # Las opciones comunes se aceptan antes y después del subcomando
+        parser = main.crear_parser()
+        args = parser.parse_args(['--sin-cache', 'preprocesar', zip_file, '--procesos', '1'])
+        self.assertEqual((args.funcion, args.sin_cache, args.procesos, args.entrada),
+                         (main.comando_preprocesar, True, 1, zip_file))
+        self.assertIs(parser.parse_args([]).funcion, main.comando_todo)
+
+        with patch('builtins.print'):
+            main.main(['preprocesar', zip_file, '--salida', binario, '--sin-cache', '--procesos', '1'])
+        dataset, matriz = utils.cargar_dataset_binario(binario)
+        self.assertEqual(dataset.columna('text'), ['hate rain', 'love sun', ''])
+        self.assertEqual(matriz.vocabulario, ['hate', 'love', 'rain', 'sun'])
+
+        # Las etapas posteriores parten del archivo binario sin volver a preprocesar
+        directorio = os.path.join(self.temp_dir, 'graficos')
+        with patch('builtins.print'), patch('utils.cargar_preprocesado') as mock_cargar_preprocesado, \
+                patch('matplotlib.pyplot.show'):
+            main.main(['graficos', binario, '--directorio-salida', directorio])
+        mock_cargar_preprocesado.assert_not_called()
+        self.assertEqual(sorted(os.listdir(directorio)), ['wordcloud_cluster_0.png', 'wordcloud_cluster_4.png'])
+
+        # El subcomando cargar también acepta el archivo binario
+        with patch('builtins.print') as mock_print, \
+                patch('utils.cargar_dataset_binario', wraps=utils.cargar_dataset_binario) as mock_cargar:
+            main.main(['cargar', binario])
+        mock_cargar.assert_called_once_with(binario)
+        self.assertIn(call(dict(dataset[0])), mock_print.call_args_list)
+        self.assertIn(call('\nRegistros cargados: 3'), mock_print.call_args_list)
+
+        print("El test de los subcomandos pasó correctamente.")
+
+    def test_mostrar_respuestas(self):
+        """Prueba unitaria para la función mostrar_respuestas con clusters distintos de 0 y 4."""
+        dataset = utils.DatasetColumnar(
+            {'sentiment': sentimiento, 'id': str(i), 'date': 'd', 'query': 'q', 'user': 'u', 'text': texto}
+            for i, (sentimiento, texto) in enumerate([('0', 'hate rain'), ('1', 'love sun'), ('1', 'love rain')]))
+        with patch('builtins.print') as mock_print:
+            main.mostrar_respuestas(dataset, utils.construir_matriz_frecuencias(dataset))
+        salida = "".join(str(llamada.args[0]) for llamada in mock_print.call_args_list)
+        self.assertIn("sentimientos positivos son: 'Love', 'Rain', 'Sun'\n", salida)
+        self.assertIn("sentimientos negativos son: 'Hate', 'Rain'\n", salida)
+        self.assertIn("ambos sentimientos, como: 'Rain'\n", salida)
+        self.assertIn("cluster 1 (asociado a sentimientos positivos)", salida)
+
+        print("El test de mostrar_respuestas pasó correctamente.")
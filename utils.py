@@ -4,14 +4,32 @@
     de quienes los redactaron.
 """
 
+import calendar
+import contextlib
+import functools
+import glob
+import io
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import struct
+import tempfile
+import threading
 import zipfile
+import zlib
 import csv
 import re
-from typing import List
-import pandas as pd
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-from collections import Counter
+from array import array
+from collections.abc import MutableMapping
+from typing import Iterable, Iterator, List, Optional
+import numpy as np
+from collections import Counter, defaultdict, deque
+
+# pandas, matplotlib y wordcloud tardan en importarse, así que solo se importan dentro de las
+# funciones que los utilizan, para que las etapas que no generan gráficos arranquen rápido
 
 
 def descomprime_zip(zip_file: str, target_folder: str) -> None:
@@ -40,17 +58,460 @@ def carga_dataset(csv_file: str) -> list:
     with open(csv_file, 'r', encoding='utf-8') as file:
         reader = csv.DictReader(file)
         for row in reader:
-            dataset.append({
-                'sentiment': row['sentiment'],
-                'id': row['id'],
-                'date': row['date'],
-                'query': row['query'],
-                'user': row['user'],
-                'text': row['text']
-            })
+            dataset.append(_registro_desde_fila(row))
     return dataset
 
 
+def _registro_desde_fila(row: dict) -> dict:
+    """
+    Construye el registro de un tweet con las seis variables del dataset a partir de una fila del CSV.
+    """
+    return {
+        'sentiment': row['sentiment'],
+        'id': row['id'],
+        'date': row['date'],
+        'query': row['query'],
+        'user': row['user'],
+        'text': row['text']
+    }
+
+
+def iterar_registros_zip(zip_file: str, miembro: Optional[str] = None,
+                         encoding: str = 'utf-8') -> Iterator[dict]:
+    """
+    Lee el CSV contenido en un archivo ZIP sin extraerlo a disco y devuelve sus registros
+    de forma perezosa, uno a uno, con la misma estructura que carga_dataset.
+
+    Parámetros:
+    - zip_file (str): Ruta del archivo ZIP que contiene el CSV.
+    - miembro (str, opcional): Nombre del archivo dentro del ZIP a leer. Por defecto se
+      utiliza el primer archivo .csv del ZIP.
+    - encoding (str): Codificación del CSV.
+
+    Devuelve:
+    - Iterator[dict]: Iterador de diccionarios representando cada registro del dataset.
+    """
+    with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+        if miembro is None:
+            miembros_csv = [nombre for nombre in zip_ref.namelist() if nombre.lower().endswith('.csv')]
+            if not miembros_csv:
+                raise ValueError(f"El archivo {zip_file} no contiene ningún CSV")
+            miembro = miembros_csv[0]
+
+        with zip_ref.open(miembro, 'r') as binario:
+            with io.TextIOWrapper(binario, encoding=encoding, newline='') as file:
+                reader = csv.DictReader(file)
+                for row in reader:
+                    yield _registro_desde_fila(row)
+
+
+def carga_dataset_zip(zip_file: str, miembro: Optional[str] = None) -> list:
+    """
+    Carga el dataset directamente desde el CSV contenido en un archivo ZIP, sin ficheros temporales.
+
+    Parámetros:
+    - zip_file (str): Ruta del archivo ZIP que contiene el CSV.
+    - miembro (str, opcional): Nombre del archivo dentro del ZIP a leer.
+
+    Devuelve:
+    - list: Lista de diccionarios representando el dataset.
+    """
+    return list(iterar_registros_zip(zip_file, miembro))
+
+
+def iterar_registros(fichero: str, miembro: Optional[str] = None) -> Iterator[dict]:
+    """
+    Devuelve de forma perezosa los registros de un archivo CSV o del CSV contenido en un ZIP, sin
+    cargar el dataset en memoria.
+
+    Parámetros:
+    - fichero (str): Ruta del archivo CSV o ZIP.
+    - miembro (str, opcional): Nombre del CSV dentro del ZIP a leer.
+
+    Devuelve:
+    - Iterator[dict]: Iterador de diccionarios representando cada registro del dataset.
+    """
+    if zipfile.is_zipfile(fichero):
+        yield from iterar_registros_zip(fichero, miembro)
+        return
+
+    with open(fichero, 'r', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            yield _registro_desde_fila(row)
+
+
+COLUMNAS_DATASET = ('sentiment', 'id', 'date', 'query', 'user', 'text')
+
+
+class _TablaCadenas:
+    """
+    Tabla de cadenas internadas: cada valor distinto se guarda una sola vez y cada registro
+    solo almacena el código entero que lo identifica.
+    """
+
+    def __init__(self):
+        self.valores = []
+        self._codigos = {}
+
+    def codificar(self, valor: str) -> int:
+        """Devuelve el código del valor, añadiéndolo a la tabla si todavía no existe."""
+        codigo = self._codigos.get(valor)
+        if codigo is None:
+            codigo = len(self.valores)
+            self._codigos[valor] = codigo
+            self.valores.append(valor)
+        return codigo
+
+    @classmethod
+    def desde_valores(cls, valores: list) -> '_TablaCadenas':
+        """Crea una tabla a partir de la lista de valores distintos, en orden de código."""
+        tabla = cls()
+        tabla.valores = valores
+        tabla._codigos = {valor: codigo for codigo, valor in enumerate(valores)}
+        return tabla
+
+    def __getitem__(self, codigo: int) -> str:
+        return self.valores[codigo]
+
+    def __len__(self) -> int:
+        return len(self.valores)
+
+
+class RegistroTweet(MutableMapping):
+    """
+    Vista de un registro de un DatasetColumnar que se comporta como un diccionario.
+
+    No copia ningún dato: las lecturas y escrituras se hacen directamente sobre las columnas
+    del dataset, por lo que las funciones que trabajan con listas de diccionarios pueden
+    usarla sin cambios.
+    """
+
+    __slots__ = ('_dataset', '_indice')
+
+    def __init__(self, dataset: 'DatasetColumnar', indice: int):
+        self._dataset = dataset
+        self._indice = indice
+
+    def __getitem__(self, columna: str):
+        return self._dataset.valor(self._indice, columna)
+
+    def __setitem__(self, columna: str, valor) -> None:
+        self._dataset.asignar(self._indice, columna, valor)
+
+    def __delitem__(self, columna: str) -> None:
+        raise TypeError("No se pueden eliminar columnas de un registro de un DatasetColumnar")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._dataset.columnas)
+
+    def __len__(self) -> int:
+        return len(self._dataset.columnas)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+def _clave_etiqueta(etiqueta: str) -> tuple:
+    """
+    Clave de ordenación de las etiquetas de sentimiento: primero las numéricas, por su valor, y
+    después el resto, alfabéticamente.
+    """
+    try:
+        return 0, int(etiqueta), etiqueta
+    except ValueError:
+        return 1, 0, etiqueta
+
+
+class DatasetColumnar:
+    """
+    Contenedor compacto del dataset de tweets almacenado por columnas.
+
+    - 'sentiment' se guarda como un array de enteros de 8 bits y 'id' como uno de 64 bits. Los
+      valores que no son un entero escrito de forma canónica (por ejemplo '' o '007') se guardan
+      tal cual aparte, para devolverlos sin cambios.
+    - 'date', 'query' y 'user' se guardan en tablas de cadenas internadas, de modo que los
+      valores repetidos solo ocupan memoria una vez.
+    - 'text' se guarda como una lista de cadenas.
+
+    El acceso por posición devuelve vistas RegistroTweet que se comportan como los diccionarios
+    que genera carga_dataset, así que el resto de funciones de utils siguen funcionando.
+    """
+
+    _COLUMNAS_INTERNADAS = ('date', 'query', 'user')
+    _LIMITES_ENTEROS = {'sentiment': (-2 ** 7, 2 ** 7 - 1), 'id': (-2 ** 63, 2 ** 63 - 1)}
+
+    def __init__(self, registros: Iterable[dict] = ()):
+        self._sentiment = array('b')
+        self._id = array('q')
+        # Valores originales de 'sentiment' e 'id' que no caben en los arrays, por posición
+        self._excepciones = {'sentiment': {}, 'id': {}}
+        self._tablas = {columna: _TablaCadenas() for columna in self._COLUMNAS_INTERNADAS}
+        self._codigos = {columna: array('I') for columna in self._COLUMNAS_INTERNADAS}
+        self._text = []
+        self._frecuencias = None
+        self._tweets_por_sentimiento = Counter()
+        self.extend(registros)
+
+    @property
+    def columnas(self) -> tuple:
+        """Nombres de las columnas disponibles en cada registro."""
+        if self._frecuencias is None:
+            return COLUMNAS_DATASET
+        return COLUMNAS_DATASET + ('frecuencias',)
+
+    def append(self, registro: dict) -> None:
+        """
+        Añade un registro al final del dataset.
+
+        Parámetros:
+        - registro (dict): Diccionario con las seis variables del dataset.
+        """
+        indice = len(self)
+        if self._frecuencias is not None or 'frecuencias' in registro:
+            self._materializar_frecuencias()
+            self._frecuencias.append(registro.get('frecuencias'))
+        self._sentiment.append(self._entero('sentiment', indice, registro['sentiment']))
+        self._tweets_por_sentimiento[self.valor(indice, 'sentiment')] += 1
+        self._id.append(self._entero('id', indice, registro['id']))
+        for columna in self._COLUMNAS_INTERNADAS:
+            self._codigos[columna].append(self._tablas[columna].codificar(registro[columna]))
+        self._text.append(registro['text'])
+
+    def _entero(self, columna: str, indice: int, valor) -> int:
+        """
+        Devuelve el entero que se guarda en el array de 'sentiment' o 'id' para un valor. Si el
+        valor no es un entero escrito de forma canónica o no cabe en el array, se guarda tal cual
+        en las excepciones de la columna y en el array se deja un 0.
+        """
+        valor = str(valor)
+        excepciones = self._excepciones[columna]
+        excepciones.pop(indice, None)
+        minimo, maximo = self._LIMITES_ENTEROS[columna]
+        try:
+            entero = int(valor)
+        except ValueError:
+            entero = None
+        if entero is None or str(entero) != valor or not minimo <= entero <= maximo:
+            excepciones[indice] = valor
+            return 0
+        return entero
+
+    def extend(self, registros: Iterable[dict]) -> None:
+        """
+        Añade todos los registros de un iterable al final del dataset.
+
+        Parámetros:
+        - registros (Iterable[dict]): Registros a añadir.
+        """
+        for registro in registros:
+            self.append(registro)
+
+    def valor(self, indice: int, columna: str):
+        """
+        Devuelve el valor de una columna para el registro en la posición indicada, con el
+        mismo tipo (str) que tendría en los diccionarios de carga_dataset.
+        """
+        if columna == 'text':
+            return self._text[indice]
+        if columna in self._excepciones:
+            excepciones = self._excepciones[columna]
+            if indice in excepciones:
+                return excepciones[indice]
+            return str(getattr(self, '_' + columna)[indice])
+        if columna in self._tablas:
+            return self._tablas[columna][self._codigos[columna][indice]]
+        if columna == 'frecuencias' and self._frecuencias is not None:
+            if isinstance(self._frecuencias, MatrizFrecuencias):
+                return self._frecuencias.fila_como_dict(indice)
+            return self._frecuencias[indice]
+        raise KeyError(columna)
+
+    def asignar(self, indice: int, columna: str, valor) -> None:
+        """
+        Modifica el valor de una columna para el registro en la posición indicada.
+        """
+        if columna == 'text':
+            self._text[indice] = valor
+        elif columna == 'sentiment':
+            self._tweets_por_sentimiento[self.valor(indice, 'sentiment')] -= 1
+            self._sentiment[indice] = self._entero('sentiment', indice, valor)
+            self._tweets_por_sentimiento[self.valor(indice, 'sentiment')] += 1
+        elif columna == 'id':
+            self._id[indice] = self._entero('id', indice, valor)
+        elif columna in self._tablas:
+            self._codigos[columna][indice] = self._tablas[columna].codificar(valor)
+        elif columna == 'frecuencias':
+            self._materializar_frecuencias()
+            self._frecuencias[indice] = valor
+        else:
+            raise KeyError(columna)
+
+    def estadisticas_clusters(self) -> dict:
+        """
+        Devuelve el número de registros de cada valor de 'sentiment', mantenido durante la carga
+        sin necesidad de recorrer el dataset.
+        """
+        return {sentimiento: conteo for sentimiento, conteo
+                in sorted(self._tweets_por_sentimiento.items(), key=lambda par: _clave_etiqueta(par[0]))
+                if conteo > 0}
+
+    def etiquetas_sentimiento(self) -> np.ndarray:
+        """
+        Devuelve el sentimiento (cluster) de cada registro como array de NumPy: de enteros, sin
+        copiar la columna, si todos los valores son enteros, o de cadenas en caso contrario.
+        """
+        if not self._excepciones['sentiment']:
+            return np.frombuffer(self._sentiment, dtype=np.int8)
+        return np.array(self.columna('sentiment'))
+
+    def establecer_frecuencias(self, matriz: 'MatrizFrecuencias') -> None:
+        """
+        Asigna la columna 'frecuencias' a partir de una MatrizFrecuencias con una fila por registro,
+        sin crear un diccionario por registro.
+        """
+        if len(matriz) != len(self):
+            raise ValueError("La matriz de frecuencias no tiene una fila por registro")
+        self._frecuencias = matriz
+
+    def _materializar_frecuencias(self) -> None:
+        """
+        Convierte la columna 'frecuencias' en una lista modificable de diccionarios.
+        """
+        if self._frecuencias is None:
+            self._frecuencias = [None] * len(self)
+        elif isinstance(self._frecuencias, MatrizFrecuencias):
+            self._frecuencias = self._frecuencias.a_diccionarios()
+
+    def columna(self, nombre: str) -> list:
+        """
+        Devuelve todos los valores de una columna como una lista.
+        """
+        if nombre in self._excepciones:
+            valores = [str(valor) for valor in getattr(self, '_' + nombre)]
+            for indice, valor in self._excepciones[nombre].items():
+                valores[indice] = valor
+            return valores
+        return [self.valor(indice, nombre) for indice in range(len(self))]
+
+    def seleccionar(self, indices) -> 'DatasetColumnar':
+        """
+        Devuelve un nuevo dataset con los registros de las posiciones indicadas, copiando las
+        columnas con numpy sin construir los registros.
+
+        Parámetros:
+        - indices (Iterable[int]): Posiciones de los registros a conservar, en el orden deseado.
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        resultado = DatasetColumnar()
+        resultado._sentiment = array('b', np.frombuffer(self._sentiment, dtype=np.int8)[indices].tobytes())
+        resultado._id = array('q', np.frombuffer(self._id, dtype=np.int64)[indices].tobytes())
+        # Las tablas de cadenas se comparten: los códigos existentes no cambian al añadir valores
+        resultado._tablas = self._tablas
+        resultado._codigos = {columna: array('I', np.frombuffer(codigos, dtype=np.uint32)[indices].tobytes())
+                              for columna, codigos in self._codigos.items()}
+        for columna, excepciones in self._excepciones.items():
+            if excepciones:
+                resultado._excepciones[columna] = {nuevo: excepciones[indice] for nuevo, indice
+                                                   in enumerate(indices.tolist()) if indice in excepciones}
+        resultado._text = [self._text[indice] for indice in indices]
+        resultado._tweets_por_sentimiento = Counter(resultado.columna('sentiment'))
+        if self._frecuencias is not None:
+            resultado._frecuencias = [self.valor(indice, 'frecuencias') for indice in indices]
+        return resultado
+
+    def __len__(self) -> int:
+        return len(self._text)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [RegistroTweet(self, i) for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("Índice fuera del rango del dataset")
+        return RegistroTweet(self, indice)
+
+    def __iter__(self) -> Iterator[RegistroTweet]:
+        for indice in range(len(self)):
+            yield RegistroTweet(self, indice)
+
+
+def _array_etiquetas(etiquetas: Iterable[str]) -> np.ndarray:
+    """
+    Convierte las etiquetas de sentimiento de un lote de registros en un array de NumPy, con el
+    mismo criterio que DatasetColumnar.etiquetas_sentimiento: de enteros si todas son enteros
+    escritos de forma canónica, o de cadenas en caso contrario.
+    """
+    etiquetas = [str(etiqueta) for etiqueta in etiquetas]
+    try:
+        enteros = [int(etiqueta) for etiqueta in etiquetas]
+    except ValueError:
+        return np.array(etiquetas)
+    if all(str(entero) == etiqueta for entero, etiqueta in zip(enteros, etiquetas)):
+        return np.array(enteros, dtype=np.int64)
+    return np.array(etiquetas)
+
+
+def _codificar_etiquetas(etiquetas: np.ndarray) -> tuple:
+    """
+    Codifica las etiquetas de sentimiento de cada registro como enteros pequeños, para guardarlas
+    en arrays de tamaño fijo aunque no sean números.
+
+    Devuelve:
+    - tuple: Lista ordenada de etiquetas distintas (str) y array con la posición en esa lista de
+      la etiqueta de cada registro, con el tipo entero sin signo más pequeño posible.
+    """
+    valores, codigos = np.unique(np.asarray(etiquetas), return_inverse=True)
+    tipo = np.min_scalar_type(max(len(valores) - 1, 0))
+    return [str(valor) for valor in valores.tolist()], codigos.ravel().astype(tipo)
+
+
+def _etiquetas_sentimiento(dataset) -> np.ndarray:
+    """
+    Devuelve el sentimiento (cluster) de cada registro de un dataset, en memoria o por columnas,
+    como array de NumPy (ver _array_etiquetas).
+    """
+    if isinstance(dataset, DatasetColumnar):
+        return dataset.etiquetas_sentimiento()
+    return _array_etiquetas(registro['sentiment'] for registro in dataset)
+
+
+def carga_dataset_columnar(fichero: str, miembro: Optional[str] = None) -> DatasetColumnar:
+    """
+    Carga el dataset en un DatasetColumnar desde un archivo CSV o desde el CSV contenido en un ZIP.
+
+    Parámetros:
+    - fichero (str): Ruta del archivo CSV o ZIP.
+    - miembro (str, opcional): Nombre del CSV dentro del ZIP a leer.
+
+    Devuelve:
+    - DatasetColumnar: Dataset almacenado por columnas.
+    """
+    return DatasetColumnar(iterar_registros(fichero, miembro))
+
+
+STOPWORDS = frozenset([
+    'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', 'your', 'yours', 'yourself',
+    'yourselves', 'he', 'him', 'his', 'himself', 'she', 'her', 'hers', 'herself', 'it', 'its', 'itself',
+    'they', 'them', 'their', 'theirs', 'themselves', 'what', 'which', 'who', 'whom', 'this',
+    'that', 'these', 'those', 'am', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have',
+    'has', 'had', 'having', 'do', 'does', 'did', 'doing', 'a', 'an', 'the', 'and', 'but', 'if',
+    'or', 'because', 'as', 'until', 'while', 'of', 'at', 'by', 'for', 'with', 'about', 'against',
+    'between', 'into', 'through', 'during', 'before', 'after', 'above', 'below', 'to', 'from',
+    'up', 'down', 'in', 'out', 'on', 'off', 'over', 'under', 'again', 'further', 'then', 'once',
+    'here', 'there', 'when', 'where', 'why', 'how', 'all', 'any', 'both', 'each', 'few', 'more',
+    'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too',
+    'very', 's', 't', 'can', 'will', 'just', 'don', 'should', 'now'])
+
+# Expresiones regulares del preprocesado, compiladas una única vez
+_PATRON_URL = re.compile(r"http\S+|www\S+|https\S+")
+_PATRON_SIMBOLOS = re.compile(r"[^\w\s]")
+
+# Ambas sustituciones son independientes del contexto, por lo que pueden aplicarse en una sola
+# pasada: en cada posición se intenta primero eliminar una URL y, si no, un símbolo
+_PATRON_LIMPIEZA = re.compile(f"{_PATRON_URL.pattern}|{_PATRON_SIMBOLOS.pattern}")
+
+
 def preprocesar_texto(texto: str) -> str:
     """
     Realiza un preprocesamiento básico en un texto dado:
@@ -66,10 +527,10 @@ def preprocesar_texto(texto: str) -> str:
     - str: Texto preprocesado.
     """
     # Eliminar las URLs
-    texto_sin_url = re.sub(r"http\S+|www\S+|https\S+", "", texto)
+    texto_sin_url = _PATRON_URL.sub("", texto)
 
     # Eliminar los caracteres no ASCII y los símbolos
-    texto_sin_especiales = re.sub(r"[^\w\s]", "", texto_sin_url)
+    texto_sin_especiales = _PATRON_SIMBOLOS.sub("", texto_sin_url)
 
     # Convertir el texto a minúsculas
     texto_preprocesado = texto_sin_especiales.lower()
@@ -80,27 +541,18 @@ def preprocesar_texto(texto: str) -> str:
     return texto_preprocesado
 
 
-def eliminar_stopwords(texto: str) -> str:
+def eliminar_stopwords(texto: str, stopwords: Optional[Iterable[str]] = None) -> str:
     """
     Elimina las stopwords de un texto dado.
 
     Parámetros:
     - texto (str): Texto al que se le eliminarán las stopwords.
+    - stopwords (Iterable[str], opcional): Stopwords a eliminar. Por defecto STOPWORDS.
 
     Devuelve:
     - str: Texto sin las stopwords.
     """
-    stopwords = ['i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', 'your', 'yours', 'yourself',
-                 'yourselves', 'he', 'him', 'his', 'himself', 'she', 'her', 'hers', 'herself', 'it', 'its', 'itself',
-                 'they', 'them', 'their', 'theirs', 'themselves', 'what', 'which', 'who', 'whom', 'this',
-                 'that', 'these', 'those', 'am', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have',
-                 'has', 'had', 'having', 'do', 'does', 'did', 'doing', 'a', 'an', 'the', 'and', 'but', 'if',
-                 'or', 'because', 'as', 'until', 'while', 'of', 'at', 'by', 'for', 'with', 'about', 'against',
-                 'between', 'into', 'through', 'during', 'before', 'after', 'above', 'below', 'to', 'from',
-                 'up', 'down', 'in', 'out', 'on', 'off', 'over', 'under', 'again', 'further', 'then', 'once',
-                 'here', 'there', 'when', 'where', 'why', 'how', 'all', 'any', 'both', 'each', 'few', 'more',
-                 'most', 'other', 'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too',
-                 'very', 's', 't', 'can', 'will', 'just', 'don', 'should', 'now']
+    stopwords = STOPWORDS if stopwords is None else frozenset(stopwords)
 
     palabras = texto.split()
     palabras_filtradas = [palabra for palabra in palabras if palabra not in stopwords]
@@ -109,16 +561,529 @@ def eliminar_stopwords(texto: str) -> str:
     return texto_sin_stopwords
 
 
-def obtener_frecuencias_y_vocabulario(dataset: list) -> tuple:
+def normalizar_textos(textos: Iterable[str], stopwords: Optional[Iterable[str]] = None,
+                      como_tokens: bool = False) -> list:
+    """
+    Aplica preprocesar_texto y eliminar_stopwords a un lote de textos en una única pasada por texto,
+    con el mismo resultado que llamar a ambas funciones de forma consecutiva.
+
+    Parámetros:
+    - textos (Iterable[str]): Textos a normalizar.
+    - stopwords (Iterable[str], opcional): Stopwords a eliminar. Por defecto STOPWORDS.
+    - como_tokens (bool): Si es True, cada texto se devuelve como lista de palabras, para que los
+      pasos posteriores no tengan que volver a separarlo.
+
+    Devuelve:
+    - list: Lista de textos normalizados (str) o de listas de palabras si como_tokens es True.
+    """
+    stopwords = STOPWORDS if stopwords is None else frozenset(stopwords)
+    limpiar = _PATRON_LIMPIEZA.sub
+
+    normalizados = []
+    for texto in textos:
+        palabras = [palabra for palabra in limpiar("", texto).lower().split() if palabra not in stopwords]
+        normalizados.append(palabras if como_tokens else " ".join(palabras))
+
+    return normalizados
+
+
+# Stopwords de cada proceso trabajador, fijadas una única vez al crearlo
+_stopwords_trabajador = None
+
+
+def _inicializar_trabajador(stopwords: Optional[frozenset]) -> None:
+    """
+    Inicializa un proceso trabajador guardando las stopwords que utilizará en todos los bloques.
+    """
+    global _stopwords_trabajador
+    _stopwords_trabajador = stopwords
+
+
+def _normalizar_bloque(textos: list) -> str:
+    """
+    Normaliza un bloque de textos en un proceso trabajador.
+
+    Los textos normalizados no contienen saltos de línea, por lo que se devuelven unidos en una
+    sola cadena: devolver un único objeto abarata mucho la serialización entre procesos.
+    """
+    return "\n".join(normalizar_textos(textos, _stopwords_trabajador))
+
+
+def _dividir_en_bloques(elementos: Iterable, tamano_bloque: int) -> Iterator[list]:
+    """
+    Agrupa los elementos de un iterable en listas consecutivas de tamaño tamano_bloque.
+    """
+    bloque = []
+    for elemento in elementos:
+        bloque.append(elemento)
+        if len(bloque) == tamano_bloque:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def normalizar_textos_paralelo(textos: Iterable[str], procesos: Optional[int] = None,
+                               tamano_bloque: int = 10000,
+                               stopwords: Optional[Iterable[str]] = None) -> list:
+    """
+    Normaliza un lote de textos como normalizar_textos, repartiendo el trabajo entre varios
+    procesos. Los resultados se devuelven en el orden original.
+
+    Parámetros:
+    - textos (Iterable[str]): Textos a normalizar.
+    - procesos (int, opcional): Número de procesos trabajadores. Por defecto, uno por núcleo.
+    - tamano_bloque (int): Número de textos que se envían a cada trabajador de una vez.
+    - stopwords (Iterable[str], opcional): Stopwords a eliminar. Por defecto STOPWORDS.
+
+    Devuelve:
+    - list: Lista de textos normalizados.
+    """
+    if tamano_bloque < 1:
+        raise ValueError("El tamaño de bloque debe ser mayor que cero")
+    if stopwords is not None:
+        stopwords = frozenset(stopwords)
+
+    normalizados = []
+    with multiprocessing.Pool(procesos, initializer=_inicializar_trabajador, initargs=(stopwords,)) as pool:
+        for bloque in pool.imap(_normalizar_bloque, _dividir_en_bloques(textos, tamano_bloque)):
+            normalizados.extend(bloque.split("\n"))
+
+    return normalizados
+
+
+def preprocesar_dataset(dataset, stopwords: Optional[Iterable[str]] = None, procesos: Optional[int] = 1,
+                        tamano_bloque: int = 10000):
+    """
+    Preprocesa y elimina las stopwords de la columna 'text' de todos los registros del dataset.
+
+    Parámetros:
+    - dataset (list | DatasetColumnar): Dataset a preprocesar, que se modifica en el sitio.
+    - stopwords (Iterable[str], opcional): Stopwords a eliminar. Por defecto STOPWORDS.
+    - procesos (int, opcional): Número de procesos a utilizar. Con 1 el preprocesado se hace en
+      el proceso actual; con None se utiliza un proceso por núcleo.
+    - tamano_bloque (int): Número de textos por bloque en el modo con varios procesos.
+
+    Devuelve:
+    - list | DatasetColumnar: El mismo dataset con los textos preprocesados.
+    """
+    if isinstance(dataset, DatasetColumnar):
+        textos = dataset._text
+    else:
+        textos = [registro['text'] for registro in dataset]
+
+    if procesos == 1:
+        normalizados = normalizar_textos(textos, stopwords)
+    else:
+        normalizados = normalizar_textos_paralelo(textos, procesos, tamano_bloque, stopwords)
+
+    if isinstance(dataset, DatasetColumnar):
+        dataset._text = normalizados
+    else:
+        for registro, texto in zip(dataset, normalizados):
+            registro['text'] = texto
+    return dataset
+
+
+def _shingles(texto: str, tamano_shingle: int) -> set:
+    """
+    Devuelve el conjunto de shingles de un texto preprocesado: secuencias de tamano_shingle tokens
+    consecutivos. Los textos más cortos forman un único shingle.
+    """
+    tokens = texto.split()
+    if tamano_shingle == 1:
+        return set(tokens)
+    if len(tokens) <= tamano_shingle:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + tamano_shingle]) for i in range(len(tokens) - tamano_shingle + 1)}
+
+
+def firmas_minhash(textos: Iterable[str], num_permutaciones: int = 64, tamano_shingle: int = 1,
+                   semilla: int = 0, tamano_bloque: int = 20000) -> tuple:
+    """
+    Calcula la firma MinHash de cada texto preprocesado.
+
+    Cada shingle se convierte en un entero de 32 bits con CRC32 y cada permutación es una función
+    hash multiplicativa (a * x + b) >> 32 sobre 64 bits. Los valores de todas las permutaciones se
+    calculan una sola vez por shingle distinto, y los mínimos de cada texto se obtienen con numpy
+    por bloques de textos, de modo que la memoria auxiliar depende del tamaño del bloque y del
+    vocabulario de shingles, no del corpus.
+
+    Parámetros:
+    - textos (Iterable[str]): Textos ya preprocesados.
+    - num_permutaciones (int): Número de funciones hash de la firma.
+    - tamano_shingle (int): Número de tokens consecutivos de cada shingle.
+    - semilla (int): Semilla de los coeficientes de las funciones hash.
+    - tamano_bloque (int): Número de textos procesados juntos.
+
+    Devuelve:
+    - tuple: Matriz uint32 (textos x num_permutaciones) con las firmas y array booleano que indica
+      qué textos tienen algún shingle.
+    """
+    aleatorio = np.random.default_rng(semilla)
+    # Los multiplicadores impares hacen que cada función sea una permutación de los enteros de 64 bits
+    multiplicadores = aleatorio.integers(0, 2 ** 63, num_permutaciones, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    sumandos = aleatorio.integers(0, 2 ** 63, num_permutaciones, dtype=np.uint64)
+
+    # Código de cada shingle distinto y, por filas, sus valores en todas las permutaciones. Solo las
+    # num_hashes primeras filas son válidas; el resto es capacidad reservada para nuevos shingles
+    codigos = defaultdict(itertools.count().__next__)
+    hashes_shingles = np.empty((0, num_permutaciones), dtype=np.uint32)
+    num_hashes = 0
+    firmas, con_shingles = [], []
+    for bloque in _dividir_en_bloques(textos, tamano_bloque):
+        ids = array('I')
+        longitudes = array('I')
+        for texto in bloque:
+            shingles = _shingles(texto, tamano_shingle)
+            ids.extend(map(codigos.__getitem__, shingles))
+            longitudes.append(len(shingles))
+
+        if len(codigos) > num_hashes:
+            # Los shingles nuevos son los últimos insertados en el diccionario: se leen desde el
+            # final, sin recorrer los de bloques anteriores
+            shingles_nuevos = list(itertools.islice(reversed(codigos), len(codigos) - num_hashes))[::-1]
+            nuevos = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles_nuevos),
+                                 dtype=np.uint64, count=len(shingles_nuevos))
+            if len(codigos) > len(hashes_shingles):
+                # La capacidad se duplica, de modo que copiar las filas existentes cuesta un tiempo
+                # proporcional al número total de shingles y no a bloques x shingles
+                ampliado = np.empty((max(len(codigos), 2 * len(hashes_shingles)), num_permutaciones),
+                                    dtype=np.uint32)
+                ampliado[:num_hashes] = hashes_shingles[:num_hashes]
+                hashes_shingles = ampliado
+            hashes_shingles[num_hashes:len(codigos)] = (nuevos[:, None] * multiplicadores + sumandos) >> np.uint64(32)
+            num_hashes = len(codigos)
+
+        # Mínimo de cada permutación sobre los shingles de cada texto. Con los textos ordenados de
+        # más a menos shingles, los que tienen un j-ésimo shingle forman un prefijo, así que cada
+        # paso actualiza con una sola operación las firmas de todos ellos
+        longitudes = np.frombuffer(longitudes, dtype=np.uint32).astype(np.int64)
+        ids = np.frombuffer(ids, dtype=np.uint32)
+        inicios = np.cumsum(longitudes) - longitudes
+        orden = np.argsort(-longitudes, kind='stable')
+        longitudes_ordenadas = -longitudes[orden]
+        inicios_ordenados = inicios[orden]
+        firmas_ordenadas = np.full((len(longitudes), num_permutaciones), np.iinfo(np.uint32).max, dtype=np.uint32)
+        for j in range(int(-longitudes_ordenadas[0]) if len(longitudes) else 0):
+            activos = int(np.searchsorted(longitudes_ordenadas, -j))
+            np.minimum(firmas_ordenadas[:activos], hashes_shingles[ids[inicios_ordenados[:activos] + j]],
+                       out=firmas_ordenadas[:activos])
+        firmas_bloque = np.empty_like(firmas_ordenadas)
+        firmas_bloque[orden] = firmas_ordenadas
+        firmas.append(firmas_bloque)
+        con_shingles.append(longitudes > 0)
+
+    if not firmas:
+        return np.empty((0, num_permutaciones), dtype=np.uint32), np.empty(0, dtype=bool)
+    return np.concatenate(firmas), np.concatenate(con_shingles)
+
+
+def _filas_por_banda(num_permutaciones: int, umbral: float) -> int:
+    """
+    Elige el número de filas de cada banda LSH: el mayor divisor de num_permutaciones cuyo umbral
+    aproximado (1 / bandas) ** (1 / filas) no supera el umbral de similitud, de modo que los pares
+    por encima del umbral casi siempre comparten alguna banda.
+    """
+    filas_elegidas = 1
+    for filas in range(1, num_permutaciones + 1):
+        if num_permutaciones % filas == 0 and (filas / num_permutaciones) ** (1 / filas) <= umbral:
+            filas_elegidas = filas
+    return filas_elegidas
+
+
+def detectar_casi_duplicados(textos: Iterable[str], umbral: float = 0.8, num_permutaciones: int = 64,
+                             tamano_shingle: int = 1, semilla: int = 0) -> np.ndarray:
+    """
+    Detecta los textos casi duplicados con MinHash y un índice LSH (Locality-Sensitive Hashing).
+
+    Las firmas se dividen en bandas y los textos con una banda idéntica caen en el mismo cubo; cada
+    texto se compara solo con el primero de cada cubo en que cae, de modo que el coste crece de
+    forma casi lineal con el número de textos. Los pares candidatos se confirman si la similitud de
+    Jaccard estimada por sus firmas alcanza el umbral, y los pares confirmados se agrupan en
+    componentes conexas.
+
+    Parámetros:
+    - textos (Iterable[str]): Textos ya preprocesados (después de preprocesar_texto).
+    - umbral (float): Similitud de Jaccard mínima entre los shingles de dos textos casi duplicados.
+    - num_permutaciones (int): Número de funciones hash de cada firma MinHash.
+    - tamano_shingle (int): Número de tokens consecutivos de cada shingle.
+    - semilla (int): Semilla de las funciones hash.
+
+    Devuelve:
+    - np.ndarray: Para cada texto, la posición del primer texto de su grupo de casi duplicados. Los
+      textos que no son duplicados de uno anterior (y los vacíos) apuntan a sí mismos.
+    """
+    firmas, con_shingles = firmas_minhash(textos, num_permutaciones, tamano_shingle, semilla)
+    representantes = np.arange(len(firmas))
+    posiciones = np.flatnonzero(con_shingles)
+    if len(posiciones) < 2:
+        return representantes
+
+    # Índice LSH: cada banda de filas se resume en un entero de 64 bits y los textos con el mismo
+    # valor forman un cubo. Cada texto genera como mucho un par candidato por banda
+    filas = _filas_por_banda(num_permutaciones, umbral)
+    pesos = np.random.default_rng(semilla + 1).integers(1, 2 ** 63, filas, dtype=np.uint64) | np.uint64(1)
+    pares_a, pares_b = [], []
+    for inicio in range(0, num_permutaciones, filas):
+        claves = (firmas[posiciones, inicio:inicio + filas].astype(np.uint64) * pesos).sum(axis=1, dtype=np.uint64)
+        orden = np.argsort(claves, kind='stable')
+        claves_ordenadas = claves[orden]
+        nuevo_cubo = np.empty(len(orden), dtype=bool)
+        nuevo_cubo[0] = True
+        nuevo_cubo[1:] = claves_ordenadas[1:] != claves_ordenadas[:-1]
+        primero_cubo = orden[np.flatnonzero(nuevo_cubo)[np.cumsum(nuevo_cubo) - 1]]
+        repetidos = ~nuevo_cubo
+        pares_a.append(posiciones[primero_cubo[repetidos]])
+        pares_b.append(posiciones[orden[repetidos]])
+
+    # Pares distintos, codificados como un solo entero para ordenarlos rápido
+    codificados = np.sort(np.concatenate(pares_a).astype(np.int64) * len(firmas) + np.concatenate(pares_b))
+    if len(codificados) == 0:
+        return representantes
+    codificados = codificados[np.concatenate([[True], codificados[1:] != codificados[:-1]])]
+    pares = np.stack([codificados // len(firmas), codificados % len(firmas)], axis=1)
+
+    # Confirmar los candidatos con la similitud estimada, por bloques para acotar la memoria
+    confirmados = np.zeros(len(pares), dtype=bool)
+    for inicio in range(0, len(pares), 100000):
+        bloque = pares[inicio:inicio + 100000]
+        similitud = (firmas[bloque[:, 0]] == firmas[bloque[:, 1]]).mean(axis=1)
+        confirmados[inicio:inicio + 100000] = similitud >= umbral
+    a, b = pares[confirmados, 0], pares[confirmados, 1]
+
+    # Componentes conexas por propagación del mínimo con saltos de punteros: cada texto acaba
+    # apuntando al de menor posición de su grupo
+    while len(a):
+        minimos = np.minimum(representantes[a], representantes[b])
+        nuevos = representantes.copy()
+        np.minimum.at(nuevos, a, minimos)
+        np.minimum.at(nuevos, b, minimos)
+        nuevos = nuevos[nuevos]
+        if np.array_equal(nuevos, representantes):
+            break
+        representantes = nuevos
+    return representantes
+
+
+def eliminar_casi_duplicados(dataset, umbral: float = 0.8, num_permutaciones: int = 64,
+                             tamano_shingle: int = 1, semilla: int = 0):
+    """
+    Elimina del dataset preprocesado los tweets casi duplicados de otro anterior, conservando el
+    primero de cada grupo.
+
+    Parámetros:
+    - dataset (list | DatasetColumnar): Dataset con los textos ya preprocesados.
+    - umbral, num_permutaciones, tamano_shingle, semilla: Como en detectar_casi_duplicados.
+
+    Devuelve:
+    - list | DatasetColumnar: Nuevo dataset, del mismo tipo, sin los casi duplicados.
+    """
+    if isinstance(dataset, DatasetColumnar):
+        textos = dataset._text
+    else:
+        textos = [registro['text'] for registro in dataset]
+    representantes = detectar_casi_duplicados(textos, umbral, num_permutaciones, tamano_shingle, semilla)
+    conservados = np.flatnonzero(representantes == np.arange(len(representantes)))
+
+    if isinstance(dataset, DatasetColumnar):
+        return dataset.seleccionar(conservados)
+    return [dataset[indice] for indice in conservados]
+
+
+class MatrizFrecuencias:
+    """
+    Matriz dispersa documento-término en formato CSR (Compressed Sparse Row).
+
+    Los términos del tweet i ocupan las posiciones indptr[i]:indptr[i + 1] de los arrays indices
+    (columna del término en el vocabulario) y conteos (número de apariciones en el tweet). Dentro
+    de cada tweet los términos conservan el orden de primera aparición, de modo que
+    fila_como_dict devuelve exactamente el diccionario de obtener_frecuencias_y_vocabulario.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, conteos: np.ndarray, vocabulario: list):
+        self.indptr = indptr
+        self.indices = indices
+        self.conteos = conteos
+        self.vocabulario = vocabulario
+        self.indice_terminos = {termino: columna for columna, termino in enumerate(vocabulario)}
+
+    @property
+    def forma(self) -> tuple:
+        """Número de tweets (filas) y de términos del vocabulario (columnas)."""
+        return len(self.indptr) - 1, len(self.vocabulario)
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def fila_como_dict(self, fila: int) -> dict:
+        """
+        Devuelve el diccionario de frecuencias de términos de un tweet.
+        """
+        inicio, fin = self.indptr[fila], self.indptr[fila + 1]
+        return {self.vocabulario[columna]: int(conteo)
+                for columna, conteo in zip(self.indices[inicio:fin], self.conteos[inicio:fin])}
+
+    def a_diccionarios(self) -> list:
+        """
+        Devuelve la lista de diccionarios de frecuencias de todos los tweets.
+        """
+        return [self.fila_como_dict(fila) for fila in range(len(self))]
+
+    def frecuencias_totales(self) -> np.ndarray:
+        """
+        Devuelve el número total de apariciones de cada término del vocabulario.
+        """
+        return np.bincount(self.indices, weights=self.conteos, minlength=len(self.vocabulario)).astype(np.int64)
+
+    def frecuencias_documentales(self) -> np.ndarray:
+        """
+        Devuelve el número de tweets en los que aparece cada término del vocabulario.
+        """
+        return np.bincount(self.indices, minlength=len(self.vocabulario))
+
+    def sumar_por_grupo(self, etiquetas, por_documento: bool = False) -> tuple:
+        """
+        Suma las frecuencias de los tweets de cada grupo (por ejemplo, de cada cluster).
+
+        Parámetros:
+        - etiquetas (Sequence): Etiqueta del grupo de cada tweet.
+        - por_documento (bool): Si es True se cuenta el número de tweets que contienen cada
+          término en lugar de su número de apariciones.
+
+        Devuelve:
+        - tuple: Lista ordenada de grupos y matriz densa (grupos x vocabulario) con las sumas.
+        """
+        grupos, grupo_por_fila = np.unique(np.asarray(etiquetas), return_inverse=True)
+        num_terminos = len(self.vocabulario)
+        grupo_por_elemento = np.repeat(grupo_por_fila.ravel(), np.diff(self.indptr))
+        pesos = None if por_documento else self.conteos
+        sumas = np.bincount(grupo_por_elemento * num_terminos + self.indices, weights=pesos,
+                            minlength=len(grupos) * num_terminos)
+        return grupos.tolist(), sumas.astype(np.int64).reshape(len(grupos), num_terminos)
+
+    def sumar_filas(self, filas) -> tuple:
+        """
+        Suma las frecuencias de un subconjunto de tweets recorriendo solo sus filas.
+
+        Parámetros:
+        - filas (Sequence[int]): Posiciones de los tweets a sumar.
+
+        Devuelve:
+        - tuple: Array con las columnas de los términos que aparecen, en orden creciente, y array
+          con la suma de sus frecuencias.
+        """
+        filas = np.asarray(filas, dtype=np.int64)
+        inicios = self.indptr[filas].astype(np.int64)
+        longitudes = self.indptr[filas + 1] - inicios
+        # Posición en indices y conteos de cada elemento de las filas, concatenadas
+        elementos = np.repeat(inicios - np.cumsum(longitudes) + longitudes, longitudes) + np.arange(longitudes.sum())
+        columnas, posiciones = np.unique(self.indices[elementos], return_inverse=True)
+        return columnas, np.bincount(posiciones.ravel(), weights=self.conteos[elementos],
+                                     minlength=len(columnas)).astype(np.int64)
+
+    def mas_frecuentes(self, k: int, frecuencias: Optional[np.ndarray] = None) -> list:
+        """
+        Devuelve los k términos con mayor frecuencia.
+
+        Parámetros:
+        - k (int): Número de términos a devolver.
+        - frecuencias (np.ndarray, opcional): Frecuencia de cada término del vocabulario, por
+          ejemplo una fila de sumar_por_grupo. Por defecto, frecuencias_totales().
+
+        Devuelve:
+        - list: Lista de tuplas (término, frecuencia) ordenada de mayor a menor frecuencia.
+        """
+        if frecuencias is None:
+            frecuencias = self.frecuencias_totales()
+        k = min(k, len(frecuencias))
+        if k <= 0:
+            return []
+        # Los empates se resuelven por orden alfabético, que coincide con el orden de las columnas.
+        # Como en Counter.most_common, no se devuelven los términos con frecuencia 0
+        umbral = -np.partition(-frecuencias, k - 1)[k - 1]
+        candidatos = np.flatnonzero(frecuencias >= max(umbral, 1))
+        orden = candidatos[np.lexsort((candidatos, -frecuencias[candidatos]))][:k]
+        return [(self.vocabulario[columna], int(frecuencias[columna])) for columna in orden]
+
+
+def construir_matriz_frecuencias(dataset) -> MatrizFrecuencias:
+    """
+    Calcula las frecuencias de términos de cada tweet del dataset como una matriz dispersa CSR.
+
+    Parámetros:
+    - dataset (list | DatasetColumnar): Dataset con los textos ya preprocesados.
+
+    Devuelve:
+    - MatrizFrecuencias: Matriz de frecuencias con el vocabulario ordenado alfabéticamente.
+    """
+    def frecuencias_por_tweet():
+        for tweet in dataset:
+            frecuencia_tweet = {}
+            for palabra in tweet['text'].split():
+                frecuencia_tweet[palabra] = frecuencia_tweet.get(palabra, 0) + 1
+            yield frecuencia_tweet
+
+    return matriz_desde_diccionarios(frecuencias_por_tweet())
+
+
+def matriz_desde_diccionarios(frecuencias: Iterable[dict]) -> MatrizFrecuencias:
+    """
+    Construye una matriz de frecuencias a partir del diccionario de frecuencias de cada tweet, por
+    ejemplo la columna 'frecuencias' de un dataset.
+
+    Parámetros:
+    - frecuencias (Iterable[dict]): Diccionario {término: frecuencia} de cada tweet.
+
+    Devuelve:
+    - MatrizFrecuencias: Matriz de frecuencias con el vocabulario ordenado alfabéticamente.
+    """
+    columnas_provisionales = {}
+    indptr = array('q', [0])
+    indices = array('i')
+    conteos = array('i')
+
+    for frecuencia_tweet in frecuencias:
+        for palabra, conteo in frecuencia_tweet.items():
+            columna = columnas_provisionales.get(palabra)
+            if columna is None:
+                columna = columnas_provisionales[palabra] = len(columnas_provisionales)
+            indices.append(columna)
+            conteos.append(conteo)
+        indptr.append(len(indices))
+
+    # Las columnas se asignan por orden de aparición y se reordenan según el vocabulario ordenado
+    vocabulario = sorted(columnas_provisionales)
+    posiciones = {termino: columna for columna, termino in enumerate(vocabulario)}
+    reordenacion = np.fromiter((posiciones[termino] for termino in columnas_provisionales),
+                               dtype=np.int32, count=len(columnas_provisionales))
+
+    return MatrizFrecuencias(np.frombuffer(indptr, dtype=np.int64),
+                             reordenacion[np.frombuffer(indices, dtype=np.int32)],
+                             np.frombuffer(conteos, dtype=np.int32),
+                             vocabulario)
+
+
+def obtener_frecuencias_y_vocabulario(dataset: list, formato: str = 'dict') -> tuple:
     """
     Calcula las frecuencias de términos y el vocabulario a partir de un dataset.
 
     Parámetros:
     - dataset (list): Lista de diccionarios representando el dataset.
+    - formato (str): 'dict' para obtener un diccionario de frecuencias por tweet o 'dispersa'
+      para obtenerlas como una MatrizFrecuencias.
 
     Devuelve:
-    - tuple: Tupla que contiene la lista de frecuencias de términos y el vocabulario.
+    - tuple: Con formato 'dict', tupla que contiene la lista de frecuencias de términos y el
+      vocabulario. Con formato 'dispersa', tupla con la MatrizFrecuencias y el diccionario que
+      asigna a cada término su columna en la matriz.
     """
+    if formato == 'dispersa':
+        matriz = construir_matriz_frecuencias(dataset)
+        return matriz, matriz.indice_terminos
+    if formato != 'dict':
+        raise ValueError(f"Formato de frecuencias no soportado: {formato}")
+
     frecuencias = []
     vocabulario = set()
 
@@ -140,14 +1105,1346 @@ def obtener_frecuencias_y_vocabulario(dataset: list) -> tuple:
     return frecuencias, vocabulario
 
 
+class AcumuladorFrecuencias:
+    """
+    Acumulador incremental de frecuencias de términos y vocabulario.
+
+    Recibe el dataset por lotes y mantiene actualizados los conteos globales de cada término, los
+    conteos por sentimiento, el número de tweets de cada sentimiento que contienen cada término y el
+    número de tweets procesados, sin necesitar el dataset completo en memoria. Dos acumuladores
+    construidos sobre fragmentos distintos se pueden fusionar, y la fusión es asociativa, por lo que
+    los resultados parciales de varios procesos se combinan en cualquier agrupación con el mismo
+    resultado.
+    """
+
+    def __init__(self):
+        self.num_tweets = 0
+        self.tweets_por_sentimiento = Counter()
+        self.conteos = Counter()
+        self.conteos_por_sentimiento = {}
+        self.documentos_por_sentimiento = {}
+
+    def actualizar(self, tweets: Iterable[dict]) -> 'AcumuladorFrecuencias':
+        """
+        Añade un lote de tweets a los conteos.
+
+        Parámetros:
+        - tweets (Iterable[dict]): Registros con las claves 'sentiment' y 'text' (preprocesado).
+
+        Devuelve:
+        - AcumuladorFrecuencias: El propio acumulador, para poder encadenar llamadas.
+        """
+        for tweet in tweets:
+            sentimiento = tweet['sentiment']
+            palabras = tweet['text'].split()
+
+            conteos_sentimiento = self.conteos_por_sentimiento.get(sentimiento)
+            if conteos_sentimiento is None:
+                conteos_sentimiento = self.conteos_por_sentimiento[sentimiento] = Counter()
+                self.documentos_por_sentimiento[sentimiento] = Counter()
+
+            self.num_tweets += 1
+            self.tweets_por_sentimiento[sentimiento] += 1
+            self.conteos.update(palabras)
+            conteos_sentimiento.update(palabras)
+            # Cada término se cuenta una sola vez por tweet, en orden de primera aparición
+            self.documentos_por_sentimiento[sentimiento].update(dict.fromkeys(palabras).keys())
+
+        return self
+
+    @property
+    def vocabulario(self) -> list:
+        """Vocabulario acumulado, ordenado alfabéticamente."""
+        return sorted(self.conteos)
+
+    @property
+    def sentimientos(self) -> list:
+        """Sentimientos (clusters) encontrados, ordenados."""
+        return sorted(self.tweets_por_sentimiento)
+
+    def mas_frecuentes(self, sentimiento=None, k: int = 20, por_documento: bool = False) -> list:
+        """
+        Devuelve los k términos más frecuentes de un sentimiento o de todo el dataset.
+
+        Parámetros:
+        - sentimiento (str, opcional): Sentimiento (cluster) a consultar. Por defecto, todos.
+        - k (int): Número de términos a devolver.
+        - por_documento (bool): Si es True, se ordena por el número de tweets que contienen cada
+          término en lugar de por su número total de apariciones.
+
+        Devuelve:
+        - list: Lista de tuplas (término, frecuencia), de mayor a menor frecuencia.
+        """
+        if sentimiento is None:
+            if por_documento:
+                conteos = Counter()
+                for documentos in self.documentos_por_sentimiento.values():
+                    conteos.update(documentos)
+            else:
+                conteos = self.conteos
+        elif por_documento:
+            conteos = self.documentos_por_sentimiento.get(sentimiento, Counter())
+        else:
+            conteos = self.conteos_por_sentimiento.get(sentimiento, Counter())
+        return conteos.most_common(k)
+
+    def _sumar(self, otro: 'AcumuladorFrecuencias') -> None:
+        """
+        Suma en el propio acumulador los conteos de otro acumulador.
+        """
+        self.num_tweets += otro.num_tweets
+        self.tweets_por_sentimiento.update(otro.tweets_por_sentimiento)
+        self.conteos.update(otro.conteos)
+        for sentimiento, conteos in otro.conteos_por_sentimiento.items():
+            self.conteos_por_sentimiento.setdefault(sentimiento, Counter()).update(conteos)
+        for sentimiento, documentos in otro.documentos_por_sentimiento.items():
+            self.documentos_por_sentimiento.setdefault(sentimiento, Counter()).update(documentos)
+
+    def fusionar(self, otro: 'AcumuladorFrecuencias') -> 'AcumuladorFrecuencias':
+        """
+        Combina dos acumuladores en uno nuevo, sin modificar ninguno de los dos.
+
+        Parámetros:
+        - otro (AcumuladorFrecuencias): Acumulador a combinar con este.
+
+        Devuelve:
+        - AcumuladorFrecuencias: Acumulador con los conteos de ambos.
+        """
+        resultado = AcumuladorFrecuencias()
+        resultado._sumar(self)
+        resultado._sumar(otro)
+        return resultado
+
+    __add__ = fusionar
+
+    def __eq__(self, otro) -> bool:
+        if not isinstance(otro, AcumuladorFrecuencias):
+            return NotImplemented
+        return (self.num_tweets == otro.num_tweets
+                and self.tweets_por_sentimiento == otro.tweets_por_sentimiento
+                and self.conteos == otro.conteos
+                and self.conteos_por_sentimiento == otro.conteos_por_sentimiento
+                and self.documentos_por_sentimiento == otro.documentos_por_sentimiento)
+
+
+def construir_indice_por_cluster(dataset) -> AcumuladorFrecuencias:
+    """
+    Construye en una sola pasada el índice de conteos de términos por sentimiento (cluster), a
+    partir del cual se pueden consultar directamente los términos más frecuentes de cada cluster.
+
+    Parámetros:
+    - dataset (list | DatasetColumnar): Dataset con los textos ya preprocesados.
+
+    Devuelve:
+    - AcumuladorFrecuencias: Índice con los conteos por cluster.
+    """
+    return AcumuladorFrecuencias().actualizar(dataset)
+
+
+class ContadorNgramas:
+    """
+    Contador de n-gramas (secuencias de n términos consecutivos) por sentimiento con un límite de
+    memoria.
+
+    Mientras el número de n-gramas distintos no supera max_ngramas, los conteos son exactos. Al
+    superarlo, los conteos pasan a un sketch Count-Min por sentimiento, de tamaño fijo
+    (profundidad x anchura enteros), y solo se conservan como candidatos los n-gramas más
+    frecuentes, cuya frecuencia es la estimada por el sketch. La estimación nunca es menor que la
+    frecuencia real y, con probabilidad 1 - exp(-profundidad), la supera como mucho en
+    e / anchura veces el número de n-gramas del sentimiento (cota_error). Antes de aplicar las
+    funciones hash del sketch, cada n-grama se resume en una clave de 64 bits con BLAKE2b, por lo
+    que las colisiones entre claves, no cubiertas por la cota, son despreciables (probabilidad del
+    orden de (n-gramas distintos)² / 2^65).
+    """
+
+    def __init__(self, n: int = 2, max_ngramas: int = 1000000, anchura: int = 2 ** 18, profundidad: int = 4,
+                 semilla: int = 0):
+        """
+        Parámetros:
+        - n (int): Número de términos de cada n-grama.
+        - max_ngramas (int): Número máximo de n-gramas distintos que se guardan, sumando todos los
+          sentimientos.
+        - anchura (int): Número de contadores de cada fila del sketch. Debe ser potencia de 2.
+        - profundidad (int): Número de filas (funciones hash) del sketch.
+        - semilla (int): Semilla de los coeficientes de las funciones hash.
+        """
+        if n < 1:
+            raise ValueError("n debe ser al menos 1.")
+        if anchura < 2 or anchura & (anchura - 1):
+            raise ValueError("La anchura del sketch debe ser una potencia de 2.")
+        self.n = n
+        self.max_ngramas = max_ngramas
+        self.anchura = anchura
+        self.profundidad = profundidad
+        self.semilla = semilla
+        self.num_tweets = 0
+        self.tweets_por_sentimiento = Counter()
+        self.ngramas_por_sentimiento = Counter()
+        self.conteos_por_sentimiento = {}
+        # Sketch de cada sentimiento, o None mientras los conteos son exactos
+        self.sketches = None
+
+        aleatorio = np.random.default_rng(semilla)
+        # Funciones hash multiplicativas (a * x + b) >> (64 - log2(anchura)), con a impar
+        self._multiplicadores = (aleatorio.integers(0, 2 ** 63, profundidad, dtype=np.uint64) * np.uint64(2)
+                                 + np.uint64(1))[:, None]
+        self._sumandos = aleatorio.integers(0, 2 ** 63, profundidad, dtype=np.uint64)[:, None]
+        self._desplazamiento = np.uint64(64 - (anchura.bit_length() - 1))
+
+    @property
+    def exacto(self) -> bool:
+        """True si los conteos son exactos, es decir, si nunca se ha superado max_ngramas."""
+        return self.sketches is None
+
+    def _columnas(self, ngramas: list) -> np.ndarray:
+        """
+        Devuelve la columna del sketch de cada n-grama en cada fila (profundidad x n-gramas).
+        """
+        claves = np.frombuffer(b''.join(hashlib.blake2b(ngrama.encode('utf-8'), digest_size=8).digest()
+                                        for ngrama in ngramas), dtype='<u8').astype(np.uint64)
+        return ((claves * self._multiplicadores + self._sumandos) >> self._desplazamiento).astype(np.int64)
+
+    def _sketch(self, sentimiento: str) -> np.ndarray:
+        """
+        Devuelve el sketch de un sentimiento, creándolo vacío si no existe.
+        """
+        sketch = self.sketches.get(sentimiento)
+        if sketch is None:
+            sketch = self.sketches[sentimiento] = np.zeros((self.profundidad, self.anchura), dtype=np.int64)
+        return sketch
+
+    def _sumar_al_sketch(self, sentimiento: str, conteos: Counter) -> None:
+        """
+        Suma unos conteos exactos al sketch de un sentimiento.
+        """
+        sketch = self._sketch(sentimiento)
+        if not conteos:
+            return
+        columnas = self._columnas(list(conteos))
+        pesos = np.fromiter(conteos.values(), dtype=np.int64, count=len(conteos))
+        for fila, columnas_fila in zip(sketch, columnas):
+            np.add.at(fila, columnas_fila, pesos)
+
+    def _estimar(self, sentimiento: str, ngramas: list) -> np.ndarray:
+        """
+        Estima con el sketch la frecuencia de cada n-grama en un sentimiento.
+        """
+        if not ngramas:
+            return np.empty(0, dtype=np.int64)
+        columnas = self._columnas(ngramas)
+        return self.sketches[sentimiento][np.arange(self.profundidad)[:, None], columnas].min(axis=0)
+
+    def _pasar_a_aproximado(self) -> None:
+        """
+        Vuelca los conteos exactos en los sketches, a partir de los cuales se estiman desde entonces.
+        """
+        self.sketches = {}
+        for sentimiento, conteos in self.conteos_por_sentimiento.items():
+            self._sumar_al_sketch(sentimiento, conteos)
+
+    def _podar(self) -> None:
+        """
+        Si se supera max_ngramas, pasa a conteos aproximados y conserva en cada sentimiento los
+        n-gramas más frecuentes, hasta la mitad del límite entre todos, para no tener que podar en
+        cada lote.
+        """
+        if sum(map(len, self.conteos_por_sentimiento.values())) <= self.max_ngramas:
+            return
+        if self.exacto:
+            self._pasar_a_aproximado()
+        cuota = max(1, self.max_ngramas // (2 * len(self.conteos_por_sentimiento)))
+        for sentimiento, conteos in self.conteos_por_sentimiento.items():
+            if len(conteos) > cuota:
+                self.conteos_por_sentimiento[sentimiento] = Counter(dict(conteos.most_common(cuota)))
+
+    def _sumar_lote(self, lote: dict) -> None:
+        """
+        Suma los conteos exactos de un lote, agrupados por sentimiento.
+        """
+        for sentimiento, conteos_lote in lote.items():
+            conteos = self.conteos_por_sentimiento.setdefault(sentimiento, Counter())
+            if self.exacto:
+                conteos.update(conteos_lote)
+            else:
+                # Los candidatos del lote toman la estimación del sketch, que incluye las apariciones
+                # anteriores a su última poda
+                self._sumar_al_sketch(sentimiento, conteos_lote)
+                ngramas = list(conteos_lote)
+                dict.update(conteos, zip(ngramas, self._estimar(sentimiento, ngramas).tolist()))
+        self._podar()
+
+    def actualizar(self, tweets: Iterable[dict], tamano_bloque: int = 50000) -> 'ContadorNgramas':
+        """
+        Añade los n-gramas de un lote de tweets a los conteos.
+
+        Parámetros:
+        - tweets (Iterable[dict]): Registros con las claves 'sentiment' y 'text' (preprocesado).
+        - tamano_bloque (int): Número de tweets que se cuentan juntos antes de comprobar el límite.
+          El lote se suma antes si sus n-gramas distintos pudieran superar max_ngramas, de modo que
+          nunca ocupa más que los conteos guardados (salvo un único tweet con más n-gramas).
+
+        Devuelve:
+        - ContadorNgramas: El propio contador, para poder encadenar llamadas.
+        """
+        n = self.n
+        for bloque in _dividir_en_bloques(tweets, tamano_bloque):
+            lote, ngramas_lote = {}, 0
+            for tweet in bloque:
+                sentimiento = tweet['sentiment']
+                palabras = tweet['text'].split()
+                num_ngramas = max(len(palabras) - n + 1, 0)
+                # Si los n-gramas del tweet pudieran hacer que el lote superase el límite, se suma antes
+                if ngramas_lote and ngramas_lote + num_ngramas > self.max_ngramas:
+                    self._sumar_lote(lote)
+                    lote, ngramas_lote = {}, 0
+                conteos_lote = lote.get(sentimiento)
+                if conteos_lote is None:
+                    conteos_lote = lote[sentimiento] = Counter()
+                self.tweets_por_sentimiento[sentimiento] += 1
+                self.num_tweets += 1
+                if num_ngramas:
+                    ngramas_lote -= len(conteos_lote)
+                    conteos_lote.update(map(' '.join, zip(*(palabras[i:] for i in range(n)))))
+                    ngramas_lote += len(conteos_lote)
+                    self.ngramas_por_sentimiento[sentimiento] += num_ngramas
+            self._sumar_lote(lote)
+        return self
+
+    @property
+    def sentimientos(self) -> list:
+        """Sentimientos (clusters) encontrados, ordenados."""
+        return sorted(self.tweets_por_sentimiento)
+
+    def cota_error(self, sentimiento=None) -> int:
+        """
+        Devuelve cuánto puede superar, con probabilidad 1 - exp(-profundidad), la frecuencia
+        estimada de un n-grama a la real: 0 si los conteos son exactos y e / anchura veces el
+        número de n-gramas del sentimiento si no lo son.
+
+        Parámetros:
+        - sentimiento (str, opcional): Sentimiento (cluster) a consultar. Por defecto, la cota de
+          la suma de todos los sentimientos.
+        """
+        if self.exacto:
+            return 0
+        if sentimiento is None:
+            return sum(self.cota_error(sentimiento) for sentimiento in self.sketches)
+        return int(np.ceil(np.e / self.anchura * self.ngramas_por_sentimiento[sentimiento]))
+
+    def mas_frecuentes(self, sentimiento=None, k: int = 20) -> list:
+        """
+        Devuelve los k n-gramas más frecuentes de un sentimiento o de todo el dataset.
+
+        Parámetros:
+        - sentimiento (str, opcional): Sentimiento (cluster) a consultar. Por defecto, todos.
+        - k (int): Número de n-gramas a devolver.
+
+        Devuelve:
+        - list: Lista de tuplas (n-grama, frecuencia), de mayor a menor frecuencia. Si los conteos
+          no son exactos, las frecuencias son estimaciones por exceso.
+        """
+        if sentimiento is not None:
+            conteos = self.conteos_por_sentimiento.get(sentimiento, Counter())
+        elif self.exacto:
+            conteos = Counter()
+            for conteos_sentimiento in self.conteos_por_sentimiento.values():
+                conteos.update(conteos_sentimiento)
+        else:
+            # Un candidato podado en un sentimiento también cuenta con su estimación en ese sentimiento
+            ngramas = list(set().union(*self.conteos_por_sentimiento.values()))
+            estimaciones = sum(self._estimar(sentimiento, ngramas) for sentimiento in self.sketches)
+            conteos = Counter(dict(zip(ngramas, np.asarray(estimaciones).tolist())))
+        return sorted(conteos.items(), key=lambda elemento: (-elemento[1], elemento[0]))[:k]
+
+    def fusionar(self, otro: 'ContadorNgramas') -> 'ContadorNgramas':
+        """
+        Combina dos contadores con los mismos parámetros en uno nuevo, sin modificar ninguno de los
+        dos. El resultado es exacto solo si ambos lo son y la unión no supera max_ngramas.
+
+        Parámetros:
+        - otro (ContadorNgramas): Contador a combinar con este.
+
+        Devuelve:
+        - ContadorNgramas: Contador con los conteos de ambos.
+        """
+        parametros = (self.n, self.max_ngramas, self.anchura, self.profundidad, self.semilla)
+        if parametros != (otro.n, otro.max_ngramas, otro.anchura, otro.profundidad, otro.semilla):
+            raise ValueError("Solo se pueden fusionar contadores de n-gramas con los mismos parámetros.")
+        resultado = ContadorNgramas(*parametros)
+        resultado.num_tweets = self.num_tweets + otro.num_tweets
+        resultado.tweets_por_sentimiento = self.tweets_por_sentimiento + otro.tweets_por_sentimiento
+        resultado.ngramas_por_sentimiento = self.ngramas_por_sentimiento + otro.ngramas_por_sentimiento
+        if self.exacto and otro.exacto:
+            for contador in (self, otro):
+                for sentimiento, conteos in contador.conteos_por_sentimiento.items():
+                    resultado.conteos_por_sentimiento.setdefault(sentimiento, Counter()).update(conteos)
+            resultado._podar()
+            return resultado
+
+        # Los sketches son lineales: el de la unión es la suma de los de ambos fragmentos
+        resultado.sketches = {}
+        for contador in (self, otro):
+            if contador.exacto:
+                for sentimiento, conteos in contador.conteos_por_sentimiento.items():
+                    resultado._sumar_al_sketch(sentimiento, conteos)
+            else:
+                for sentimiento, sketch in contador.sketches.items():
+                    resultado._sketch(sentimiento)[:] += sketch
+        for sentimiento in resultado.sketches:
+            ngramas = list(set(self.conteos_por_sentimiento.get(sentimiento, ()))
+                           | set(otro.conteos_por_sentimiento.get(sentimiento, ())))
+            resultado.conteos_por_sentimiento[sentimiento] = Counter(
+                dict(zip(ngramas, resultado._estimar(sentimiento, ngramas).tolist())))
+        resultado._podar()
+        return resultado
+
+    __add__ = fusionar
+
+
+def contar_ngramas(dataset, n: int = 2, max_ngramas: int = 1000000, **parametros) -> ContadorNgramas:
+    """
+    Cuenta en una sola pasada los n-gramas de cada sentimiento (cluster) con un límite de memoria.
+
+    Parámetros:
+    - dataset (list | DatasetColumnar | Iterable[dict]): Registros con los textos ya preprocesados.
+    - n (int): Número de términos de cada n-grama.
+    - max_ngramas (int): Número máximo de n-gramas distintos con conteo exacto.
+    - **parametros: Otros parámetros de ContadorNgramas (anchura, profundidad, semilla).
+
+    Devuelve:
+    - ContadorNgramas: Contador con los n-gramas por sentimiento.
+    """
+    return ContadorNgramas(n, max_ngramas, **parametros).actualizar(dataset)
+
+
+class ContadorFrecuentes:
+    """
+    Contador aproximado de los términos más frecuentes (heavy hitters) de cada sentimiento con
+    memoria fija, mediante resúmenes de Misra-Gries que se pueden fusionar.
+
+    Cada sentimiento guarda como mucho capacidad contadores. Cuando un lote de tweets deja más
+    contadores, se resta a todos el valor del (capacidad + 1)-ésimo mayor y se eliminan los que no
+    quedan positivos. La frecuencia guardada de un término nunca supera la real y es menor como
+    mucho en el total restado en su sentimiento (cota_error), que a su vez no supera
+    N / (capacidad + 1), siendo N el número de apariciones contadas. Mientras no se resta nada, los
+    conteos son exactos.
+
+    Tiene la misma interfaz de consulta que AcumuladorFrecuencias, por lo que se puede pasar como
+    índice a generar_histograma_por_cluster.
+    """
+
+    def __init__(self, capacidad: int = 1000, por_documento: bool = True):
+        """
+        Parámetros:
+        - capacidad (int): Número máximo de términos con contador de cada sentimiento.
+        - por_documento (bool): Si es True se cuenta el número de tweets que contienen cada término,
+          como en generar_histograma_por_cluster, y si no, su número total de apariciones.
+        """
+        if capacidad < 1:
+            raise ValueError("La capacidad debe ser al menos 1.")
+        self.capacidad = capacidad
+        self.por_documento = por_documento
+        self.num_tweets = 0
+        self.tweets_por_sentimiento = Counter()
+        self.apariciones_por_sentimiento = Counter()
+        self.conteos_por_sentimiento = {}
+        self.restado_por_sentimiento = Counter()
+
+    def _reducir(self, sentimiento: str) -> None:
+        """
+        Si un sentimiento tiene más contadores que la capacidad, resta a todos el (capacidad + 1)-ésimo
+        mayor y elimina los que dejan de ser positivos.
+        """
+        conteos = self.conteos_por_sentimiento[sentimiento]
+        if len(conteos) <= self.capacidad:
+            return
+        valores = np.fromiter(conteos.values(), dtype=np.int64, count=len(conteos))
+        umbral = int(-np.partition(-valores, self.capacidad)[self.capacidad])
+        # Se conserva el orden de inserción, con el que Counter.most_common desempata
+        self.conteos_por_sentimiento[sentimiento] = Counter({termino: conteo - umbral
+                                                             for termino, conteo in conteos.items() if conteo > umbral})
+        self.restado_por_sentimiento[sentimiento] += umbral
+
+    def actualizar(self, tweets: Iterable[dict], tamano_bloque: int = 10000) -> 'ContadorFrecuentes':
+        """
+        Añade un lote de tweets a los contadores.
+
+        Parámetros:
+        - tweets (Iterable[dict]): Registros con las claves 'sentiment' y 'text' (preprocesado o
+          ya separado en una lista de palabras).
+        - tamano_bloque (int): Número de tweets que se cuentan juntos antes de reducir los contadores.
+
+        Devuelve:
+        - ContadorFrecuentes: El propio contador, para poder encadenar llamadas.
+        """
+        for bloque in _dividir_en_bloques(tweets, tamano_bloque):
+            sentimientos_bloque = set()
+            for tweet in bloque:
+                sentimiento = tweet['sentiment']
+                palabras = tweet['text']
+                if isinstance(palabras, str):
+                    palabras = palabras.split()
+                if self.por_documento:
+                    # Cada término se cuenta una sola vez por tweet, en orden de primera aparición
+                    palabras = dict.fromkeys(palabras).keys()
+                conteos = self.conteos_por_sentimiento.get(sentimiento)
+                if conteos is None:
+                    conteos = self.conteos_por_sentimiento[sentimiento] = Counter()
+                conteos.update(palabras)
+                self.tweets_por_sentimiento[sentimiento] += 1
+                self.apariciones_por_sentimiento[sentimiento] += len(palabras)
+                sentimientos_bloque.add(sentimiento)
+            self.num_tweets += len(bloque)
+            for sentimiento in sentimientos_bloque:
+                self._reducir(sentimiento)
+        return self
+
+    @property
+    def sentimientos(self) -> list:
+        """Sentimientos (clusters) encontrados, ordenados."""
+        return sorted(self.tweets_por_sentimiento)
+
+    @property
+    def exacto(self) -> bool:
+        """True si nunca se ha restado nada, es decir, si todos los conteos son exactos."""
+        return not any(self.restado_por_sentimiento.values())
+
+    def cota_error(self, sentimiento=None) -> int:
+        """
+        Devuelve cuánto puede ser menor la frecuencia guardada de un término que la real.
+
+        Parámetros:
+        - sentimiento (str, opcional): Sentimiento (cluster) a consultar. Por defecto, la cota de
+          la suma de todos los sentimientos.
+        """
+        if sentimiento is None:
+            return sum(self.restado_por_sentimiento.values())
+        return self.restado_por_sentimiento[sentimiento]
+
+    def mas_frecuentes(self, sentimiento=None, k: int = 20, por_documento: Optional[bool] = None) -> list:
+        """
+        Devuelve los k términos más frecuentes de un sentimiento o de todo el dataset.
+
+        Parámetros:
+        - sentimiento (str, opcional): Sentimiento (cluster) a consultar. Por defecto, todos.
+        - k (int): Número de términos a devolver.
+        - por_documento (bool, opcional): Se admite por compatibilidad con AcumuladorFrecuencias;
+          debe coincidir con el modo de conteo del contador.
+
+        Devuelve:
+        - list: Lista de tuplas (término, frecuencia), de mayor a menor frecuencia. Cada frecuencia
+          es como mucho cota_error(sentimiento) menor que la real.
+        """
+        if por_documento is not None and por_documento != self.por_documento:
+            raise ValueError(f"El contador se construyó con por_documento={self.por_documento}.")
+        if sentimiento is not None:
+            return self.conteos_por_sentimiento.get(sentimiento, Counter()).most_common(k)
+        conteos = Counter()
+        for conteos_sentimiento in self.conteos_por_sentimiento.values():
+            conteos.update(conteos_sentimiento)
+        return conteos.most_common(k)
+
+    def fusionar(self, otro: 'ContadorFrecuentes') -> 'ContadorFrecuentes':
+        """
+        Combina dos contadores con la misma capacidad y modo en uno nuevo, sin modificar ninguno de
+        los dos. La cota de error del resultado es la suma de las de ambos más lo que se reste al
+        reducirlo.
+
+        Parámetros:
+        - otro (ContadorFrecuentes): Contador a combinar con este.
+
+        Devuelve:
+        - ContadorFrecuentes: Contador con los conteos de ambos.
+        """
+        if (self.capacidad, self.por_documento) != (otro.capacidad, otro.por_documento):
+            raise ValueError("Solo se pueden fusionar contadores con la misma capacidad y modo.")
+        resultado = ContadorFrecuentes(self.capacidad, self.por_documento)
+        resultado.num_tweets = self.num_tweets + otro.num_tweets
+        resultado.tweets_por_sentimiento = self.tweets_por_sentimiento + otro.tweets_por_sentimiento
+        resultado.apariciones_por_sentimiento = self.apariciones_por_sentimiento + otro.apariciones_por_sentimiento
+        resultado.restado_por_sentimiento = self.restado_por_sentimiento + otro.restado_por_sentimiento
+        for contador in (self, otro):
+            for sentimiento, conteos in contador.conteos_por_sentimiento.items():
+                resultado.conteos_por_sentimiento.setdefault(sentimiento, Counter()).update(conteos)
+        for sentimiento in resultado.conteos_por_sentimiento:
+            resultado._reducir(sentimiento)
+        return resultado
+
+    __add__ = fusionar
+
+
+def frecuentes_streaming(registros: Iterable[dict], capacidad: int = 1000, por_documento: bool = True,
+                         stopwords: Optional[Iterable[str]] = None, tamano_bloque: int = 10000) -> ContadorFrecuentes:
+    """
+    Cuenta los términos más frecuentes de cada sentimiento directamente sobre los registros sin
+    preprocesar que devuelve el cargador (por ejemplo iterar_registros_zip), normalizando los
+    textos por bloques. La memoria depende de la capacidad y del tamaño del bloque, no del corpus.
+
+    Parámetros:
+    - registros (Iterable[dict]): Registros con las claves 'sentiment' y 'text' (sin preprocesar).
+    - capacidad (int): Número máximo de términos con contador de cada sentimiento.
+    - por_documento (bool): Si es True se cuenta el número de tweets que contienen cada término.
+    - stopwords (Iterable[str], opcional): Stopwords a eliminar. Por defecto STOPWORDS.
+    - tamano_bloque (int): Número de registros normalizados y contados juntos.
+
+    Devuelve:
+    - ContadorFrecuentes: Contador con los términos más frecuentes de cada sentimiento.
+    """
+    contador = ContadorFrecuentes(capacidad, por_documento)
+    for bloque in _dividir_en_bloques(registros, tamano_bloque):
+        tokens = normalizar_textos([registro['text'] for registro in bloque], stopwords, como_tokens=True)
+        contador.actualizar(({'sentiment': registro['sentiment'], 'text': palabras}
+                             for registro, palabras in zip(bloque, tokens)), tamano_bloque)
+    return contador
+
+
+_MESES = {mes: numero for numero, mes in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), start=1)}
+
+# Desfase respecto a UTC, en segundos, de las zonas horarias que aparecen en las fechas
+_ZONAS_HORARIAS = {'UTC': 0, 'GMT': 0, 'PST': -8 * 3600, 'PDT': -7 * 3600, 'MST': -7 * 3600, 'MDT': -6 * 3600,
+                   'CST': -6 * 3600, 'CDT': -5 * 3600, 'EST': -5 * 3600, 'EDT': -4 * 3600}
+
+INTERVALOS = {'hora': 3600, 'dia': 86400}
+
+# Marca de tiempo que se asigna a las fechas no válidas cuando no se exige que todas lo sean
+FECHA_NO_VALIDA = np.iinfo(np.int64).min
+
+
+@functools.lru_cache(maxsize=65536)
+def parsear_fecha(fecha: str) -> int:
+    """
+    Convierte una fecha del dataset (por ejemplo 'Mon Apr 06 22:19:45 PDT 2009') en segundos desde
+    el 1 de enero de 1970 en UTC. Se descompone la cadena directamente, sin strptime, y los
+    resultados se guardan en caché, ya que muchos tweets comparten fecha.
+
+    Parámetros:
+    - fecha (str): Fecha con el formato de la columna 'date'.
+
+    Devuelve:
+    - int: Marca de tiempo Unix de la fecha.
+    """
+    try:
+        _, mes, dia, hora, zona, anio = fecha.split()
+        horas, minutos, segundos = hora.split(':')
+        return (calendar.timegm((int(anio), _MESES[mes], int(dia), int(horas), int(minutos), int(segundos)))
+                - _ZONAS_HORARIAS[zona])
+    except (ValueError, KeyError):
+        raise ValueError(f"Fecha no válida: {fecha!r}") from None
+
+
+def _codigos_tres_letras(caracteres: np.ndarray, valores: dict) -> tuple:
+    """
+    Traduce con un diccionario cada código de tres letras de una matriz de bytes (fechas x 3).
+
+    Devuelve:
+    - tuple: Array int64 con el valor de cada código (0 si no está en el diccionario) y array
+      booleano que indica qué códigos están en él.
+    """
+    claves = (caracteres[:, 0].astype(np.int64) << 16) | (caracteres[:, 1].astype(np.int64) << 8) | caracteres[:, 2]
+    distintas, posiciones = np.unique(claves, return_inverse=True)
+    por_clave = {int.from_bytes(codigo.encode('ascii'), 'big'): valor for codigo, valor in valores.items()}
+    traducidas = [por_clave.get(clave) for clave in distintas.tolist()]
+    posiciones = posiciones.ravel()
+    return (np.array([valor or 0 for valor in traducidas], dtype=np.int64)[posiciones],
+            np.array([valor is not None for valor in traducidas], dtype=bool)[posiciones])
+
+
+def parsear_fechas(fechas: list, estricto: bool = True) -> np.ndarray:
+    """
+    Convierte una lista de fechas del dataset en marcas de tiempo Unix con operaciones vectorizadas.
+
+    Las fechas con el formato de ancho fijo 'Www Mmm DD HH:MM:SS ZZZ YYYY' se descomponen leyendo
+    los dígitos de cada posición de una matriz de bytes; el resto se convierte con parsear_fecha.
+
+    Parámetros:
+    - fechas (list): Fechas con el formato de la columna 'date'.
+    - estricto (bool): Si es True, una fecha no válida (vacía, con una zona horaria desconocida...)
+      lanza ValueError; si es False, se le asigna FECHA_NO_VALIDA.
+
+    Devuelve:
+    - np.ndarray: Array int64 con la marca de tiempo de cada fecha.
+    """
+    resultado = np.zeros(len(fechas), dtype=np.int64)
+    longitudes = np.fromiter(map(len, fechas), dtype=np.int64, count=len(fechas))
+    validas = longitudes == 28
+    try:
+        caracteres = np.array(fechas, dtype='S28').view(np.uint8).reshape(len(fechas), 28)
+    except UnicodeEncodeError:
+        validas[:] = False
+    if validas.any():
+        caracteres = caracteres[validas]
+        digitos = caracteres.astype(np.int64) - ord('0')
+
+        def numero(*posiciones):
+            valor = 0
+            for posicion in posiciones:
+                valor = valor * 10 + digitos[:, posicion]
+            return valor
+
+        meses, meses_conocidos = _codigos_tres_letras(caracteres[:, 4:7], _MESES)
+        desfases, zonas_conocidas = _codigos_tres_letras(caracteres[:, 20:23], _ZONAS_HORARIAS)
+        digitos_fecha = digitos[:, [8, 9, 11, 12, 14, 15, 17, 18, 24, 25, 26, 27]]
+        correctas = (np.all(caracteres[:, [3, 7, 10, 19, 23]] == ord(' '), axis=1)
+                     & np.all(caracteres[:, [13, 16]] == ord(':'), axis=1)
+                     & np.all((digitos_fecha >= 0) & (digitos_fecha <= 9), axis=1)
+                     & meses_conocidos & zonas_conocidas)
+
+        # Los meses desconocidos se sustituyen para poder calcular todas las fechas a la vez
+        meses[~meses_conocidos] = 1
+        dias = (((numero(24, 25, 26, 27) - 1970) * 12 + meses - 1).astype('datetime64[M]').astype('datetime64[D]')
+                .astype(np.int64) + numero(8, 9) - 1)
+        segundos = dias * 86400 + numero(11, 12) * 3600 + numero(14, 15) * 60 + numero(17, 18) - desfases
+        posiciones_validas = np.flatnonzero(validas)
+        resultado[posiciones_validas[correctas]] = segundos[correctas]
+        validas[posiciones_validas[~correctas]] = False
+
+    for posicion in np.flatnonzero(~validas).tolist():
+        try:
+            resultado[posicion] = parsear_fecha(fechas[posicion])
+        except ValueError:
+            if estricto:
+                raise
+            resultado[posicion] = FECHA_NO_VALIDA
+    return resultado
+
+
+def fechas_epoch(dataset, estricto: bool = True) -> np.ndarray:
+    """
+    Devuelve la marca de tiempo Unix de cada tweet de un dataset.
+
+    En un DatasetColumnar cada fecha distinta de la tabla de cadenas internadas se convierte una
+    sola vez y el resultado se reparte con los códigos de cada registro.
+
+    Parámetros:
+    - dataset (list | DatasetColumnar): Dataset con la columna 'date'.
+    - estricto (bool): Si es False, las fechas no válidas valen FECHA_NO_VALIDA en lugar de lanzar
+      ValueError.
+
+    Devuelve:
+    - np.ndarray: Array int64 con una marca de tiempo por tweet.
+    """
+    if isinstance(dataset, DatasetColumnar):
+        tabla = parsear_fechas(dataset._tablas['date'].valores, estricto)
+        return tabla[np.frombuffer(dataset._codigos['date'], dtype=np.uint32)]
+    return parsear_fechas([registro['date'] for registro in dataset], estricto)
+
+
+class SerieTemporal:
+    """
+    Conteos de tweets por sentimiento y de apariciones de un conjunto de términos en intervalos
+    consecutivos de tiempo (horas o días en UTC), guardados en arrays densos con una fila por
+    intervalo, incluidos los que no tienen tweets. Permite seguir la evolución de los términos y
+    de la proporción de cada sentimiento sin volver a recorrer el dataset para cada ventana.
+    """
+
+    def __init__(self, inicio: int, tamano_intervalo: int, sentimientos: list, terminos: list,
+                 tweets: np.ndarray, conteos: np.ndarray, num_fechas_no_validas: int = 0):
+        """
+        Parámetros:
+        - inicio (int): Marca de tiempo Unix del comienzo del primer intervalo.
+        - tamano_intervalo (int): Duración de cada intervalo, en segundos.
+        - sentimientos (list): Sentimientos (clusters), en el orden de las columnas de tweets.
+        - terminos (list): Términos, en el orden de las columnas de conteos.
+        - tweets (np.ndarray): Matriz (intervalos x sentimientos) con el número de tweets.
+        - conteos (np.ndarray): Matriz (intervalos x términos) con el número de apariciones.
+        - num_fechas_no_validas (int): Número de tweets omitidos por tener una fecha no válida.
+        """
+        self.inicio = inicio
+        self.tamano_intervalo = tamano_intervalo
+        self.sentimientos = sentimientos
+        self.terminos = terminos
+        self.tweets = tweets
+        self.conteos = conteos
+        self.num_fechas_no_validas = num_fechas_no_validas
+        self._columnas = {termino: columna for columna, termino in enumerate(terminos)}
+
+    def __len__(self) -> int:
+        return len(self.tweets)
+
+    @property
+    def inicios(self) -> np.ndarray:
+        """Marca de tiempo Unix del comienzo de cada intervalo."""
+        return self.inicio + self.tamano_intervalo * np.arange(len(self), dtype=np.int64)
+
+    @property
+    def proporciones(self) -> np.ndarray:
+        """Proporción de tweets de cada sentimiento en cada intervalo (0 en los intervalos vacíos)."""
+        totales = self.tweets.sum(axis=1, keepdims=True)
+        return np.divide(self.tweets, totales, out=np.zeros(self.tweets.shape), where=totales > 0)
+
+    def serie(self, termino: str) -> np.ndarray:
+        """
+        Devuelve el número de apariciones de un término en cada intervalo.
+
+        Parámetros:
+        - termino (str): Término a consultar. Debe ser uno de los términos de la serie.
+        """
+        return self.conteos[:, self._columnas[termino]]
+
+    def mas_frecuentes(self, intervalo: int, k: int = 10) -> list:
+        """
+        Devuelve los k términos con más apariciones en un intervalo.
+
+        Parámetros:
+        - intervalo (int): Posición del intervalo.
+        - k (int): Número de términos a devolver.
+
+        Devuelve:
+        - list: Lista de tuplas (término, frecuencia), de mayor a menor frecuencia y sin los
+          términos que no aparecen en el intervalo.
+        """
+        fila = self.conteos[intervalo]
+        columnas = np.lexsort((np.arange(len(fila)), -fila))[:k]
+        return [(self.terminos[columna], int(fila[columna])) for columna in columnas if fila[columna] > 0]
+
+    def reagrupar(self, tamano_intervalo: int) -> 'SerieTemporal':
+        """
+        Suma los conteos en intervalos más largos, por ejemplo de horas a días, sin volver a
+        recorrer el dataset.
+
+        Parámetros:
+        - tamano_intervalo (int): Duración de los nuevos intervalos, múltiplo de la actual.
+
+        Devuelve:
+        - SerieTemporal: Serie con los nuevos intervalos, alineados con el origen de tiempos.
+        """
+        if tamano_intervalo % self.tamano_intervalo:
+            raise ValueError("La nueva duración debe ser múltiplo de la duración de los intervalos.")
+        grupos = self.inicios // tamano_intervalo
+        primero = int(grupos[0]) if len(grupos) else 0
+        grupos -= primero
+        num_grupos = int(grupos[-1]) + 1 if len(grupos) else 0
+        tweets = np.zeros((num_grupos, self.tweets.shape[1]), dtype=np.int64)
+        conteos = np.zeros((num_grupos, self.conteos.shape[1]), dtype=np.int64)
+        np.add.at(tweets, grupos, self.tweets)
+        np.add.at(conteos, grupos, self.conteos)
+        return SerieTemporal(primero * tamano_intervalo, tamano_intervalo, self.sentimientos, self.terminos,
+                             tweets, conteos, self.num_fechas_no_validas)
+
+
+def agregar_por_tiempo(dataset, matriz: Optional[MatrizFrecuencias] = None, intervalo='hora',
+                       terminos: Optional[Iterable[str]] = None, num_terminos: int = 1000) -> SerieTemporal:
+    """
+    Agrega en una sola pasada, con operaciones vectorizadas sobre la matriz de frecuencias, el
+    número de tweets de cada sentimiento y las apariciones de cada término por hora o por día.
+
+    Los tweets con una fecha no válida (vacía, con una zona horaria desconocida...) no se asignan a
+    ningún intervalo: se omiten y su número queda en el atributo num_fechas_no_validas de la serie.
+
+    Parámetros:
+    - dataset (list | DatasetColumnar): Dataset preprocesado con las columnas 'date' y 'sentiment'.
+    - matriz (MatrizFrecuencias, opcional): Frecuencias de términos del dataset. Por defecto se usan
+      las asignadas al dataset o, si no tiene, se calculan de 'text'.
+    - intervalo (str | int): 'hora', 'dia' o duración de cada intervalo en segundos.
+    - terminos (Iterable[str], opcional): Términos a seguir. Por defecto, los num_terminos más
+      frecuentes del dataset.
+    - num_terminos (int): Número de términos a seguir si no se indican.
+
+    Devuelve:
+    - SerieTemporal: Conteos por intervalo.
+    """
+    tamano_intervalo = INTERVALOS.get(intervalo, intervalo)
+    if not isinstance(tamano_intervalo, int) or tamano_intervalo <= 0:
+        raise ValueError(f"Intervalo no válido: {intervalo!r}. Usa 'hora', 'dia' o un número de segundos.")
+    etiquetas = _etiquetas_sentimiento(dataset)
+    if isinstance(dataset, DatasetColumnar) and matriz is None and isinstance(dataset._frecuencias, MatrizFrecuencias):
+        matriz = dataset._frecuencias
+    if matriz is None:
+        matriz = construir_matriz_frecuencias(dataset)
+
+    fechas = fechas_epoch(dataset, estricto=False)
+    validas = fechas != FECHA_NO_VALIDA
+    num_no_validas = len(fechas) - int(np.count_nonzero(validas))
+    if num_no_validas == len(fechas):
+        return SerieTemporal(0, tamano_intervalo, [], list(terminos or ()), np.zeros((0, 0), dtype=np.int64),
+                             np.zeros((0, 0), dtype=np.int64), num_no_validas)
+    primero = int(fechas[validas].min()) // tamano_intervalo
+    # Los tweets con fecha no válida quedan en el intervalo -1, que no se cuenta
+    intervalos = np.where(validas, fechas // tamano_intervalo - primero, -1)
+    num_intervalos = int(intervalos.max()) + 1
+
+    sentimientos, sentimiento_por_fila = np.unique(etiquetas[validas], return_inverse=True)
+    tweets = np.bincount(intervalos[validas] * len(sentimientos) + sentimiento_por_fila.ravel(),
+                         minlength=num_intervalos * len(sentimientos)).reshape(num_intervalos, len(sentimientos))
+
+    if terminos is None:
+        terminos = [termino for termino, _ in matriz.mas_frecuentes(num_terminos)]
+    else:
+        terminos = [termino for termino in terminos if termino in matriz.indice_terminos]
+    # Columna de cada término de la matriz en la serie, o -1 si no se sigue
+    columna_serie = np.full(len(matriz.vocabulario), -1, dtype=np.int64)
+    columna_serie[[matriz.indice_terminos[termino] for termino in terminos]] = np.arange(len(terminos))
+    columnas = columna_serie[matriz.indices]
+    intervalo_por_elemento = np.repeat(intervalos, np.diff(matriz.indptr))
+    seguidos = (columnas >= 0) & (intervalo_por_elemento >= 0)
+    conteos = np.bincount(intervalo_por_elemento[seguidos] * len(terminos) + columnas[seguidos],
+                          weights=matriz.conteos[seguidos], minlength=num_intervalos * len(terminos))
+
+    return SerieTemporal(primero * tamano_intervalo, tamano_intervalo,
+                         [str(sentimiento) for sentimiento in sentimientos], terminos, tweets,
+                         conteos.astype(np.int64).reshape(num_intervalos, len(terminos)), num_no_validas)
+
+
+class IndiceUsuarios:
+    """
+    Índice de agrupación de los tweets por usuario.
+
+    Cada usuario tiene un código entero, obtenido de un diccionario (la tabla de cadenas internadas
+    de la columna 'user', que el DatasetColumnar ya construye durante la carga), y las posiciones de
+    sus tweets ocupan un tramo contiguo del array posiciones, ordenado por código de usuario como en
+    una ordenación por recuento. Así, el número de tweets y de cada sentimiento de un usuario se
+    consultan en tiempo constante y sus tweets sin recorrer el dataset.
+    """
+
+    def __init__(self, usuarios: list, codigos: np.ndarray, sentimientos: np.ndarray,
+                 matriz: Optional[MatrizFrecuencias] = None):
+        """
+        Parámetros:
+        - usuarios (list): Nombre de cada usuario, en orden de código.
+        - codigos (np.ndarray): Código del usuario de cada tweet.
+        - sentimientos (np.ndarray): Sentimiento (cluster) de cada tweet.
+        - matriz (MatrizFrecuencias, opcional): Frecuencias de términos de los tweets, para consultar
+          los términos más frecuentes de cada usuario.
+        """
+        self.usuarios = usuarios
+        self._codigos = {usuario: codigo for codigo, usuario in enumerate(usuarios)}
+        self.matriz = matriz
+
+        codigos = np.asarray(codigos, dtype=np.int64)
+        self.tweets_por_usuario = np.bincount(codigos, minlength=len(usuarios))
+        # La tabla de usuarios puede compartirse con otros datasets (por ejemplo, tras seleccionar),
+        # así que solo se cuentan los usuarios con algún tweet
+        self._num_usuarios = int(np.count_nonzero(self.tweets_por_usuario))
+        self.desplazamientos = np.concatenate([[0], np.cumsum(self.tweets_por_usuario)])
+        self.posiciones = np.argsort(codigos, kind='stable')
+
+        etiquetas, sentimiento_por_fila = np.unique(np.asarray(sentimientos), return_inverse=True)
+        self.sentimientos = [str(etiqueta) for etiqueta in etiquetas.tolist()]
+        self.tweets_por_sentimiento = np.bincount(codigos * len(etiquetas) + sentimiento_por_fila.ravel(),
+                                                  minlength=len(usuarios) * len(etiquetas)
+                                                  ).reshape(len(usuarios), len(etiquetas))
+
+    @classmethod
+    def construir(cls, dataset, matriz: Optional[MatrizFrecuencias] = None) -> 'IndiceUsuarios':
+        """
+        Construye el índice de un dataset en una sola pasada.
+
+        Parámetros:
+        - dataset (list | DatasetColumnar): Dataset con las columnas 'user' y 'sentiment'.
+        - matriz (MatrizFrecuencias, opcional): Frecuencias de términos del dataset. Por defecto se
+          usan las asignadas al DatasetColumnar, si las tiene.
+
+        Devuelve:
+        - IndiceUsuarios: Índice de los usuarios del dataset.
+        """
+        if isinstance(dataset, DatasetColumnar):
+            # Los códigos de la tabla de cadenas internadas ya agrupan los tweets por usuario
+            if matriz is None and isinstance(dataset._frecuencias, MatrizFrecuencias):
+                matriz = dataset._frecuencias
+            return cls(dataset._tablas['user'].valores, np.frombuffer(dataset._codigos['user'], dtype=np.uint32),
+                       dataset.etiquetas_sentimiento(), matriz)
+
+        tabla = _TablaCadenas()
+        codigos, sentimientos = array('I'), []
+        for registro in dataset:
+            codigos.append(tabla.codificar(registro['user']))
+            sentimientos.append(registro['sentiment'])
+        return cls(tabla.valores, np.frombuffer(codigos, dtype=np.uint32), _array_etiquetas(sentimientos), matriz)
+
+    def __len__(self) -> int:
+        return self._num_usuarios
+
+    def __contains__(self, usuario: str) -> bool:
+        codigo = self._codigos.get(usuario)
+        return codigo is not None and self.tweets_por_usuario[codigo] > 0
+
+    def tweets(self, usuario: str) -> np.ndarray:
+        """
+        Devuelve las posiciones en el dataset de los tweets de un usuario, en orden creciente.
+        """
+        codigo = self._codigos.get(usuario)
+        if codigo is None:
+            return self.posiciones[:0]
+        return self.posiciones[self.desplazamientos[codigo]:self.desplazamientos[codigo + 1]]
+
+    def num_tweets(self, usuario: str) -> int:
+        """
+        Devuelve el número de tweets de un usuario.
+        """
+        codigo = self._codigos.get(usuario)
+        return 0 if codigo is None else int(self.tweets_por_usuario[codigo])
+
+    def contar_por_sentimiento(self, usuario: str) -> dict:
+        """
+        Devuelve el número de tweets de un usuario en cada sentimiento (cluster).
+        """
+        codigo = self._codigos.get(usuario)
+        if codigo is None:
+            return dict.fromkeys(self.sentimientos, 0)
+        return dict(zip(self.sentimientos, self.tweets_por_sentimiento[codigo].tolist()))
+
+    def balance(self, usuario: str) -> dict:
+        """
+        Devuelve la proporción de tweets de un usuario en cada sentimiento (cluster), o 0 en todos
+        si no tiene tweets.
+        """
+        conteos = self.contar_por_sentimiento(usuario)
+        total = sum(conteos.values())
+        return {sentimiento: conteo / total if total else 0.0 for sentimiento, conteo in conteos.items()}
+
+    def mas_frecuentes(self, usuario: str, k: int = 10) -> list:
+        """
+        Devuelve los k términos más utilizados por un usuario, sumando solo las filas de sus tweets
+        en la matriz de frecuencias.
+
+        Devuelve:
+        - list: Lista de tuplas (término, frecuencia), de mayor a menor frecuencia.
+        """
+        if self.matriz is None:
+            raise ValueError("El índice se construyó sin matriz de frecuencias.")
+        columnas, conteos = self.matriz.sumar_filas(self.tweets(usuario))
+        orden = np.lexsort((columnas, -conteos))[:k]
+        return [(self.matriz.vocabulario[columna], int(conteos[posicion]))
+                for posicion, columna in zip(orden.tolist(), columnas[orden].tolist())]
+
+    def mas_activos(self, k: int = 10) -> list:
+        """
+        Devuelve los k usuarios con más tweets; los empates se resuelven por orden de primera
+        aparición.
+
+        Devuelve:
+        - list: Lista de tuplas (usuario, número de tweets), de mayor a menor número de tweets.
+        """
+        k = min(k, len(self.usuarios))
+        if k <= 0:
+            return []
+        umbral = -np.partition(-self.tweets_por_usuario, k - 1)[k - 1]
+        candidatos = np.flatnonzero(self.tweets_por_usuario >= max(umbral, 1))
+        orden = candidatos[np.lexsort((candidatos, -self.tweets_por_usuario[candidatos]))][:k]
+        return [(self.usuarios[codigo], int(self.tweets_por_usuario[codigo])) for codigo in orden.tolist()]
+
+
+# Marca de fin de cada cola del flujo de procesado
+_FIN_FLUJO = object()
+
+
+def _poner_en_cola(cola: queue.Queue, elemento, detener: threading.Event) -> bool:
+    """
+    Añade un elemento a una cola acotada, esperando mientras está llena (contrapresión) salvo que
+    se pida detener el flujo.
+
+    Devuelve:
+    - bool: True si se añadió el elemento y False si se detuvo el flujo antes.
+    """
+    while not detener.is_set():
+        try:
+            cola.put(elemento, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _obtener_de_cola(cola: queue.Queue, detener: threading.Event) -> Iterator:
+    """
+    Devuelve los elementos de una cola hasta su marca de fin o hasta que se pida detener el flujo.
+    """
+    while True:
+        try:
+            elemento = cola.get(timeout=0.1)
+        except queue.Empty:
+            if detener.is_set():
+                return
+            continue
+        if elemento is _FIN_FLUJO:
+            return
+        yield elemento
+
+
+def _etapa_flujo(funcion, salida: queue.Queue, errores: list, detener: threading.Event) -> threading.Thread:
+    """
+    Crea el hilo de una etapa del flujo, que guarda la excepción que se produzca para relanzarla en
+    el hilo principal, detiene en ese caso las demás etapas y, al terminar, marca el final de su
+    cola de salida.
+    """
+    def ejecutar():
+        try:
+            funcion()
+        except BaseException as error:
+            errores.append(error)
+            detener.set()
+        _poner_en_cola(salida, _FIN_FLUJO, detener)
+
+    return threading.Thread(target=ejecutar, daemon=True)
+
+
+def procesar_en_flujo(fichero: str, procesos: Optional[int] = 1, tamano_bloque: int = 10000, tamano_cola: int = 4,
+                      stopwords: Optional[Iterable[str]] = None, miembro: Optional[str] = None) -> tuple:
+    """
+    Lee, normaliza y cuenta un archivo CSV o ZIP en un flujo de tres etapas que se ejecutan a la
+    vez, comunicadas por colas acotadas: un hilo lee bloques de registros, otro los normaliza
+    (repartiéndolos entre procesos si se indica) y el hilo principal actualiza los conteos y el
+    perfil de calidad. Cuando una cola está llena, la etapa anterior espera, de modo que la memoria
+    máxima depende del tamaño de las colas y de los bloques, no del tamaño del dataset.
+
+    El resultado es el mismo que cargar el archivo completo, preprocesarlo con preprocesar_dataset
+    y aplicar construir_indice_por_cluster y perfilar_calidad al resultado.
+
+    Parámetros:
+    - fichero (str): Ruta del archivo CSV o ZIP.
+    - procesos (int, opcional): Número de procesos que normalizan los textos. Con 1 se normalizan
+      en el hilo de la etapa; con None se utiliza un proceso por núcleo.
+    - tamano_bloque (int): Número de registros de cada bloque.
+    - tamano_cola (int): Número máximo de bloques en espera en cada cola.
+    - stopwords (Iterable[str], opcional): Stopwords a eliminar. Por defecto STOPWORDS.
+    - miembro (str, opcional): Nombre del CSV dentro del ZIP a leer.
+
+    Devuelve:
+    - tuple: AcumuladorFrecuencias con los conteos de los textos normalizados y PerfilCalidad
+      de los registros normalizados.
+    """
+    if tamano_bloque < 1 or tamano_cola < 1:
+        raise ValueError("El tamaño de bloque y el de las colas deben ser mayores que cero")
+    if stopwords is not None:
+        stopwords = frozenset(stopwords)
+    leidos, normalizados = queue.Queue(tamano_cola), queue.Queue(tamano_cola)
+    errores, detener = [], threading.Event()
+
+    def leer():
+        for bloque in _dividir_en_bloques(iterar_registros(fichero, miembro), tamano_bloque):
+            if not _poner_en_cola(leidos, bloque, detener):
+                return
+
+    def normalizar():
+        if procesos == 1:
+            for bloque in _obtener_de_cola(leidos, detener):
+                textos = normalizar_textos([registro['text'] for registro in bloque], stopwords)
+                if not _poner_en_cola(normalizados, (bloque, textos), detener):
+                    return
+            return
+
+        # Como mucho dos bloques en curso por proceso, que se entregan en el orden de lectura
+        limite = 2 * (procesos or os.cpu_count() or 1)
+        with multiprocessing.Pool(procesos, initializer=_inicializar_trabajador, initargs=(stopwords,)) as pool:
+            pendientes = deque()
+            for bloque in itertools.chain(_obtener_de_cola(leidos, detener), [None]):
+                if bloque is not None:
+                    textos = [registro['text'] for registro in bloque]
+                    pendientes.append((bloque, pool.apply_async(_normalizar_bloque, (textos,))))
+                while pendientes and (bloque is None or len(pendientes) >= limite):
+                    bloque_listo, resultado = pendientes.popleft()
+                    if not _poner_en_cola(normalizados, (bloque_listo, resultado.get().split("\n")), detener):
+                        return
+
+    hilos = [_etapa_flujo(leer, leidos, errores, detener), _etapa_flujo(normalizar, normalizados, errores, detener)]
+    for hilo in hilos:
+        hilo.start()
+
+    acumulador, perfil = AcumuladorFrecuencias(), PerfilCalidad()
+    try:
+        for bloque, textos in _obtener_de_cola(normalizados, detener):
+            for registro, texto in zip(bloque, textos):
+                registro['text'] = texto
+            perfil._registrar_bloque([registro['sentiment'] for registro in bloque],
+                                     [registro['id'] for registro in bloque], textos)
+            acumulador.actualizar(bloque)
+    finally:
+        # Si el recuento falla o se interrumpe, las demás etapas dejan de esperar en las colas
+        detener.set()
+        for hilo in hilos:
+            hilo.join()
+
+    if errores:
+        raise errores[0]
+    return acumulador, perfil
+
+
+def expandir_fragmentos(fragmentos) -> list:
+    """
+    Expande una lista de rutas o patrones glob de fragmentos (por ejemplo 'data/2009-04-*.zip').
+
+    Parámetros:
+    - fragmentos (str | Iterable[str]): Ruta o patrón, o lista de rutas y patrones.
+
+    Devuelve:
+    - list: Rutas de los fragmentos, en el orden indicado y, dentro de cada patrón, ordenadas
+      alfabéticamente.
+    """
+    if isinstance(fragmentos, (str, os.PathLike)):
+        fragmentos = [fragmentos]
+    rutas = []
+    for fragmento in map(os.fspath, fragmentos):
+        if glob.has_magic(fragmento):
+            coincidencias = sorted(glob.glob(fragmento))
+            if not coincidencias:
+                raise FileNotFoundError(f"Ningún archivo coincide con el patrón {fragmento}")
+            rutas.extend(coincidencias)
+        else:
+            rutas.append(fragmento)
+    return rutas
+
+
+def _procesar_fragmento(tarea: tuple) -> tuple:
+    """
+    Procesa un fragmento en un proceso trabajador y devuelve sus resultados parciales.
+    """
+    fichero, tamano_bloque, stopwords = tarea
+    return procesar_en_flujo(fichero, 1, tamano_bloque, stopwords=stopwords)
+
+
+def procesar_fragmentos(fragmentos, procesos: Optional[int] = None, tamano_bloque: int = 10000,
+                        stopwords: Optional[Iterable[str]] = None) -> tuple:
+    """
+    Procesa varios fragmentos del dataset (archivos CSV o ZIP) como un map-reduce: cada proceso
+    trabajador lee, normaliza y cuenta un fragmento completo con procesar_en_flujo, y los conteos
+    parciales y los perfiles de calidad se combinan en el orden de los fragmentos a medida que
+    terminan.
+
+    Como la fusión de AcumuladorFrecuencias y PerfilCalidad es asociativa y conserva el orden de
+    primera aparición de los términos, el resultado es idéntico al de procesar un único archivo
+    con la concatenación de los fragmentos, incluidos los identificadores y textos repetidos en
+    fragmentos distintos.
+
+    Parámetros:
+    - fragmentos (str | Iterable[str]): Ruta o patrón glob, o lista de rutas y patrones.
+    - procesos (int, opcional): Número de procesos trabajadores. Con 1 los fragmentos se procesan
+      en el proceso actual; con None se utiliza un proceso por núcleo.
+    - tamano_bloque (int): Número de registros de cada bloque dentro de un fragmento.
+    - stopwords (Iterable[str], opcional): Stopwords a eliminar. Por defecto STOPWORDS.
+
+    Devuelve:
+    - tuple: AcumuladorFrecuencias y PerfilCalidad de todos los fragmentos.
+    """
+    rutas = expandir_fragmentos(fragmentos)
+    if stopwords is not None:
+        stopwords = frozenset(stopwords)
+    tareas = [(ruta, tamano_bloque, stopwords) for ruta in rutas]
+
+    acumulador, perfil = AcumuladorFrecuencias(), PerfilCalidad()
+    with contextlib.ExitStack() as pila:
+        if procesos == 1 or len(tareas) <= 1:
+            parciales = map(_procesar_fragmento, tareas)
+        else:
+            pool = pila.enter_context(multiprocessing.Pool(min(procesos or os.cpu_count() or 1, len(tareas))))
+            # imap entrega los resultados en el orden de los fragmentos
+            parciales = pool.imap(_procesar_fragmento, tareas)
+        for acumulador_fragmento, perfil_fragmento in parciales:
+            acumulador._sumar(acumulador_fragmento)
+            perfil._sumar(perfil_fragmento)
+    return acumulador, perfil
+
+
+def _puntuar_log_odds(sumas: np.ndarray, prior: float) -> np.ndarray:
+    """
+    Calcula, para cada grupo frente al resto, el z-score del logaritmo del cociente de
+    probabilidades (log-odds ratio) de cada término con un prior de Dirichlet informativo
+    proporcional a la frecuencia global del término (Monroe et al., 2008).
+    """
+    totales_termino = sumas.sum(axis=0)
+    alfa = prior * totales_termino / max(totales_termino.sum(), 1)
+    alfa_total = alfa.sum()
+    resto = totales_termino - sumas
+    totales_grupo = sumas.sum(axis=1, keepdims=True)
+    totales_resto = totales_termino.sum() - totales_grupo
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_odds_grupo = np.log(sumas + alfa) - np.log(totales_grupo + alfa_total - sumas - alfa)
+        log_odds_resto = np.log(resto + alfa) - np.log(totales_resto + alfa_total - resto - alfa)
+        varianza = 1 / (sumas + alfa) + 1 / (resto + alfa)
+        puntuaciones = (log_odds_grupo - log_odds_resto) / np.sqrt(varianza)
+    return np.nan_to_num(puntuaciones, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def _puntuar_tfidf(sumas: np.ndarray) -> np.ndarray:
+    """
+    Calcula el TF-IDF de cada término tratando cada grupo como un documento, con el IDF suavizado
+    log((1 + grupos) / (1 + grupos con el término)) + 1.
+    """
+    totales_grupo = np.maximum(sumas.sum(axis=1, keepdims=True), 1)
+    grupos_con_termino = (sumas > 0).sum(axis=0)
+    idf = np.log((1 + len(sumas)) / (1 + grupos_con_termino)) + 1
+    return sumas / totales_grupo * idf
+
+
+def analizar_terminos_por_cluster(dataset, matriz: Optional[MatrizFrecuencias] = None, k: int = 20,
+                                  metodo: str = 'log-odds', por_documento: bool = False,
+                                  prior: float = 1000.0) -> dict:
+    """
+    Analiza los términos de cada cluster a partir de la matriz de frecuencias, con operaciones
+    vectorizadas sobre la matriz densa (clusters x vocabulario) de conteos por cluster: términos
+    más frecuentes de cada cluster, términos frecuentes en todos ellos y términos distintivos.
+
+    Parámetros:
+    - dataset (list | DatasetColumnar): Dataset preprocesado, del que se toma el cluster ('sentiment')
+      de cada tweet.
+    - matriz (MatrizFrecuencias, opcional): Frecuencias de términos del dataset. Por defecto se usan
+      las asignadas al dataset o, si no tiene, se calculan de 'text'.
+    - k (int): Número de términos de cada lista.
+    - metodo (str): Puntuación de los términos distintivos: 'log-odds' (z-score del log-odds ratio
+      de cada cluster frente al resto) o 'tfidf' (cada cluster como un documento).
+    - por_documento (bool): Si es True, las frecuencias son el número de tweets que contienen cada
+      término, como en generar_histograma_por_cluster.
+    - prior (float): Tamaño del prior de Dirichlet del método 'log-odds'.
+
+    Devuelve:
+    - dict: Diccionario con las claves:
+      - 'clusters': Lista ordenada de clusters.
+      - 'mas_frecuentes': Para cada cluster, lista de tuplas (término, frecuencia) de los k términos
+        más frecuentes.
+      - 'compartidos': Términos que están entre los k más frecuentes de todos los clusters, ordenados
+        por su frecuencia total.
+      - 'distintivos': Para cada cluster, lista de tuplas (término, puntuación) de los k términos con
+        mayor puntuación.
+    """
+    if metodo not in ('log-odds', 'tfidf'):
+        raise ValueError(f"Método no válido: {metodo!r}. Usa 'log-odds' o 'tfidf'.")
+    etiquetas = _etiquetas_sentimiento(dataset)
+    if isinstance(dataset, DatasetColumnar) and matriz is None and isinstance(dataset._frecuencias, MatrizFrecuencias):
+        matriz = dataset._frecuencias
+    if matriz is None:
+        matriz = construir_matriz_frecuencias(dataset)
+
+    grupos, sumas = matriz.sumar_por_grupo(etiquetas, por_documento)
+    clusters = [str(grupo) for grupo in grupos]
+    puntuaciones = _puntuar_log_odds(sumas, prior) if metodo == 'log-odds' else _puntuar_tfidf(sumas)
+
+    mas_frecuentes = {cluster: matriz.mas_frecuentes(k, fila) for cluster, fila in zip(clusters, sumas)}
+    distintivos = {}
+    for cluster, fila, conteos in zip(clusters, puntuaciones, sumas):
+        # Solo se consideran los términos que aparecen en el cluster
+        candidatos = np.flatnonzero(conteos > 0)
+        orden = candidatos[np.lexsort((candidatos, -fila[candidatos]))][:k]
+        distintivos[cluster] = [(matriz.vocabulario[columna], float(fila[columna])) for columna in orden]
+
+    compartidos = set.intersection(*({termino for termino, _ in terminos} for terminos in mas_frecuentes.values())) \
+        if mas_frecuentes else set()
+    columnas = sorted((matriz.indice_terminos[termino] for termino in compartidos),
+                      key=lambda columna: (-sumas[:, columna].sum(), columna))
+
+    return {
+        'clusters': clusters,
+        'mas_frecuentes': mas_frecuentes,
+        'compartidos': [matriz.vocabulario[columna] for columna in columnas],
+        'distintivos': distintivos,
+    }
+
+
 def agregar_frecuencias(dataset: List[dict]) -> None:
     """
     Agrega una nueva variable 'frecuencias' a cada registro del dataset,
     con su diccionario de frecuencias de términos asociado.
 
+    En un DatasetColumnar las frecuencias se guardan como una MatrizFrecuencias y el diccionario
+    de cada registro se genera al consultarlo.
+
     Parámetros:
     - dataset (List[dict]): Dataset representado como una lista de diccionarios.
     """
+    if isinstance(dataset, DatasetColumnar):
+        dataset.establecer_frecuencias(construir_matriz_frecuencias(dataset))
+        return dataset
+
     frecuencias, _ = obtener_frecuencias_y_vocabulario(dataset)
     for data, frecuencia in zip(dataset, frecuencias):
         data['frecuencias'] = frecuencia
@@ -168,21 +2465,796 @@ def guardar_dataset_csv(dataset, csv_file):
         writer.writerows(dataset)
 
 
+# Cabecera que identifica los archivos del formato binario del dataset
+_MAGIA_BINARIO = b'TWEETS\x00\x01'
+_CABECERA_SECCION = struct.Struct('<32s8sQ')
+
+
+class _EscritorSecciones:
+    """
+    Escribe un archivo binario formado por secciones consecutivas. Cada sección tiene una cabecera
+    con su nombre, el tipo de NumPy de sus elementos y su longitud en bytes, seguida de los datos.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.file.write(_MAGIA_BINARIO)
+
+    def seccion(self, nombre: str, dtype: str, datos) -> None:
+        """Escribe una sección completa a partir de un objeto con interfaz de buffer."""
+        datos = memoryview(datos).cast('B')
+        self.file.write(_CABECERA_SECCION.pack(nombre.encode('ascii'), dtype.encode('ascii'), len(datos)))
+        self.file.write(datos)
+
+    def seccion_por_bloques(self, nombre: str, dtype: str, bloques: Iterable[bytes]) -> None:
+        """
+        Escribe una sección bloque a bloque, sin reunir todos los datos en memoria. La longitud se
+        escribe al final, volviendo a la cabecera de la sección.
+        """
+        inicio = self.file.tell()
+        self.file.write(_CABECERA_SECCION.pack(nombre.encode('ascii'), dtype.encode('ascii'), 0))
+        longitud = 0
+        for bloque in bloques:
+            self.file.write(bloque)
+            longitud += len(bloque)
+        fin = self.file.tell()
+        self.file.seek(inicio)
+        self.file.write(_CABECERA_SECCION.pack(nombre.encode('ascii'), dtype.encode('ascii'), longitud))
+        self.file.seek(fin)
+
+    def cadenas(self, nombre: str, valores: Iterable[str], tamano_bloque: int) -> None:
+        """
+        Escribe una lista de cadenas como dos secciones: el texto de todas ellas concatenado en
+        UTF-8 y las posiciones (en caracteres) donde empieza y acaba cada una.
+        """
+        desplazamientos = array('q', [0])
+
+        def bloques_utf8():
+            for bloque in _dividir_en_bloques(valores, tamano_bloque):
+                for valor in bloque:
+                    desplazamientos.append(desplazamientos[-1] + len(valor))
+                yield ''.join(bloque).encode('utf-8')
+
+        self.seccion_por_bloques(nombre + '.utf8', '|u1', bloques_utf8())
+        self.seccion(nombre + '.desplazamientos', '<i8', np.ascontiguousarray(desplazamientos, dtype='<i8'))
+
+
+def _leer_secciones(ruta: str) -> dict:
+    """
+    Lee todas las secciones de un archivo binario escrito con _EscritorSecciones.
+
+    Devuelve:
+    - dict: Diccionario con un array de NumPy por sección.
+    """
+    secciones = {}
+    with open(ruta, 'rb') as file:
+        if file.read(len(_MAGIA_BINARIO)) != _MAGIA_BINARIO:
+            raise ValueError(f"El archivo {ruta} no tiene el formato binario del dataset")
+        while True:
+            cabecera = file.read(_CABECERA_SECCION.size)
+            if not cabecera:
+                break
+            if len(cabecera) != _CABECERA_SECCION.size:
+                raise ValueError(f"El archivo {ruta} está truncado")
+            nombre, dtype, longitud = _CABECERA_SECCION.unpack(cabecera)
+            datos = file.read(longitud)
+            if len(datos) != longitud:
+                raise ValueError(f"El archivo {ruta} está truncado")
+            nombre = nombre.rstrip(b'\x00').decode('ascii')
+            secciones[nombre] = np.frombuffer(datos, dtype=dtype.rstrip(b'\x00').decode('ascii'))
+    return secciones
+
+
+def _cadenas_desde_secciones(secciones: dict, nombre: str) -> list:
+    """
+    Reconstruye una lista de cadenas escrita con _EscritorSecciones.cadenas, decodificando el
+    texto de una sola vez y cortándolo por las posiciones guardadas.
+    """
+    texto = secciones[nombre + '.utf8'].tobytes().decode('utf-8')
+    desplazamientos = secciones[nombre + '.desplazamientos'].tolist()
+    return [texto[inicio:fin] for inicio, fin in zip(desplazamientos, desplazamientos[1:])]
+
+
+def guardar_dataset_binario(dataset, ruta: str, matriz: Optional[MatrizFrecuencias] = None,
+                            tamano_bloque: int = 100000) -> None:
+    """
+    Guarda el dataset y sus frecuencias de términos en un formato binario compacto por columnas,
+    alternativo a guardar_dataset_csv.
+
+    Las columnas numéricas se guardan como arrays de enteros, 'date', 'query' y 'user' como tablas
+    de valores distintos más un código por registro, y las frecuencias como una matriz CSR con el
+    vocabulario guardado una sola vez. Los textos se escriben por bloques.
+
+    Parámetros:
+    - dataset (DatasetColumnar | list): Dataset preprocesado.
+    - ruta (str): Ruta del archivo a generar.
+    - matriz (MatrizFrecuencias, opcional): Frecuencias de términos del dataset. Por defecto se usa
+      la columna 'frecuencias' del dataset, si la tiene, y si no se calculan de 'text'. Los
+      registros sin 'frecuencias' (None) también se calculan de 'text'.
+    - tamano_bloque (int): Número de registros que se codifican y escriben de una vez.
+    """
+    if not isinstance(dataset, DatasetColumnar):
+        dataset = DatasetColumnar(dataset)
+    if matriz is None:
+        if isinstance(dataset._frecuencias, MatrizFrecuencias):
+            matriz = dataset._frecuencias
+        elif dataset._frecuencias is not None:
+            matriz = matriz_desde_diccionarios(
+                Counter(texto.split()) if frecuencias is None else frecuencias
+                for frecuencias, texto in zip(dataset._frecuencias, dataset._text))
+        else:
+            matriz = construir_matriz_frecuencias(dataset)
+    if len(matriz) != len(dataset):
+        raise ValueError("La matriz de frecuencias no tiene una fila por registro")
+
+    with open(ruta, 'wb') as file:
+        escritor = _EscritorSecciones(file)
+        escritor.seccion('sentiment', '|i1', dataset._sentiment)
+        escritor.seccion('id', '<i8', np.ascontiguousarray(dataset._id, dtype='<i8'))
+        for columna, excepciones in dataset._excepciones.items():
+            if excepciones:
+                escritor.seccion(columna + '.extra.posiciones', '<i8',
+                                 np.fromiter(excepciones, dtype='<i8', count=len(excepciones)))
+                escritor.cadenas(columna + '.extra', list(excepciones.values()), tamano_bloque)
+        for columna in DatasetColumnar._COLUMNAS_INTERNADAS:
+            escritor.cadenas(columna, dataset._tablas[columna].valores, tamano_bloque)
+            escritor.seccion(columna + '.codigos', '<u4', np.ascontiguousarray(dataset._codigos[columna], dtype='<u4'))
+        escritor.cadenas('text', dataset._text, tamano_bloque)
+        escritor.cadenas('vocabulario', matriz.vocabulario, tamano_bloque)
+        escritor.seccion('indptr', '<i8', np.ascontiguousarray(matriz.indptr, dtype='<i8'))
+        escritor.seccion('indices', '<i4', np.ascontiguousarray(matriz.indices, dtype='<i4'))
+        escritor.seccion('conteos', '<i4', np.ascontiguousarray(matriz.conteos, dtype='<i4'))
+
+
+def cargar_dataset_binario(ruta: str) -> tuple:
+    """
+    Carga un dataset guardado con guardar_dataset_binario, sin analizar los registros uno a uno.
+
+    Parámetros:
+    - ruta (str): Ruta del archivo binario.
+
+    Devuelve:
+    - tuple: Tupla con el DatasetColumnar, con la columna 'frecuencias' asignada, y su MatrizFrecuencias.
+    """
+    secciones = _leer_secciones(ruta)
+
+    dataset = DatasetColumnar()
+    dataset._sentiment.frombytes(secciones['sentiment'].astype('=i1').tobytes())
+    dataset._id.frombytes(secciones['id'].astype('=i8').tobytes())
+    for columna in DatasetColumnar._COLUMNAS_INTERNADAS:
+        dataset._tablas[columna] = _TablaCadenas.desde_valores(_cadenas_desde_secciones(secciones, columna))
+        dataset._codigos[columna].frombytes(secciones[columna + '.codigos'].astype('=u4').tobytes())
+    dataset._text = _cadenas_desde_secciones(secciones, 'text')
+    for columna, excepciones in dataset._excepciones.items():
+        if columna + '.extra.posiciones' in secciones:
+            excepciones.update(zip(secciones[columna + '.extra.posiciones'].tolist(),
+                                   _cadenas_desde_secciones(secciones, columna + '.extra')))
+    # Los sentimientos enteros se cuentan con NumPy y los guardados aparte, uno a uno
+    enteros = np.ones(len(dataset), dtype=bool)
+    enteros[list(dataset._excepciones['sentiment'])] = False
+    sentimientos, conteos = np.unique(secciones['sentiment'][enteros], return_counts=True)
+    dataset._tweets_por_sentimiento.update({str(sentimiento): conteo
+                                            for sentimiento, conteo in zip(sentimientos.tolist(), conteos.tolist())})
+    dataset._tweets_por_sentimiento.update(dataset._excepciones['sentiment'].values())
+
+    matriz = MatrizFrecuencias(secciones['indptr'], secciones['indices'], secciones['conteos'],
+                               _cadenas_desde_secciones(secciones, 'vocabulario'))
+    dataset.establecer_frecuencias(matriz)
+    return dataset, matriz
+
+
+class CorpusTokens:
+    """
+    Corpus de tweets preprocesados codificado como identificadores enteros de términos.
+
+    Los términos de todos los tweets se guardan seguidos en un único array plano ('tokens'), el
+    tweet i ocupa las posiciones desplazamientos[i]:desplazamientos[i + 1] y cada identificador
+    es la posición del término en el vocabulario ordenado. El sentimiento de cada tweet se guarda
+    igual, como su posición en la lista ordenada de etiquetas. Los arrays se guardan como archivos
+    .npy y se abren mapeados en memoria, de modo que recargar el corpus no crea ninguna cadena por
+    tweet y varios procesos de la misma máquina comparten las mismas páginas.
+    """
+
+    ARCHIVO_TOKENS = 'tokens.npy'
+    ARCHIVO_DESPLAZAMIENTOS = 'desplazamientos.npy'
+    ARCHIVO_SENTIMIENTOS = 'sentiment.npy'
+    ARCHIVO_ETIQUETAS = 'etiquetas.txt'
+    ARCHIVO_VOCABULARIO = 'vocabulario.txt'
+
+    def __init__(self, tokens: np.ndarray, desplazamientos: np.ndarray, sentimientos: np.ndarray,
+                 vocabulario: list, etiquetas: list):
+        """
+        Parámetros:
+        - tokens (np.ndarray): Identificadores de los términos de todos los tweets, seguidos.
+        - desplazamientos (np.ndarray): Posición en tokens donde empieza cada tweet, más el total.
+        - sentimientos (np.ndarray): Código del sentimiento de cada tweet, su posición en etiquetas.
+        - vocabulario (list): Términos ordenados.
+        - etiquetas (list): Etiquetas de sentimiento (cluster) distintas, ordenadas.
+        """
+        self.tokens = tokens
+        self.desplazamientos = desplazamientos
+        self.sentimientos = sentimientos
+        self.vocabulario = vocabulario
+        self.etiquetas = etiquetas
+
+    @classmethod
+    def abrir(cls, directorio: str) -> 'CorpusTokens':
+        """
+        Abre un corpus guardado con guardar_corpus_tokens, mapeando sus arrays en memoria.
+
+        Parámetros:
+        - directorio (str): Carpeta que contiene los archivos del corpus.
+
+        Devuelve:
+        - CorpusTokens: Corpus con los arrays en modo de solo lectura.
+        """
+        with open(os.path.join(directorio, cls.ARCHIVO_VOCABULARIO), 'r', encoding='utf-8') as file:
+            vocabulario = file.read().split('\n')[:-1]
+        with open(os.path.join(directorio, cls.ARCHIVO_ETIQUETAS), 'r', encoding='utf-8') as file:
+            etiquetas = file.read().split('\n')[:-1]
+        return cls(np.load(os.path.join(directorio, cls.ARCHIVO_TOKENS), mmap_mode='r'),
+                   np.load(os.path.join(directorio, cls.ARCHIVO_DESPLAZAMIENTOS), mmap_mode='r'),
+                   np.load(os.path.join(directorio, cls.ARCHIVO_SENTIMIENTOS), mmap_mode='r'),
+                   vocabulario, etiquetas)
+
+    def __len__(self) -> int:
+        return len(self.desplazamientos) - 1
+
+    def tokens_tweet(self, indice: int) -> np.ndarray:
+        """Devuelve los identificadores de los términos de un tweet, sin copiarlos."""
+        return self.tokens[self.desplazamientos[indice]:self.desplazamientos[indice + 1]]
+
+    def sentimiento(self, indice: int) -> str:
+        """Devuelve la etiqueta de sentimiento (cluster) de un tweet."""
+        return self.etiquetas[self.sentimientos[indice]]
+
+    def texto(self, indice: int) -> str:
+        """Reconstruye el texto preprocesado de un tweet."""
+        return ' '.join(self.vocabulario[token] for token in self.tokens_tweet(indice).tolist())
+
+    def frecuencias_totales(self) -> np.ndarray:
+        """Devuelve el número total de apariciones de cada término del vocabulario."""
+        return np.bincount(self.tokens, minlength=len(self.vocabulario))
+
+
+def guardar_corpus_tokens(dataset, directorio: str) -> CorpusTokens:
+    """
+    Codifica los textos preprocesados del dataset como identificadores de términos y los guarda
+    como un CorpusTokens mapeable en memoria.
+
+    Parámetros:
+    - dataset (list | DatasetColumnar): Dataset con los textos ya preprocesados.
+    - directorio (str): Carpeta donde se guardan los archivos del corpus.
+
+    Devuelve:
+    - CorpusTokens: El corpus guardado, abierto con sus arrays mapeados en memoria.
+    """
+    identificadores_provisionales = {}
+    tokens = array('i')
+    desplazamientos = array('q', [0])
+    sentimientos = []
+
+    for tweet in dataset:
+        for palabra in tweet['text'].split():
+            identificador = identificadores_provisionales.get(palabra)
+            if identificador is None:
+                identificador = identificadores_provisionales[palabra] = len(identificadores_provisionales)
+            tokens.append(identificador)
+        desplazamientos.append(len(tokens))
+        sentimientos.append(tweet['sentiment'])
+
+    # Los identificadores se asignan por orden de aparición y se reordenan según el vocabulario ordenado
+    vocabulario = sorted(identificadores_provisionales)
+    posiciones = {termino: identificador for identificador, termino in enumerate(vocabulario)}
+    reordenacion = np.fromiter((posiciones[termino] for termino in identificadores_provisionales),
+                               dtype=np.int32, count=len(identificadores_provisionales))
+
+    os.makedirs(directorio, exist_ok=True)
+    np.save(os.path.join(directorio, CorpusTokens.ARCHIVO_TOKENS),
+            reordenacion[np.frombuffer(tokens, dtype=np.int32)])
+    np.save(os.path.join(directorio, CorpusTokens.ARCHIVO_DESPLAZAMIENTOS),
+            np.frombuffer(desplazamientos, dtype=np.int64))
+    etiquetas, codigos = _codificar_etiquetas(_array_etiquetas(sentimientos))
+    np.save(os.path.join(directorio, CorpusTokens.ARCHIVO_SENTIMIENTOS), codigos)
+    with open(os.path.join(directorio, CorpusTokens.ARCHIVO_ETIQUETAS), 'w', encoding='utf-8') as file:
+        file.writelines(etiqueta + '\n' for etiqueta in etiquetas)
+    with open(os.path.join(directorio, CorpusTokens.ARCHIVO_VOCABULARIO), 'w', encoding='utf-8') as file:
+        file.writelines(termino + '\n' for termino in vocabulario)
+
+    return CorpusTokens.abrir(directorio)
+
+
+def _codificar_varint(valores: np.ndarray) -> tuple:
+    """
+    Codifica enteros no negativos como varints (LEB128): 7 bits por byte, con el bit alto a 1 en
+    todos los bytes de un valor salvo el último. La codificación se hace con numpy, un paso por
+    byte de la representación más larga.
+
+    Devuelve:
+    - tuple: Array uint8 con los valores codificados seguidos y número de bytes de cada valor.
+    """
+    valores = np.asarray(valores, dtype=np.uint64)
+    num_bytes = np.ones(len(valores), dtype=np.int64)
+    resto = valores >> np.uint64(7)
+    while resto.any():
+        num_bytes += resto > 0
+        resto >>= np.uint64(7)
+
+    datos = np.empty(int(num_bytes.sum()), dtype=np.uint8)
+    inicios = np.cumsum(num_bytes) - num_bytes
+    for byte in range(int(num_bytes.max()) if len(valores) else 0):
+        con_byte = num_bytes > byte
+        septeto = (valores[con_byte] >> np.uint64(7 * byte)) & np.uint64(0x7F)
+        continua = (num_bytes[con_byte] > byte + 1).astype(np.uint64) << np.uint64(7)
+        datos[inicios[con_byte] + byte] = septeto | continua
+    return datos, num_bytes
+
+
+def _decodificar_varint(datos: np.ndarray) -> np.ndarray:
+    """
+    Decodifica una secuencia de varints escrita con _codificar_varint, sin recorrer los bytes uno
+    a uno en Python.
+    """
+    if len(datos) == 0:
+        return np.empty(0, dtype=np.int64)
+    ultimo_byte = datos < 0x80
+    inicios = np.flatnonzero(np.concatenate([[True], ultimo_byte[:-1]]))
+    posicion = np.arange(len(datos)) - np.repeat(inicios, np.diff(np.append(inicios, len(datos))))
+    septetos = (datos & 0x7F).astype(np.int64) << (7 * posicion)
+    return np.add.reduceat(septetos, inicios)
+
+
+class IndiceInvertido:
+    """
+    Índice invertido de los términos de los tweets preprocesados.
+
+    Para cada término guarda la lista de posiciones de los tweets que lo contienen, en orden
+    creciente y comprimida como las diferencias entre posiciones consecutivas codificadas en
+    varints, todas seguidas en un único array de bytes. También guarda el sentimiento de cada tweet,
+    como código de una tabla de etiquetas, y el número de tweets de cada sentimiento que contienen
+    cada término. El índice se construye a partir de la matriz de frecuencias ya calculada y admite
+    añadir nuevos tweets al final.
+    """
+
+    def __init__(self):
+        self.vocabulario = []
+        self.terminos = {}
+        self._postings = np.empty(0, dtype=np.uint8)
+        self._desplazamientos = np.zeros(1, dtype=np.int64)
+        self._ultimo = np.empty(0, dtype=np.int64)
+        # Etiqueta de sentimiento de cada código, en orden de aparición, y código de cada tweet
+        self._etiquetas = _TablaCadenas()
+        self._sentimientos = np.empty(0, dtype=np.uint8)
+        self._documentales = {}
+
+    @classmethod
+    def construir(cls, dataset, matriz: Optional[MatrizFrecuencias] = None) -> 'IndiceInvertido':
+        """
+        Construye el índice de un dataset preprocesado.
+
+        Parámetros:
+        - dataset (list | DatasetColumnar): Dataset con los textos ya preprocesados.
+        - matriz (MatrizFrecuencias, opcional): Frecuencias de términos del dataset. Por defecto se
+          usan las asignadas al dataset o, si no tiene, se calculan de 'text'.
+        """
+        return cls().actualizar(dataset, matriz)
+
+    def __len__(self) -> int:
+        return len(self._sentimientos)
+
+    def actualizar(self, dataset, matriz: Optional[MatrizFrecuencias] = None) -> 'IndiceInvertido':
+        """
+        Añade al índice los tweets de un dataset, a continuación de los ya indexados.
+
+        Parámetros:
+        - dataset (list | DatasetColumnar): Tweets a añadir, con los textos ya preprocesados.
+        - matriz (MatrizFrecuencias, opcional): Frecuencias de términos de esos tweets.
+
+        Devuelve:
+        - IndiceInvertido: El propio índice, para poder encadenar llamadas.
+        """
+        etiquetas, codigos = _codificar_etiquetas(_etiquetas_sentimiento(dataset))
+        if isinstance(dataset, DatasetColumnar):
+            if matriz is None and isinstance(dataset._frecuencias, MatrizFrecuencias):
+                matriz = dataset._frecuencias
+        if matriz is None:
+            matriz = construir_matriz_frecuencias(dataset)
+        if len(matriz) != len(codigos):
+            raise ValueError("La matriz de frecuencias no tiene una fila por registro")
+        # Códigos del lote traducidos a los de la tabla de etiquetas del índice
+        traduccion = np.array([self._etiquetas.codificar(etiqueta) for etiqueta in etiquetas], dtype=np.int64)
+        sentimientos = traduccion[codigos].astype(np.min_scalar_type(max(len(self._etiquetas) - 1, 0)))
+
+        # Columnas de la matriz traducidas a términos del índice, que amplían su vocabulario
+        for termino in matriz.vocabulario:
+            if termino not in self.terminos:
+                self.terminos[termino] = len(self.vocabulario)
+                self.vocabulario.append(termino)
+        num_terminos = len(self.vocabulario)
+        traduccion = np.fromiter((self.terminos[termino] for termino in matriz.vocabulario), dtype=np.int64,
+                                 count=len(matriz.vocabulario))
+        terminos = traduccion[np.asarray(matriz.indices, dtype=np.int64)]
+        documentos = np.repeat(np.arange(len(self), len(self) + len(matriz), dtype=np.int64),
+                               np.diff(np.asarray(matriz.indptr, dtype=np.int64)))
+
+        # Cada fila de la matriz contiene cada término una sola vez, así que contar los pares
+        # (término, tweet) de cada sentimiento da su frecuencia documental
+        codigos_pares = np.repeat(codigos, np.diff(np.asarray(matriz.indptr, dtype=np.int64)))
+        for codigo, etiqueta in enumerate(etiquetas):
+            conteos = np.bincount(terminos[codigos_pares == codigo], minlength=num_terminos)
+            anteriores = self._documentales.get(etiqueta, np.zeros(0, dtype=np.int64))
+            conteos[:len(anteriores)] += anteriores
+            self._documentales[etiqueta] = conteos
+        for sentimiento, conteos in self._documentales.items():
+            if len(conteos) < num_terminos:
+                self._documentales[sentimiento] = np.concatenate(
+                    [conteos, np.zeros(num_terminos - len(conteos), dtype=np.int64)])
+
+        # Diferencias entre tweets consecutivos de cada término; la primera se toma respecto al
+        # último tweet ya indexado del término (o -1), de modo que todas son positivas
+        orden = np.argsort(terminos, kind='stable')
+        terminos, documentos = terminos[orden], documentos[orden]
+        ultimo = np.concatenate([self._ultimo, np.full(num_terminos - len(self._ultimo), -1, dtype=np.int64)])
+        primero = np.concatenate([[True], terminos[1:] != terminos[:-1]]) if len(terminos) else np.empty(0, bool)
+        anteriores = np.concatenate([[0], documentos[:-1]]) if len(terminos) else documentos
+        anteriores[primero] = ultimo[terminos[primero]]
+        nuevos, num_bytes = _codificar_varint(documentos - anteriores)
+        finales = np.append(np.flatnonzero(primero)[1:] - 1, len(terminos) - 1) if len(terminos) else primero
+        ultimo[terminos[finales]] = documentos[finales]
+
+        # Fusión de las listas: los bytes nuevos de cada término van detrás de los que ya tenía
+        tamanos_anteriores = np.zeros(num_terminos, dtype=np.int64)
+        tamanos_anteriores[:len(self._desplazamientos) - 1] = np.diff(self._desplazamientos)
+        tamanos_nuevos = np.bincount(terminos, weights=num_bytes, minlength=num_terminos).astype(np.int64)
+        desplazamientos = np.zeros(num_terminos + 1, dtype=np.int64)
+        np.cumsum(tamanos_anteriores + tamanos_nuevos, out=desplazamientos[1:])
+
+        postings = np.empty(desplazamientos[-1], dtype=np.uint8)
+        termino_byte = np.repeat(np.arange(num_terminos), tamanos_anteriores)
+        postings[np.arange(len(self._postings)) - self._desplazamientos[termino_byte]
+                 + desplazamientos[termino_byte]] = self._postings
+        inicios_nuevos = np.cumsum(tamanos_nuevos) - tamanos_nuevos
+        termino_byte = np.repeat(np.arange(num_terminos), tamanos_nuevos)
+        postings[np.arange(len(nuevos)) - inicios_nuevos[termino_byte] + desplazamientos[termino_byte]
+                 + tamanos_anteriores[termino_byte]] = nuevos
+
+        self._postings, self._desplazamientos, self._ultimo = postings, desplazamientos, ultimo
+        self._sentimientos = np.concatenate([self._sentimientos, sentimientos])
+        return self
+
+    def documentos(self, termino: str) -> np.ndarray:
+        """
+        Devuelve las posiciones, en orden creciente, de los tweets que contienen un término.
+        """
+        columna = self.terminos.get(termino)
+        if columna is None:
+            return np.empty(0, dtype=np.int64)
+        diferencias = _decodificar_varint(self._postings[self._desplazamientos[columna]:
+                                                         self._desplazamientos[columna + 1]])
+        return np.cumsum(diferencias) - 1
+
+    def consultar(self, terminos, modo: str = 'and') -> np.ndarray:
+        """
+        Devuelve las posiciones de los tweets que contienen todos los términos ('and') o alguno de
+        ellos ('or'). Las intersecciones empiezan por la lista más corta.
+
+        Parámetros:
+        - terminos (str | Iterable[str]): Términos a buscar. Una cadena se separa por espacios.
+        - modo (str): 'and' u 'or'.
+
+        Devuelve:
+        - np.ndarray: Posiciones de los tweets, en orden creciente.
+        """
+        if isinstance(terminos, str):
+            terminos = terminos.split()
+        listas = [self.documentos(termino) for termino in dict.fromkeys(terminos)]
+        if modo == 'or':
+            return np.unique(np.concatenate(listas)) if listas else np.empty(0, dtype=np.int64)
+        if modo != 'and':
+            raise ValueError(f"Modo de consulta no válido: {modo!r}. Usa 'and' u 'or'.")
+        if not listas:
+            return np.empty(0, dtype=np.int64)
+        listas.sort(key=len)
+        resultado = listas[0]
+        for lista in listas[1:]:
+            if len(resultado) == 0:
+                break
+            resultado = np.intersect1d(resultado, lista, assume_unique=True)
+        return resultado
+
+    def contar_por_sentimiento(self, terminos, modo: str = 'and') -> dict:
+        """
+        Devuelve cuántos tweets de cada sentimiento responden a una consulta. Para un solo término
+        se usan directamente las frecuencias documentales guardadas.
+
+        Parámetros:
+        - terminos (str | Iterable[str]): Términos a buscar, como en consultar.
+        - modo (str): 'and' u 'or'.
+
+        Devuelve:
+        - dict: Número de tweets de cada sentimiento, con todos los sentimientos del índice.
+        """
+        if isinstance(terminos, str):
+            terminos = terminos.split()
+        terminos = list(dict.fromkeys(terminos))
+        if len(terminos) == 1:
+            return self.frecuencia_documental(terminos[0])
+        conteos = np.bincount(self._sentimientos[self.consultar(terminos, modo)], minlength=len(self._etiquetas))
+        return {sentimiento: int(conteos[self._etiquetas._codigos[sentimiento]])
+                for sentimiento in sorted(self._documentales, key=_clave_etiqueta)}
+
+    def frecuencia_documental(self, termino: str) -> dict:
+        """
+        Devuelve el número de tweets de cada sentimiento que contienen un término.
+        """
+        columna = self.terminos.get(termino)
+        return {sentimiento: 0 if columna is None else int(self._documentales[sentimiento][columna])
+                for sentimiento in sorted(self._documentales, key=_clave_etiqueta)}
+
+    def guardar(self, ruta: str) -> None:
+        """
+        Guarda el índice en el formato binario por secciones de guardar_dataset_binario.
+        """
+        tipo_sentimientos = self._sentimientos.dtype.newbyteorder('<')
+        with open(ruta, 'wb') as file:
+            escritor = _EscritorSecciones(file)
+            escritor.cadenas('vocabulario', self.vocabulario, 100000)
+            escritor.seccion('postings', '|u1', self._postings)
+            escritor.seccion('postings.desplazamientos', '<i8', np.ascontiguousarray(self._desplazamientos, '<i8'))
+            escritor.seccion('postings.ultimo', '<i8', np.ascontiguousarray(self._ultimo, '<i8'))
+            escritor.cadenas('etiquetas', self._etiquetas.valores, 100000)
+            escritor.seccion('sentiment', tipo_sentimientos.str,
+                             np.ascontiguousarray(self._sentimientos, tipo_sentimientos))
+            # Una fila de frecuencias documentales por etiqueta, en el orden de la tabla de etiquetas
+            escritor.seccion('documentales', '<i8', np.ascontiguousarray(
+                [self._documentales[etiqueta] for etiqueta in self._etiquetas.valores], '<i8').reshape(-1))
+
+    @classmethod
+    def cargar(cls, ruta: str) -> 'IndiceInvertido':
+        """
+        Carga un índice guardado con guardar.
+        """
+        secciones = _leer_secciones(ruta)
+        if 'postings' not in secciones:
+            raise ValueError(f"El archivo {ruta} no contiene un índice invertido")
+
+        indice = cls()
+        indice.vocabulario = _cadenas_desde_secciones(secciones, 'vocabulario')
+        indice.terminos = {termino: columna for columna, termino in enumerate(indice.vocabulario)}
+        indice._postings = secciones['postings']
+        indice._desplazamientos = secciones['postings.desplazamientos'].astype(np.int64)
+        indice._ultimo = secciones['postings.ultimo'].astype(np.int64)
+        indice._etiquetas = _TablaCadenas.desde_valores(_cadenas_desde_secciones(secciones, 'etiquetas'))
+        indice._sentimientos = secciones['sentiment'].astype(secciones['sentiment'].dtype.newbyteorder('='))
+        etiquetas = indice._etiquetas.valores
+        # La forma se indica completa: con el vocabulario vacío, -1 no determinaría el número de filas
+        documentales = secciones['documentales'].astype(np.int64).reshape(len(etiquetas), len(indice.vocabulario))
+        indice._documentales = {etiqueta: documentales[fila] for fila, etiqueta in enumerate(etiquetas)}
+        return indice
+
+
+# Versión del preprocesado: debe incrementarse cuando un cambio en el código altere su resultado,
+# para que las entradas de la caché generadas con la versión anterior dejen de utilizarse
+VERSION_PREPROCESADO = 1
+
+
+class CachePreprocesado:
+    """
+    Caché en disco del corpus preprocesado, direccionada por contenido.
+
+    Cada entrada se identifica por el hash del archivo de entrada y de la configuración del
+    preprocesado (stopwords y expresiones regulares), por lo que cualquier cambio en alguno de
+    ellos genera una clave distinta. Las entradas se guardan en el formato binario por columnas de
+    guardar_dataset_binario, que no ejecuta código al leerse, y, cuando el tamaño total supera el
+    máximo, se eliminan las usadas hace más tiempo.
+    """
+
+    EXTENSION = '.bin'
+
+    def __init__(self, directorio: str, tamano_maximo: int = 2 * 1024 ** 3):
+        """
+        Parámetros:
+        - directorio (str): Carpeta donde se guardan las entradas de la caché.
+        - tamano_maximo (int): Tamaño máximo en bytes que pueden ocupar todas las entradas.
+        """
+        self.directorio = directorio
+        self.tamano_maximo = tamano_maximo
+
+    def clave(self, fichero: str, stopwords: Optional[Iterable[str]] = None) -> str:
+        """
+        Calcula la clave de la caché para un archivo de entrada y una configuración del preprocesado.
+
+        Parámetros:
+        - fichero (str): Ruta del archivo CSV o ZIP de entrada.
+        - stopwords (Iterable[str], opcional): Stopwords del preprocesado. Por defecto STOPWORDS.
+
+        Devuelve:
+        - str: Clave hexadecimal de la entrada.
+        """
+        stopwords = STOPWORDS if stopwords is None else stopwords
+        configuracion = {
+            'version': VERSION_PREPROCESADO,
+            'patron': _PATRON_LIMPIEZA.pattern,
+            'stopwords': sorted(stopwords),
+        }
+
+        resumen = hashlib.sha256()
+        with open(fichero, 'rb') as file:
+            for bloque in iter(lambda: file.read(1024 * 1024), b''):
+                resumen.update(bloque)
+        resumen.update(json.dumps(configuracion, sort_keys=True).encode('utf-8'))
+        return resumen.hexdigest()
+
+    def _ruta(self, clave: str) -> str:
+        return os.path.join(self.directorio, clave + self.EXTENSION)
+
+    def _entradas(self) -> list:
+        """
+        Devuelve las rutas de las entradas de la caché, de la usada hace más tiempo a la más reciente.
+        """
+        if not os.path.isdir(self.directorio):
+            return []
+        rutas = [os.path.join(self.directorio, nombre) for nombre in os.listdir(self.directorio)
+                 if nombre.endswith(self.EXTENSION)]
+        return sorted(rutas, key=os.path.getmtime)
+
+    def cargar(self, clave: str) -> Optional[tuple]:
+        """
+        Carga una entrada de la caché.
+
+        Parámetros:
+        - clave (str): Clave de la entrada.
+
+        Devuelve:
+        - tuple: Tupla con el DatasetColumnar preprocesado y su MatrizFrecuencias, o None si la
+          entrada no existe.
+        """
+        ruta = self._ruta(clave)
+        if not os.path.exists(ruta):
+            return None
+        dataset, matriz = cargar_dataset_binario(ruta)
+        # La matriz se devuelve aparte, como al preprocesar, sin asignarla como columna del dataset
+        dataset._frecuencias = None
+        # Se actualiza la fecha de modificación para que la entrada cuente como usada recientemente
+        os.utime(ruta)
+        return dataset, matriz
+
+    def guardar(self, clave: str, dataset: DatasetColumnar, matriz: MatrizFrecuencias) -> str:
+        """
+        Guarda una entrada en la caché y elimina las más antiguas si se supera el tamaño máximo.
+
+        Parámetros:
+        - clave (str): Clave de la entrada.
+        - dataset (DatasetColumnar): Dataset preprocesado.
+        - matriz (MatrizFrecuencias): Frecuencias de términos del dataset.
+
+        Devuelve:
+        - str: Ruta del archivo de la entrada.
+        """
+        os.makedirs(self.directorio, exist_ok=True)
+        ruta = self._ruta(clave)
+
+        # Se escribe en un archivo temporal y se renombra, para no dejar nunca entradas a medias
+        descriptor, ruta_temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        os.close(descriptor)
+        try:
+            guardar_dataset_binario(dataset, ruta_temporal, matriz)
+            os.replace(ruta_temporal, ruta)
+        except BaseException:
+            os.remove(ruta_temporal)
+            raise
+
+        self._expulsar(conservar=ruta)
+        return ruta
+
+    def _expulsar(self, conservar: Optional[str] = None) -> None:
+        """
+        Elimina las entradas usadas hace más tiempo hasta que el tamaño total no supere el máximo.
+        """
+        entradas = self._entradas()
+        tamano_total = sum(os.path.getsize(ruta) for ruta in entradas)
+        for ruta in entradas:
+            if tamano_total <= self.tamano_maximo:
+                break
+            if ruta == conservar:
+                continue
+            tamano_total -= os.path.getsize(ruta)
+            os.remove(ruta)
+
+    def invalidar(self, clave: Optional[str] = None) -> int:
+        """
+        Elimina una entrada de la caché o, si no se indica ninguna clave, todas.
+
+        Parámetros:
+        - clave (str, opcional): Clave de la entrada a eliminar.
+
+        Devuelve:
+        - int: Número de entradas eliminadas.
+        """
+        rutas = self._entradas() if clave is None else [self._ruta(clave)]
+        eliminadas = 0
+        for ruta in rutas:
+            if os.path.exists(ruta):
+                os.remove(ruta)
+                eliminadas += 1
+        return eliminadas
+
+    def tamano(self) -> int:
+        """Tamaño total en bytes de las entradas de la caché."""
+        return sum(os.path.getsize(ruta) for ruta in self._entradas())
+
+
+def cargar_preprocesado(fichero: str, cache: Optional[CachePreprocesado] = None,
+                        stopwords: Optional[Iterable[str]] = None, procesos: Optional[int] = 1) -> tuple:
+    """
+    Carga, preprocesa y cuenta las frecuencias de términos de un archivo CSV o ZIP, reutilizando
+    el resultado guardado en la caché si la entrada y la configuración no han cambiado.
+
+    Parámetros:
+    - fichero (str): Ruta del archivo CSV o ZIP con el dataset.
+    - cache (CachePreprocesado, opcional): Caché a utilizar. Si no se indica, siempre se preprocesa.
+    - stopwords (Iterable[str], opcional): Stopwords a eliminar. Por defecto STOPWORDS.
+    - procesos (int, opcional): Número de procesos del preprocesado, como en preprocesar_dataset.
+
+    Devuelve:
+    - tuple: Tupla con el DatasetColumnar preprocesado y su MatrizFrecuencias.
+    """
+    clave = None
+    if cache is not None:
+        clave = cache.clave(fichero, stopwords)
+        contenido = cache.cargar(clave)
+        if contenido is not None:
+            return contenido
+
+    dataset = carga_dataset_columnar(fichero)
+    preprocesar_dataset(dataset, stopwords, procesos)
+    matriz = construir_matriz_frecuencias(dataset)
+
+    if cache is not None:
+        cache.guardar(clave, dataset, matriz)
+    return dataset, matriz
+
+
+def obtener_estadisticas_clusters(origen, tamano_bloque: int = 100000) -> dict:
+    """
+    Obtiene el número de registros de cada cluster de la columna 'sentiment'.
+
+    Parámetros:
+    - origen (str | DatasetColumnar | list): Ruta del archivo CSV o dataset en memoria. Si es una
+      ruta, solo se lee la columna 'sentiment', por bloques, sin cargar el resto de columnas.
+    - tamano_bloque (int): Número de filas leídas en cada bloque al recorrer un archivo CSV.
+
+    Devuelve:
+    - dict: Diccionario con el número de registros de cada cluster.
+    """
+    if isinstance(origen, DatasetColumnar):
+        return origen.estadisticas_clusters()
+
+    if isinstance(origen, (str, os.PathLike)):
+        import pandas as pd
+
+        conteos = Counter()
+        for bloque in pd.read_csv(origen, usecols=['sentiment'], dtype=str, keep_default_na=False,
+                                  chunksize=tamano_bloque):
+            conteos.update(bloque['sentiment'].value_counts().to_dict())
+        return dict(conteos)
+
+    return dict(Counter(registro['sentiment'] for registro in origen))
+
+
 def obtener_numero_clusters(csv_file):
     """
     Obtiene el número de clusters en la columna 'sentiment' del dataset.
 
     Parámetros:
-    - csv_file (str): Ruta del archivo CSV que contiene el dataset.
+    - csv_file (str): Ruta del archivo CSV que contiene el dataset. También acepta el dataset
+      en memoria (DatasetColumnar o lista de diccionarios).
 
     Devuelve:
     - int: Número de clusters encontrados.
     """
-    # Cargar el dataset desde el archivo CSV
-    dataset = pd.read_csv(csv_file)
-
-    # Obtener los valores únicos en la columna 'sentiment'
-    clusters = dataset['sentiment'].unique()
+    # Contar los registros de cada valor único en la columna 'sentiment'
+    clusters = obtener_estadisticas_clusters(csv_file)
 
     # Obtener el número de clusters
     num_clusters = len(clusters)
@@ -224,13 +3296,246 @@ def eliminar_elementos_nulos(dataset):
     return dataset_sin_nulos
 
 
-def generar_wordcloud_por_cluster(dataset_sin_nulos: object) -> object:
+def _resumir_distribucion(histograma: Counter) -> dict:
+    """
+    Resume un histograma de valores enteros con su mínimo, máximo, media y percentiles 50, 90 y 99.
+    """
+    total = sum(histograma.values())
+    if total == 0:
+        return {'min': None, 'max': None, 'media': None, 'p50': None, 'p90': None, 'p99': None}
+
+    valores = sorted(histograma)
+    resumen = {'min': valores[0], 'max': valores[-1],
+               'media': sum(valor * conteo for valor, conteo in histograma.items()) / total}
+    acumulado = 0
+    percentiles = iter([('p50', 0.5), ('p90', 0.9), ('p99', 0.99)])
+    nombre, fraccion = next(percentiles)
+    for valor in valores:
+        acumulado += histograma[valor]
+        while nombre is not None and acumulado >= fraccion * total:
+            resumen[nombre] = valor
+            nombre, fraccion = next(percentiles, (None, None))
+    return resumen
+
+
+class PerfilCalidad:
+    """
+    Perfil de calidad de un dataset calculado en una sola pasada: porcentaje de textos vacíos,
+    identificadores y textos repetidos, registros por sentimiento y distribuciones de la longitud
+    y del número de tokens de los textos.
+
+    El perfil se actualiza mientras se filtran los registros con texto vacío, tanto sobre un
+    dataset en memoria como sobre un iterador de registros, de modo que comprobar la calidad no
+    obliga a recorrer los datos otra vez. Los perfiles de fragmentos distintos se pueden fusionar.
+    """
+
+    def __init__(self):
+        self.num_registros = 0
+        self.num_vacios = 0
+        self.num_ids_duplicados = 0
+        self.num_textos_duplicados = 0
+        self.registros_por_sentimiento = Counter()
+        self.longitudes = Counter()
+        self.tokens = Counter()
+        self._ids = set()
+        self._textos = set()
+
+    def _registrar_bloque(self, sentimientos: list, identificadores: list, textos: list) -> list:
+        """
+        Añade un bloque de registros, dado por columnas, al perfil.
+
+        Devuelve:
+        - list: Para cada registro, True si su texto no está vacío.
+        """
+        num_tokens = [len(texto.split()) for texto in textos]
+        # Un texto vacío o con solo espacios no tiene ningún token
+        validos = [tokens > 0 for tokens in num_tokens]
+
+        # Los repetidos son los elementos que no hacen crecer los conjuntos de ya vistos. Los textos
+        # se comparan por una huella de 64 bits, estable entre procesos a diferencia de hash(), para
+        # no tener que conservar las cadenas
+        tamano = len(self._ids)
+        self._ids.update(identificadores)
+        ids_duplicados = len(validos) - (len(self._ids) - tamano)
+
+        con_texto = list(itertools.compress(textos, validos))
+        tamano = len(self._textos)
+        self._textos.update(hashlib.blake2b(texto.encode('utf-8'), digest_size=8).digest() for texto in con_texto)
+        textos_duplicados = len(con_texto) - (len(self._textos) - tamano)
+
+        self.num_registros += len(validos)
+        self.num_vacios += validos.count(False)
+        self.num_ids_duplicados += ids_duplicados
+        self.num_textos_duplicados += textos_duplicados
+        self.registros_por_sentimiento.update(sentimientos)
+        self.longitudes.update(map(len, textos))
+        self.tokens.update(num_tokens)
+        return validos
+
+    def filtrar(self, registros: Iterable[dict], tamano_bloque: int = 10000) -> Iterator[dict]:
+        """
+        Recorre los registros actualizando el perfil y devuelve de forma perezosa los que tienen
+        texto. El perfil está completo cuando se ha consumido el iterador.
+
+        Parámetros:
+        - registros (Iterable[dict]): Registros con las claves 'sentiment', 'id' y 'text'.
+        - tamano_bloque (int): Número de registros que se procesan juntos.
+
+        Devuelve:
+        - Iterator[dict]: Registros cuyo texto no está vacío.
+        """
+        for bloque in _dividir_en_bloques(registros, tamano_bloque):
+            validos = self._registrar_bloque([registro['sentiment'] for registro in bloque],
+                                             [registro['id'] for registro in bloque],
+                                             [registro.get('text', '') for registro in bloque])
+            yield from itertools.compress(bloque, validos)
+
+    def perfilar(self, dataset) -> list:
+        """
+        Actualiza el perfil con todos los registros de un dataset en memoria.
+
+        Parámetros:
+        - dataset (list | DatasetColumnar): Dataset a perfilar.
+
+        Devuelve:
+        - list: Registros del dataset cuyo texto no está vacío.
+        """
+        if not isinstance(dataset, DatasetColumnar):
+            return list(self.filtrar(dataset))
+
+        # En el dataset por columnas se recorren directamente las columnas, sin crear las vistas
+        # de los registros que se descartan
+        validos = self._registrar_bloque(dataset.columna('sentiment'), dataset.columna('id'), dataset._text)
+        return [RegistroTweet(dataset, indice) for indice in itertools.compress(range(len(dataset)), validos)]
+
+    @property
+    def porcentaje_vacios(self) -> float:
+        """Porcentaje de registros con texto vacío, con el mismo criterio que verificar_elementos_vacios."""
+        if self.num_registros == 0:
+            return 100.0
+        return self.num_vacios / self.num_registros * 100
+
+    def resumen(self) -> dict:
+        """
+        Devuelve el perfil como un diccionario serializable en JSON.
+        """
+        return {
+            'registros': self.num_registros,
+            'vacios': self.num_vacios,
+            'porcentaje_vacios': self.porcentaje_vacios,
+            'ids_duplicados': self.num_ids_duplicados,
+            'textos_duplicados': self.num_textos_duplicados,
+            'registros_por_sentimiento': dict(sorted(self.registros_por_sentimiento.items())),
+            'longitud_texto': _resumir_distribucion(self.longitudes),
+            'tokens_texto': _resumir_distribucion(self.tokens),
+        }
+
+    def _sumar(self, otro: 'PerfilCalidad') -> None:
+        """
+        Suma en el propio perfil los registros de otro perfil. Los identificadores y textos que
+        aparecen en ambos cuentan como repetidos.
+        """
+        self.num_registros += otro.num_registros
+        self.num_vacios += otro.num_vacios
+        self.num_ids_duplicados += otro.num_ids_duplicados + len(self._ids & otro._ids)
+        self.num_textos_duplicados += otro.num_textos_duplicados + len(self._textos & otro._textos)
+        self.registros_por_sentimiento.update(otro.registros_por_sentimiento)
+        self.longitudes.update(otro.longitudes)
+        self.tokens.update(otro.tokens)
+        self._ids |= otro._ids
+        self._textos |= otro._textos
+
+    def fusionar(self, otro: 'PerfilCalidad') -> 'PerfilCalidad':
+        """
+        Combina dos perfiles en uno nuevo, sin modificar ninguno de los dos. Los identificadores y
+        textos que aparecen en ambos cuentan como repetidos.
+
+        Parámetros:
+        - otro (PerfilCalidad): Perfil a combinar con este.
+
+        Devuelve:
+        - PerfilCalidad: Perfil de la unión de ambos fragmentos.
+        """
+        resultado = PerfilCalidad()
+        resultado._sumar(self)
+        resultado._sumar(otro)
+        return resultado
+
+    __add__ = fusionar
+
+    def __eq__(self, otro) -> bool:
+        if not isinstance(otro, PerfilCalidad):
+            return NotImplemented
+        return self.resumen() == otro.resumen() and self._ids == otro._ids and self._textos == otro._textos
+
+
+def perfilar_calidad(registros) -> tuple:
+    """
+    Calcula en una sola pasada el perfil de calidad de un dataset y elimina los registros con
+    texto vacío, sustituyendo a eliminar_elementos_nulos y verificar_elementos_vacios.
+
+    Parámetros:
+    - registros (list | DatasetColumnar | Iterable[dict]): Dataset en memoria o iterador de registros.
+
+    Devuelve:
+    - tuple: Lista de registros con texto y PerfilCalidad del dataset original.
+    """
+    perfil = PerfilCalidad()
+    return perfil.perfilar(registros), perfil
+
+
+def _renderizar_wordcloud(tarea: tuple) -> str:
+    """
+    Renderiza el word cloud de un cluster a partir de sus frecuencias y lo guarda como PNG.
+    """
+    from wordcloud import WordCloud
+
+    frecuencias, ruta = tarea
+    WordCloud(width=800, height=400).generate_from_frequencies(frecuencias).to_file(ruta)
+    return ruta
+
+
+def generar_wordcloud_por_cluster(dataset_sin_nulos: object, directorio_salida: Optional[str] = None,
+                                  indice: Optional['AcumuladorFrecuencias'] = None,
+                                  procesos: Optional[int] = 1) -> object:
     """
     Genera un word cloud para cada cluster en el dataset.
 
+    Por defecto cada word cloud se muestra en una ventana. Si se indica un directorio de salida, los
+    word clouds se generan a partir de las frecuencias de cada cluster, sin volver a procesar los
+    textos, y se guardan como PNG sin abrir ninguna ventana.
+
     Parámetros:
     - dataset (list): Dataset representado como una lista de diccionarios.
+    - directorio_salida (str, opcional): Carpeta donde guardar un PNG por cluster.
+    - indice (AcumuladorFrecuencias, opcional): Índice de conteos por cluster ya construido, usado
+      solo cuando se indica directorio_salida.
+    - procesos (int, opcional): Número de procesos con los que renderizar los clusters en paralelo
+      cuando se indica directorio_salida. Con None se utiliza un proceso por núcleo.
+
+    Devuelve:
+    - list: Rutas de los PNG generados cuando se indica directorio_salida.
     """
+    from wordcloud import WordCloud
+
+    if directorio_salida is not None:
+        if indice is None:
+            indice = construir_indice_por_cluster(dataset_sin_nulos)
+        os.makedirs(directorio_salida, exist_ok=True)
+
+        # WordCloud solo utiliza las max_words palabras más frecuentes, así que basta con enviar esas
+        max_words = WordCloud().max_words
+        tareas = [(dict(indice.mas_frecuentes(cluster, max_words)),
+                   os.path.join(directorio_salida, f"wordcloud_cluster_{cluster}.png"))
+                  for cluster in indice.sentimientos if indice.conteos_por_sentimiento[cluster]]
+
+        if procesos == 1 or len(tareas) < 2:
+            return [_renderizar_wordcloud(tarea) for tarea in tareas]
+        with multiprocessing.Pool(procesos) as pool:
+            return pool.map(_renderizar_wordcloud, tareas)
+
+    import matplotlib.pyplot as plt
+
     clusters = set(d['sentiment'] for d in dataset_sin_nulos)
     for cluster in clusters:
         text_cluster = ' '.join(d['text'] for d in dataset_sin_nulos if d['sentiment'] == cluster)
@@ -243,15 +3548,21 @@ def generar_wordcloud_por_cluster(dataset_sin_nulos: object) -> object:
         plt.show()
 
 
-def generar_histograma_por_cluster(dataset_sin_nulos):
+def generar_histograma_por_cluster(dataset_sin_nulos, indice: Optional[AcumuladorFrecuencias] = None):
     """
-    Genera un histograma por cluster con las frecuencias de las 20 palabras más frecuentes.
+    Genera un histograma por cluster con las frecuencias de las 20 palabras más frecuentes,
+    medidas como el número de tweets del cluster en que aparece cada palabra.
 
     Parámetros:
     - dataset_sin_nulos (list): Dataset representado como una lista de diccionarios sin elementos nulos.
+    - indice (AcumuladorFrecuencias, opcional): Índice de conteos por cluster ya construido. Si no se
+      indica, se construye a partir del dataset.
     """
-    frecuencias, vocabulario = obtener_frecuencias_y_vocabulario(dataset_sin_nulos)
-    clusters = set(d['sentiment'] for d in dataset_sin_nulos)
+    import matplotlib.pyplot as plt
+
+    if indice is None:
+        indice = construir_indice_por_cluster(dataset_sin_nulos)
+    clusters = indice.sentimientos
 
     num_clusters = len(clusters)
     num_columns = 2  # valor variable según número de columnas deseadas
@@ -265,10 +3576,7 @@ def generar_histograma_por_cluster(dataset_sin_nulos):
 
         ax = axes[row, col]
 
-        frecuencias_cluster = Counter([palabra for j, frecuencia in enumerate(frecuencias)
-                                       for palabra, count in frecuencia.items()
-                                       if dataset_sin_nulos[j]['sentiment'] == cluster])
-        frecuencias_top20 = frecuencias_cluster.most_common(20)
+        frecuencias_top20 = indice.mas_frecuentes(cluster, 20, por_documento=True)
 
         palabras = [palabra for palabra, _ in frecuencias_top20]
         counts = [count for _, count in frecuencias_top20]